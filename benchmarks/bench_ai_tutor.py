@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+AI tutor benchmark: KoreanAI / JapaneseAI response generation.
+
+JapaneseAI scans its whole vocabulary for every message, so its cost grows
+with vocabulary size and message length; KoreanAI looks words up in a jamo
+index built once per instance (counted in its memory). The vocabulary tables are
+padded with synthetic words (Hangul syllables, kana/kanji) up to each
+requested size, then a fixed corpus of mixed Uzbek/Korean/Japanese messages
+of varying length is replayed through generate_response.
+
+Reported per responder and vocabulary size: messages/s, memory of one
+responder instance, and latency p50/p95 per branch (complex, vocabulary,
+greeting, default; JapaneseAI answers non-matching Japanese text from a
+separate "script" branch).
+
+Usage:
+    python benchmarks/bench_ai_tutor.py [--vocab 250,1000,4000,12000] [--messages 2000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ai_conversation_advanced import JapaneseAI, KoreanAI
+
+UZBEK_WORDS = [
+    "men", "sen", "biz", "har", "kuni", "maktabga", "boraman", "do'stlarim", "bilan", "ovqat",
+    "yeyman", "koreys", "tilini", "o'rganyapman", "juda", "qiziqarli", "lekin", "qiyin", "oilam",
+    "katta", "salom", "qalaysiz", "rahmat", "bugun", "ertaga", "kitob", "o'qiyman", "yaxshi",
+]
+GREETINGS = ["안녕하세요", "안녕", "hi", "hello", "こんにちは", "Salom"]
+
+# Responder method -> branch; whichever runs first for a message names its branch
+KOREAN_BRANCHES = {
+    "handle_complex_sentence": "complex",
+    "handle_vocabulary_sentence": "vocabulary",
+    "greeting_response": "greeting",
+    "default_educational_response": "default",
+}
+JAPANESE_BRANCHES = {
+    "handle_complex_japanese": "complex",
+    "explain_japanese_vocabulary": "vocabulary",
+}
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, int(len(values) * pct / 100))
+    return values[index]
+
+
+def hangul_word(rng: random.Random) -> str:
+    return "".join(chr(0xAC00 + rng.randrange(11172)) for _ in range(rng.randint(2, 3)))
+
+
+def japanese_word(rng: random.Random) -> str:
+    blocks = ((0x3041, 0x3093), (0x30A1, 0x30F3), (0x4E00, 0x9FAF))
+    low, high = rng.choice(blocks)
+    return "".join(chr(rng.randint(low, high)) for _ in range(rng.randint(1, 4)))
+
+
+def vocabulary_size(responder) -> int:
+    return sum(len(words) for words in responder.vocabulary.values())
+
+
+def pad_vocabulary(responder, size: int, make_word: Callable[[random.Random], str], seed: int = 1) -> None:
+    """Grow the responder's categories round-robin with synthetic words until `size` words"""
+    rng = random.Random(seed)
+    known = {word for words in responder.vocabulary.values() for word in words}
+    categories = list(responder.vocabulary)
+    index = 0
+    while vocabulary_size(responder) < size:
+        word = make_word(rng)
+        if word in known:
+            continue
+        known.add(word)
+        responder.vocabulary[categories[index % len(categories)]].append(word)
+        index += 1
+
+
+def build_corpus(count: int, seed: int = 42) -> List[str]:
+    """Mixed-language messages: 1-3, 4-5 and 6-40 words, some with known vocabulary"""
+    rng = random.Random(seed)
+    korean_known = [word for words in KoreanAI().vocabulary.values() for word in words]
+    japanese_known = [word for words in JapaneseAI().vocabulary.values() for word in words]
+
+    def word(language: str) -> str:
+        if language == "uz":
+            return rng.choice(UZBEK_WORDS)
+        if language == "ko":
+            return rng.choice(korean_known) if rng.random() < 0.3 else hangul_word(rng)
+        return rng.choice(japanese_known) if rng.random() < 0.3 else japanese_word(rng)
+
+    corpus = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.1:
+            corpus.append(rng.choice(GREETINGS))
+            continue
+        length = rng.choice((rng.randint(1, 3), rng.randint(4, 5), rng.randint(6, 40)))
+        languages = rng.choice((("uz",), ("ko",), ("ja",), ("uz", "ko"), ("uz", "ja")))
+        corpus.append(" ".join(word(rng.choice(languages)) for _ in range(length)))
+    return corpus
+
+
+def instrument(responder, branches: Dict[str, str], record: List[str]) -> None:
+    """Wrap branch methods on the instance so each call notes its branch"""
+    for method, branch in branches.items():
+        original = getattr(responder, method)
+
+        def wrapper(*args, _original=original, _branch=branch, **kwargs):
+            record.append(_branch)
+            return _original(*args, **kwargs)
+
+        setattr(responder, method, wrapper)
+
+
+def build_responder(factory, size: int, make_word) -> Tuple[object, int]:
+    """Responder padded to `size` words and the bytes it allocated"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    responder = factory()
+    pad_vocabulary(responder, size, make_word)
+    if hasattr(responder, "vocabulary_index"):
+        responder.vocabulary_index()
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return responder, allocated
+
+
+def japanese_inline_branch(response: str) -> str:
+    # JapaneseAI builds these two answers inline, so they are told apart by text
+    return "script" if response.startswith("日本語で書いていますね") else "default"
+
+
+async def run(factory, branches, make_word, size: int, corpus: List[str]) -> dict:
+    responder, allocated = build_responder(factory, size, make_word)
+    record: List[str] = []
+    instrument(responder, branches, record)
+    random.seed(0)  # default/greeting answers sample the vocabulary
+
+    timings: Dict[str, List[float]] = {}
+    total_started = time.perf_counter()
+    for message in corpus:
+        record.clear()
+        started = time.perf_counter()
+        response = await responder.generate_response(message, 0)
+        elapsed = (time.perf_counter() - started) * 1_000_000
+        branch = record[0] if record else japanese_inline_branch(response)
+        timings.setdefault(branch, []).append(elapsed)
+    wall = time.perf_counter() - total_started
+
+    return {
+        "vocabulary": vocabulary_size(responder),
+        "memory_kib": allocated / 1024,
+        "messages_per_s": len(corpus) / wall,
+        "branches": timings,
+    }
+
+
+def report(name: str, result: dict) -> None:
+    print(f"\n{name:<10} vocab {result['vocabulary']:>6}   {result['messages_per_s']:9.0f} msg/s   "
+          f"instance {result['memory_kib']:8.1f} KiB")
+    for branch, values in sorted(result["branches"].items()):
+        print(f"   {branch:<11} p50 {statistics.median(values):8.1f} µs   "
+              f"p95 {percentile(values, 95):8.1f} µs   n={len(values)}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vocab", default="250,1000,4000,12000",
+                        help="comma separated vocabulary sizes (default: 250,1000,4000,12000)")
+    parser.add_argument("--messages", type=int, default=2000)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.messages)
+    lengths = [len(message.split()) for message in corpus]
+    print(f"Corpus: {len(corpus)} messages, {statistics.mean(lengths):.1f} words avg, "
+          f"{max(len(message) for message in corpus)} chars max")
+
+    for size in (int(value) for value in args.vocab.split(",") if value.strip()):
+        report("KoreanAI", await run(KoreanAI, KOREAN_BRANCHES, hangul_word, size, corpus))
+        report("JapaneseAI", await run(JapaneseAI, JAPANESE_BRANCHES, japanese_word, size, corpus))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Database layer scaling benchmark.
+
+For every scale (number of users) a fresh SQLite database is created with
+the bot's schema and filled with a synthetic but realistic dataset: users
+with skewed activity and ratings, referrals, quizzes with questions, quiz
+attempts, content views, sections/content and SRS cards. Then each public
+function of database.py and utils/rating_system.py, plus the scheduler's
+audience queries, is timed the way the bot calls it (new connection per
+call).
+
+Results are written as JSON. With --baseline the run is compared against a
+stored result and exits with status 1 when a function's median got slower
+than the threshold allows.
+
+Usage:
+    python benchmarks/bench_database.py [--scales 10k,100k,1M]
+        [--output bench_database.json] [--baseline baseline.json]
+        [--threshold 0.25] [--save-baseline]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ADMIN_ID = 5974022170
+QUESTIONS_PER_QUIZ = 10
+SQLITE_TIME = "%Y-%m-%d %H:%M:%S"
+
+Case = Tuple[str, Callable[[], Awaitable[Any]], int]
+
+
+def parse_scale(value: str) -> int:
+    value = value.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    return int(float(value.rstrip("km")) * multiplier)
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, int(len(values) * pct / 100))
+    return values[index]
+
+
+# =====================
+# Synthetic dataset
+# =====================
+
+def generate(path: str, users: int, seed: int = 42) -> Dict[str, int]:
+    """Fill an initialized database; returns row counts per table"""
+    rng = random.Random(seed)
+    now = datetime.now()
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA synchronous = OFF")
+
+    def timestamp(max_days: float, skew: float = 1.0) -> str:
+        # skew > 1 pulls timestamps towards "now": most users were seen recently
+        return (now - timedelta(days=max_days * rng.random() ** skew)).strftime(SQLITE_TIME)
+
+    user_rows = []
+    for user_id in range(1, users + 1):
+        premium = rng.random() < 0.05
+        expires = (now + timedelta(days=rng.uniform(-30, 30))).isoformat() if premium else None
+        sessions = int(rng.expovariate(1 / 8))
+        user_rows.append((
+            user_id, f"user{user_id}", f"Foydalanuvchi {user_id}", None, premium, expires,
+            f"ref{user_id}", rng.randint(1, users) if rng.random() < 0.1 else None,
+            timestamp(365), timestamp(60, 3.0), sessions, int(rng.expovariate(1 / 40)),
+            int(rng.expovariate(1 / 30)), int(rng.expovariate(1 / 4)),
+            round(rng.expovariate(1 / 25), 1) if sessions else 0.0, 0,
+        ))
+    conn.executemany("""
+        INSERT INTO users (user_id, username, first_name, last_name, is_premium, premium_expires_at,
+                           referral_code, referred_by, created_at, last_activity, total_sessions,
+                           words_learned, quiz_score_total, quiz_attempts, rating_score, referral_count)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, user_rows)
+    referrals = [(row[7], row[0], row[8]) for row in user_rows if row[7]]
+    conn.executemany("INSERT INTO referrals (referrer_id, referred_id, created_at) VALUES (?, ?, ?)", referrals)
+    conn.execute("""
+        UPDATE users SET referral_count = (
+            SELECT COUNT(*) FROM referrals WHERE referrer_id = users.user_id
+        ) WHERE user_id IN (SELECT referrer_id FROM referrals)
+    """)
+    del user_rows
+
+    sections = 20
+    conn.executemany(
+        "INSERT INTO sections (name, description, language, is_premium, created_by) VALUES (?, ?, ?, ?, ?)",
+        [(f"Bo'lim {i}", "Tavsif", "korean" if i % 4 else "japanese", i % 5 == 0, ADMIN_ID)
+         for i in range(1, sections + 1)]
+    )
+    conn.executemany(
+        "INSERT INTO subsections (section_id, name, description, is_premium) VALUES (?, ?, ?, ?)",
+        [(section_id, f"Mavzu {section_id}.{i}", "Tavsif", False)
+         for section_id in range(1, sections + 1) for i in range(5)]
+    )
+    content_count = max(1000, users // 100)
+    conn.executemany("""
+        INSERT INTO content (section_id, subsection_id, title, description, content_type, file_id, content_text, is_premium)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, [
+        (rng.randint(1, sections), rng.choice((0, rng.randint(1, sections * 5))), f"Dars {i}", "Tavsif",
+         rng.choice(("text", "photo", "video", "audio")), f"file-{i}", "안녕하세요 " * 20, rng.random() < 0.2)
+        for i in range(content_count)
+    ])
+
+    quizzes = max(50, users // 1000)
+    conn.executemany(
+        "INSERT INTO quizzes (title, description, language, category, is_premium, created_by, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(f"Test {i}", "Tavsif", "korean", "vocabulary", False,
+          rng.choice((ADMIN_ID, rng.randint(1, users))), timestamp(180)) for i in range(quizzes)]
+    )
+    conn.executemany("""
+        INSERT INTO questions (quiz_id, question_text, option_a, option_b, option_c, option_d, correct_answer, explanation)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, [
+        (quiz_id, f"Savol {n}", "A", "B", "C", "D", rng.choice("ABCD"), "")
+        for quiz_id in range(1, quizzes + 1) for n in range(QUESTIONS_PER_QUIZ)
+    ])
+    attempts = users * 2
+    conn.executemany(
+        "INSERT INTO quiz_attempts (user_id, quiz_id, score, total_questions, completed_at) VALUES (?, ?, ?, ?, ?)",
+        (
+            # A few popular quizzes get most attempts
+            (rng.randint(1, users), min(quizzes, int(rng.paretovariate(1.2))), rng.randint(0, QUESTIONS_PER_QUIZ),
+             QUESTIONS_PER_QUIZ, timestamp(30, 2.0))
+            for _ in range(attempts)
+        )
+    )
+    conn.executemany(
+        "INSERT INTO user_progress (user_id, content_id, completed, completed_at) VALUES (?, ?, ?, ?)",
+        ((rng.randint(1, users), rng.randint(1, content_count), True, timestamp(30, 2.0)) for _ in range(users))
+    )
+    epoch = int(time.time())
+    conn.executemany(
+        "INSERT OR IGNORE INTO srs_cards (user_id, question_id, repetitions, interval_days, ease, due_at) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        ((rng.randint(1, users), rng.randint(1, quizzes * QUESTIONS_PER_QUIZ), 1, 1.0, 2.5,
+          epoch + rng.randint(-7 * 86400, 7 * 86400)) for _ in range(users))
+    )
+    conn.commit()
+
+    counts = {}
+    for table in ("users", "referrals", "content", "quizzes", "questions", "quiz_attempts", "user_progress", "srs_cards"):
+        counts[table] = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    conn.execute("ANALYZE")
+    conn.close()
+    return counts
+
+
+# =====================
+# Cases
+# =====================
+
+def build_cases(users: int, quizzes: int) -> List[Case]:
+    """(name, call, max repeats); write paths touch random existing rows"""
+    import aiosqlite
+
+    import database
+    from config import DATABASE_PATH
+    from utils import rating_system, scheduler
+    from utils.live_counters import live_counters
+    from utils.srs import iter_due_users
+
+    rng = random.Random(7)
+    new_user_ids = iter(range(users + 1, users + 1_000_000))
+
+    def user() -> int:
+        return rng.randint(1, users)
+
+    def quiz() -> int:
+        return rng.randint(1, quizzes)
+
+    async def scheduler_query(sql: str, *params: Any) -> List[Any]:
+        async with aiosqlite.connect(DATABASE_PATH) as db:
+            cursor = await db.execute(sql, params)
+            return await cursor.fetchall()
+
+    async def all_due_users() -> int:
+        return sum([len(batch) async for batch in iter_due_users()])
+
+    def engagement_window() -> Tuple[str, str]:
+        now = datetime.now()
+        return (now - timedelta(days=7)).isoformat(), (now - timedelta(days=3)).isoformat()
+
+    # Full-table readers run a few times only: at 1M users one call takes seconds
+    full_scan = 3
+    return [
+        ("database.get_user", lambda: database.get_user(user()), 0),
+        ("database.create_user", lambda: database.create_user(next(new_user_ids), "bench", "Bench"), 0),
+        ("database.update_user_activity", lambda: database.update_user_activity(user()), 0),
+        ("database.is_premium_active", lambda: database.is_premium_active(user()), 0),
+        ("database.activate_premium", lambda: database.activate_premium(user()), 0),
+        ("database.get_sections", lambda: database.get_sections("korean"), 0),
+        ("database.get_subsections_by_section", lambda: database.get_subsections_by_section(rng.randint(1, 20)), 0),
+        ("database.get_content_by_subsection", lambda: database.get_content_by_subsection(rng.randint(1, 100)), 0),
+        ("database.get_user_referrals_count", lambda: database.get_user_referrals_count(user()), 0),
+        ("database.get_user_by_referral_code", lambda: database.get_user_by_referral_code(f"ref{user()}"), 0),
+        ("database.add_referral", lambda: database.add_referral(user(), user()), 0),
+        ("database.get_referral_stats", lambda: database.get_referral_stats(user()), 0),
+        ("database.update_user_rating", lambda: database.update_user_rating(user(), "quiz_completed"), 0),
+        ("database.get_user_stats", lambda: database.get_user_stats(user()), 0),
+        ("database.get_leaderboard", lambda: database.get_leaderboard(10), 0),
+        ("database.get_quizzes", lambda: database.get_quizzes("korean"), 0),
+        ("database.get_questions_by_quiz", lambda: database.get_questions_by_quiz(quiz()), 0),
+        ("database.record_quiz_attempt", lambda: database.record_quiz_attempt(user(), quiz(), 7, QUESTIONS_PER_QUIZ), 0),
+        ("database.get_question_stats", lambda: database.get_question_stats(quiz()), 0),
+        ("database.get_user_quizzes", lambda: database.get_user_quizzes(user()), 0),
+        ("database.get_user_count", database.get_user_count, 0),
+        ("database.get_premium_user_count", database.get_premium_user_count, 0),
+        ("database.get_quiz_count", database.get_quiz_count, 0),
+        ("database.get_content_count", database.get_content_count, 0),
+        ("database.get_admin_statistics", database.get_admin_statistics, full_scan),
+        ("database.get_premium_users", database.get_premium_users, full_scan),
+        ("database.get_all_user_ids", database.get_all_user_ids, full_scan),
+        ("database.get_all_users", database.get_all_users, full_scan),
+        ("rating_system.update_user_rating", lambda: rating_system.update_user_rating(user(), "quiz_complete"), 0),
+        ("rating_system.get_user_rating_details", lambda: rating_system.get_user_rating_details(user()), 0),
+        ("rating_system.get_rating_leaderboard", lambda: rating_system.get_rating_leaderboard(10), 0),
+        ("rating_system.calculate_weekly_bonus", rating_system.calculate_weekly_bonus, 1),
+        ("live_counters.load", live_counters.load, full_scan),
+        ("scheduler.motivation_audience", lambda: scheduler_query(scheduler.MOTIVATION_AUDIENCE_SQL), 0),
+        ("scheduler.promotion_audience", lambda: scheduler_query(scheduler.PROMOTION_AUDIENCE_SQL), 0),
+        ("scheduler.top_rated", lambda: scheduler_query(scheduler.TOP_RATED_SQL), 0),
+        ("scheduler.expired_premiums", lambda: scheduler_query(scheduler.EXPIRED_PREMIUMS_SQL), 0),
+        ("scheduler.engagement_audience",
+         lambda: scheduler_query(scheduler.ENGAGEMENT_AUDIENCE_SQL, *engagement_window()), 0),
+        ("scheduler.due_review_users", all_due_users, full_scan),
+    ]
+
+
+async def time_case(call: Callable[[], Awaitable[Any]], repeat: int, budget: float) -> Dict[str, Any]:
+    """Median/p95 over up to `repeat` calls, stopping early once `budget` seconds are spent"""
+    timings = []
+    spent = 0.0
+    while len(timings) < repeat and (spent < budget or len(timings) < 1):
+        started = time.perf_counter()
+        await call()
+        elapsed = time.perf_counter() - started
+        timings.append(elapsed * 1000)
+        spent += elapsed
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "runs": len(timings),
+    }
+
+
+async def run_scale(path: str, users: int, repeat: int, budget: float, only: Optional[str]) -> Dict[str, Any]:
+    from database import init_db
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    await init_db()
+
+    started = time.perf_counter()
+    counts = generate(path, users)
+    print(f"\n📦 {users:,} users: dataset in {time.perf_counter() - started:.1f}s "
+          f"({', '.join(f'{table} {count:,}' for table, count in counts.items())})")
+
+    results = {}
+    for name, call, max_repeat in build_cases(users, counts["quizzes"]):
+        if only and only not in name:
+            continue
+        try:
+            # One warm-up call so connection setup and page cache are comparable
+            await call()
+            result = await time_case(call, max_repeat or repeat, budget)
+        except Exception as e:
+            # A broken function is reported, not allowed to stop the suite
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+            print(f"   {name:<42} ❌ {type(e).__name__}: {e}")
+            continue
+        results[name] = result
+        print(f"   {name:<42} p50 {result['median_ms']:9.2f} ms   p95 {result['p95_ms']:9.2f} ms   "
+              f"n={result['runs']}")
+    return {"rows": counts, "functions": results}
+
+
+# =====================
+# Baseline comparison
+# =====================
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float, min_delta_ms: float) -> List[str]:
+    """Functions whose median grew by more than threshold (and min_delta_ms) at a scale both runs have"""
+    regressions = []
+    for scale, result in current["scales"].items():
+        previous = baseline.get("scales", {}).get(scale)
+        if not previous:
+            continue
+        for name, timing in result["functions"].items():
+            before = previous["functions"].get(name)
+            if "error" in timing:
+                if before and "error" not in before:
+                    regressions.append(f"{scale} users  {name}: now fails ({timing['error']})")
+                continue
+            if not before or "error" in before:
+                continue
+            now_ms, before_ms = timing["median_ms"], before["median_ms"]
+            if now_ms > before_ms * (1 + threshold) and now_ms - before_ms >= min_delta_ms:
+                regressions.append(
+                    f"{scale} users  {name}: {before_ms:.2f} -> {now_ms:.2f} ms (+{(now_ms / before_ms - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+async def run(args: argparse.Namespace, db_path: str) -> Dict[str, Any]:
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "machine": platform.machine(),
+        "scales": {},
+    }
+    for users in args.scales:
+        report["scales"][str(users)] = await run_scale(db_path, users, args.repeat, args.budget, args.only)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="10k,100k",
+                        help="comma separated user counts, k/M suffixes allowed (default: 10k,100k)")
+    parser.add_argument("--repeat", type=int, default=30, help="max calls per function")
+    parser.add_argument("--budget", type=float, default=2.0, help="seconds per function before stopping early")
+    parser.add_argument("--only", help="run only functions whose name contains this")
+    parser.add_argument("--output", default="bench_database.json", help="where to write this run's results")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed median slowdown (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5,
+                        help="ignore slowdowns smaller than this many ms (timer noise)")
+    parser.add_argument("--save-baseline", action="store_true", help="also write the results to --baseline")
+    args = parser.parse_args()
+    args.scales = [parse_scale(value) for value in args.scales.split(",") if value.strip()]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        # Read by config at import time, so it must be set before database is imported
+        os.environ["DATABASE_PATH"] = db_path
+        report = asyncio.run(run(args, db_path))
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results written to {args.output}")
+
+    if not args.baseline:
+        return
+    if args.save_baseline or not os.path.exists(args.baseline):
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Baseline saved to {args.baseline}")
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(report, baseline, args.threshold, args.min_delta_ms)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold * 100:.0f}% vs {args.baseline}:")
+        for line in regressions:
+            print(f"   {line}")
+        sys.exit(1)
+    print(f"\n✅ No regressions beyond {args.threshold * 100:.0f}% vs {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+FSM storage benchmark: MemoryStorage vs SQLiteStorage.
+
+Measures per-call latency of get_state / set_state / update_data for a
+warm cache (all keys fit in the LRU) and a cold cache (LRU much smaller
+than the key set, so most reads go to SQLite).
+
+Usage:
+    python benchmarks/bench_fsm_storage.py [--users 2000] [--ops 20000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from utils.sqlite_storage import SQLiteStorage
+
+BOT_ID = 1
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, int(len(values) * pct / 100))
+    return values[index]
+
+
+async def run(storage, users: int, ops: int) -> dict:
+    keys = [StorageKey(bot_id=BOT_ID, chat_id=user_id, user_id=user_id) for user_id in range(1, users + 1)]
+    timings = {"set_state": [], "get_state": [], "update_data": []}
+
+    for i in range(ops):
+        key = random.choice(keys)
+        op = ("set_state", "get_state", "get_state", "update_data")[i % 4]
+
+        started = time.perf_counter()
+        if op == "set_state":
+            await storage.set_state(key, f"Bench:step_{i % 5}")
+        elif op == "get_state":
+            await storage.get_state(key)
+        else:
+            await storage.update_data(key, {"step": i, "title": "Koreys tili testi"})
+        timings[op].append((time.perf_counter() - started) * 1_000_000)
+
+    await storage.set_state(keys[0], "Bench:done")
+    await storage.close()
+    return timings
+
+
+def report(name: str, timings: dict) -> None:
+    for op, values in timings.items():
+        print(f"{name:<22} {op:<12} p50 {statistics.median(values):8.1f} µs   "
+              f"p99 {percentile(values, 99):8.1f} µs   n={len(values)}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--ops", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        random.seed(42)
+        report("MemoryStorage", await run(MemoryStorage(), args.users, args.ops))
+
+        random.seed(42)
+        warm = SQLiteStorage(path=os.path.join(tmp, "warm.db"), cache_size=args.users * 2)
+        report("SQLiteStorage (warm)", await run(warm, args.users, args.ops))
+
+        random.seed(42)
+        cold = SQLiteStorage(path=os.path.join(tmp, "cold.db"), cache_size=max(1, args.users // 20))
+        report("SQLiteStorage (cold)", await run(cold, args.users, args.ops))
+
+        # Persistence check: a fresh instance must see the flushed states
+        reopened = SQLiteStorage(path=os.path.join(tmp, "warm.db"))
+        state = await reopened.get_state(StorageKey(bot_id=BOT_ID, chat_id=1, user_id=1))
+        await reopened.close()
+        print(f"\nRestored state after reopen: {state}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
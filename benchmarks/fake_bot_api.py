@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Telegram Bot API, used by the load generator.
+
+Serves POST /bot<token>/<method> the way api.telegram.org does: getUpdates
+(long polling) or setWebhook (updates are pushed to the bot's URL with the
+secret header), sendMessage, editMessageText, answerCallbackQuery,
+getChatMember, send* media and a few more. Every bot call waits a lognormal
+"network" latency and can be answered with 429 Too Many Requests, either at
+random or when the global send rate is exceeded.
+
+Each chat keeps its last visible message (text + inline keyboard) and a
+queue of bot calls, so a simulated user can press buttons and measure the
+time until the bot answers.
+
+Usage (standalone, for poking at it with curl):
+    python benchmarks/fake_bot_api.py [--port 8765] [--latency 40]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from aiohttp import ClientSession, web
+
+BOT_USER = {"id": 100000001, "is_bot": True, "first_name": "Load Test Bot", "username": "load_test_bot"}
+
+# Methods that post something visible in a chat; they count towards the send rate
+SEND_METHODS = {
+    "sendMessage", "sendPhoto", "sendVideo", "sendAudio", "sendDocument", "sendVoice",
+    "sendAnimation", "sendSticker", "sendMediaGroup", "copyMessage", "forwardMessage",
+}
+MEDIA_FIELDS = {
+    "sendPhoto": "photo", "sendVideo": "video", "sendAudio": "audio", "sendDocument": "document",
+    "sendVoice": "voice", "sendAnimation": "animation", "sendSticker": "sticker",
+}
+
+
+class BotCall:
+    """One request the bot made, as seen by the fake server"""
+    __slots__ = ("method", "params", "result", "at")
+
+    def __init__(self, method: str, params: Dict[str, Any], result: Any):
+        self.method = method
+        self.params = params
+        self.result = result
+        self.at = time.perf_counter()
+
+
+class FakeChat:
+    """Per-chat state: message ids, the message on screen and the bot calls"""
+
+    def __init__(self, chat_id: int):
+        self.id = chat_id
+        self.message_ids = itertools.count(1)
+        self.messages: Dict[int, Dict[str, Any]] = {}
+        self.screen: Optional[Dict[str, Any]] = None
+        self.calls: "asyncio.Queue[BotCall]" = asyncio.Queue()
+
+    def buttons(self) -> List[str]:
+        """callback_data of every inline button on the current screen"""
+        markup = (self.screen or {}).get("reply_markup") or {}
+        return [
+            button["callback_data"]
+            for row in markup.get("inline_keyboard", [])
+            for button in row
+            if button.get("callback_data")
+        ]
+
+
+class FakeBotAPI:
+    """aiohttp application imitating api.telegram.org for one bot"""
+
+    def __init__(self, latency_ms: float = 40.0, jitter: float = 0.5,
+                 error_rate: float = 0.0, global_rps: float = 0.0):
+        # Lognormal around the median latency; jitter is the sigma
+        self.latency_mu = math.log(max(latency_ms, 0.001) / 1000)
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.global_rps = global_rps
+        self.chats: Dict[int, FakeChat] = {}
+        self.update_ids = itertools.count(1)
+        self.callback_ids = itertools.count(1)
+        self.updates: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+        # callback_query_id -> chat, so answerCallbackQuery reaches the right user
+        self._callback_chats: Dict[str, int] = {}
+        self.webhook_url = ""
+        self.webhook_secret = ""
+        self.method_counts: Dict[str, int] = {}
+        self.rate_limited = 0
+        self._send_window: List[float] = []
+        self._push_session: Optional[ClientSession] = None
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = ""
+
+    def chat(self, chat_id: int) -> FakeChat:
+        chat = self.chats.get(chat_id)
+        if chat is None:
+            chat = self.chats[chat_id] = FakeChat(chat_id)
+        return chat
+
+    # =====================
+    # Server
+    # =====================
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765) -> str:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host=host, port=port).start()
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def close(self) -> None:
+        if self._push_session:
+            await self._push_session.close()
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = await _read_params(request)
+        self.method_counts[method] = self.method_counts.get(method, 0) + 1
+
+        if method == "getUpdates":
+            return _ok(await self._get_updates(params))
+
+        await asyncio.sleep(random.lognormvariate(self.latency_mu, self.jitter))
+        retry_after = self._retry_after(method)
+        if retry_after:
+            self.rate_limited += 1
+            return web.json_response({
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {retry_after}",
+                "parameters": {"retry_after": retry_after},
+            })
+
+        handler: Optional[Callable[[Dict[str, Any]], Any]] = getattr(self, f"_api_{method}", None)
+        if handler is None:
+            if method in MEDIA_FIELDS:
+                result = self._post_message(method, params)
+            else:
+                # Unknown methods succeed, like most "set"/"delete" calls do
+                result = True
+        else:
+            result = handler(params)
+        self._record(method, params, result)
+        return _ok(result)
+
+    def _retry_after(self, method: str) -> int:
+        if method not in SEND_METHODS and not method.startswith("edit") and method != "answerCallbackQuery":
+            return 0
+        if self.error_rate and random.random() < self.error_rate:
+            return 1
+        if self.global_rps and method in SEND_METHODS:
+            now = time.monotonic()
+            self._send_window = [at for at in self._send_window if now - at < 1.0]
+            if len(self._send_window) >= self.global_rps:
+                return 1
+            self._send_window.append(now)
+        return 0
+
+    def _record(self, method: str, params: Dict[str, Any], result: Any) -> None:
+        chat_id = params.get("chat_id")
+        if method == "answerCallbackQuery":
+            chat_id = self._callback_chats.pop(str(params.get("callback_query_id")), None)
+        if chat_id is None:
+            return
+        try:
+            chat = self.chat(int(chat_id))
+        except ValueError:
+            return  # @channel usernames
+        chat.calls.put_nowait(BotCall(method, params, result))
+
+    # =====================
+    # Bot API methods
+    # =====================
+
+    def _api_getMe(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {**BOT_USER, "can_join_groups": True, "can_read_all_group_messages": False,
+                "supports_inline_queries": False}
+
+    def _api_getChatMember(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        user_id = int(params.get("user_id", 0))
+        return {"status": "member", "user": {"id": user_id, "is_bot": False, "first_name": f"User {user_id}"}}
+
+    def _api_sendMessage(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return self._post_message("sendMessage", params)
+
+    def _api_sendMediaGroup(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        media = params.get("media") or []
+        return [self._post_message("sendPhoto", {**params, "caption": item.get("caption")}) for item in media]
+
+    def _api_editMessageText(self, params: Dict[str, Any]) -> Any:
+        return self._edit_message(params, text=params.get("text"))
+
+    def _api_editMessageCaption(self, params: Dict[str, Any]) -> Any:
+        return self._edit_message(params, caption=params.get("caption"))
+
+    def _api_editMessageReplyMarkup(self, params: Dict[str, Any]) -> Any:
+        return self._edit_message(params)
+
+    def _api_deleteMessage(self, params: Dict[str, Any]) -> bool:
+        chat = self.chat(int(params["chat_id"]))
+        message = chat.messages.pop(int(params["message_id"]), None)
+        if message is not None and chat.screen is message:
+            chat.screen = None
+        return True
+
+    def _api_setWebhook(self, params: Dict[str, Any]) -> bool:
+        self.webhook_url = params.get("url", "")
+        self.webhook_secret = params.get("secret_token", "")
+        return True
+
+    def _api_deleteWebhook(self, params: Dict[str, Any]) -> bool:
+        self.webhook_url = ""
+        self.webhook_secret = ""
+        return True
+
+    def _api_getWebhookInfo(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"url": self.webhook_url, "has_custom_certificate": False,
+                "pending_update_count": self.updates.qsize()}
+
+    async def _get_updates(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # Offsets are not needed: an update leaves the queue once it is delivered
+        limit = int(params.get("limit") or 100)
+        timeout = float(params.get("timeout") or 0)
+        batch: List[Dict[str, Any]] = []
+        if self.updates.empty() and timeout:
+            try:
+                batch.append(await asyncio.wait_for(self.updates.get(), timeout))
+            except asyncio.TimeoutError:
+                return []
+        while len(batch) < limit and not self.updates.empty():
+            batch.append(self.updates.get_nowait())
+        return batch
+
+    def _post_message(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        chat = self.chat(int(params["chat_id"]))
+        message: Dict[str, Any] = {
+            "message_id": next(chat.message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat.id, "type": "private"},
+            "from": BOT_USER,
+        }
+        field = MEDIA_FIELDS.get(method)
+        if field:
+            message[field] = _media_object(field, params.get(field))
+            if params.get("caption"):
+                message["caption"] = params["caption"]
+        else:
+            message["text"] = params.get("text", "")
+        if params.get("reply_markup"):
+            message["reply_markup"] = params["reply_markup"]
+        chat.messages[message["message_id"]] = message
+        chat.screen = message
+        return message
+
+    def _edit_message(self, params: Dict[str, Any], **fields: Any) -> Any:
+        if "inline_message_id" in params:
+            return True
+        chat = self.chat(int(params["chat_id"]))
+        message_id = int(params["message_id"])
+        message = chat.messages.get(message_id)
+        if message is None:
+            message = chat.messages[message_id] = {
+                "message_id": message_id, "date": int(time.time()),
+                "chat": {"id": chat.id, "type": "private"}, "from": BOT_USER, "text": "",
+            }
+        for name, value in fields.items():
+            if value is not None:
+                message[name] = value
+        if params.get("reply_markup"):
+            message["reply_markup"] = params["reply_markup"]
+        else:
+            message.pop("reply_markup", None)
+        message["edit_date"] = int(time.time())
+        chat.screen = message
+        return message
+
+    # =====================
+    # Updates from simulated users
+    # =====================
+
+    def user_message(self, user_id: int, text: str) -> Dict[str, Any]:
+        chat = self.chat(user_id)
+        message: Dict[str, Any] = {
+            "message_id": next(chat.message_ids),
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private", "first_name": f"User {user_id}"},
+            "from": _user(user_id),
+            "text": text,
+        }
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return {"update_id": next(self.update_ids), "message": message}
+
+    def user_callback(self, user_id: int, data: str) -> Dict[str, Any]:
+        chat = self.chat(user_id)
+        callback_id = str(next(self.callback_ids))
+        self._callback_chats[callback_id] = user_id
+        return {
+            "update_id": next(self.update_ids),
+            "callback_query": {
+                "id": callback_id,
+                "from": _user(user_id),
+                "chat_instance": str(user_id),
+                "data": data,
+                "message": chat.screen or {
+                    "message_id": 0, "date": int(time.time()),
+                    "chat": {"id": user_id, "type": "private"}, "from": BOT_USER, "text": "",
+                },
+            },
+        }
+
+    async def push(self, update: Dict[str, Any]) -> None:
+        """Deliver an update through getUpdates or to the webhook"""
+        if not self.webhook_url:
+            self.updates.put_nowait(update)
+            return
+        if self._push_session is None:
+            self._push_session = ClientSession()
+        headers = {"X-Telegram-Bot-Api-Secret-Token": self.webhook_secret} if self.webhook_secret else {}
+        async with self._push_session.post(self.webhook_url, json=update, headers=headers) as response:
+            if response.status >= 400:
+                raise RuntimeError(f"webhook answered {response.status}")
+
+
+def _user(user_id: int) -> Dict[str, Any]:
+    return {"id": user_id, "is_bot": False, "first_name": f"User {user_id}", "language_code": "uz"}
+
+
+def _media_object(field: str, file_id: Any) -> Any:
+    file_id = file_id if isinstance(file_id, str) else f"fake-{field}"
+    if field == "photo":
+        return [{"file_id": file_id, "file_unique_id": file_id, "width": 800, "height": 600}]
+    if field == "sticker":
+        return {"file_id": file_id, "file_unique_id": file_id, "type": "regular",
+                "width": 512, "height": 512, "is_animated": False, "is_video": False}
+    if field in ("video", "animation"):
+        return {"file_id": file_id, "file_unique_id": file_id, "width": 640, "height": 360, "duration": 10}
+    if field in ("audio", "voice"):
+        return {"file_id": file_id, "file_unique_id": file_id, "duration": 10}
+    return {"file_id": file_id, "file_unique_id": file_id}
+
+
+async def _read_params(request: web.Request) -> Dict[str, Any]:
+    """Form fields as the Bot API reads them: JSON-encoded values are decoded"""
+    if request.content_type == "application/json":
+        return await request.json()
+    params: Dict[str, Any] = {}
+    form = await request.post()
+    for name, value in form.items():
+        if not isinstance(value, str):
+            params[name] = f"upload-{name}"  # uploaded file
+            continue
+        if value[:1] in ("{", "["):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                pass
+        params[name] = value
+    return params
+
+
+def _ok(result: Any) -> web.Response:
+    return web.json_response({"ok": True, "result": result})
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    api = FakeBotAPI(latency_ms=args.latency, error_rate=args.error_rate, global_rps=args.global_rps)
+    url = await api.start(port=args.port)
+    print(f"Fake Bot API on {url}/bot<token>/<method> (Ctrl+C to stop)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await api.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=40.0, help="median Bot API latency, ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of calls answered with 429")
+    parser.add_argument("--global-rps", type=float, default=0.0, help="send* calls per second before 429 (0 = off)")
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
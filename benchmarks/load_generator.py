@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test against a local fake Telegram Bot API.
+
+Runs the real dispatcher (all routers, middlewares and FSM storage) on a
+temporary database, points the bot's HTTP session at benchmarks/fake_bot_api.py
+and lets N simulated users click through the bot concurrently:
+
+    start     /start
+    sections  main menu -> sections -> a section -> subsection/content
+    quiz      main menu -> tests -> take quizzes -> a quiz -> every question
+    ai_chat   main menu -> AI chat -> Korean AI -> one message -> end
+
+Latency of a step is measured from pushing the update to the first thing
+the user would see: a sent or edited message, or the answer to the pressed
+button (not every handler calls answerCallbackQuery). Reported
+per flow: completed flows, steps/s, step p50/p95/p99 and whole-flow p50/p95.
+
+Usage:
+    python benchmarks/load_generator.py [--users 50] [--duration 30]
+        [--mode polling|webhook] [--latency 40] [--error-rate 0.01]
+        [--global-rps 30] [--think 200]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FLOW_WEIGHTS = {"start": 1, "sections": 3, "quiz": 3, "ai_chat": 1}
+WEBHOOK_PATH = "/webhook"
+WEBHOOK_SECRET = "load-test-secret"
+FIRST_USER_ID = 7_000_000_001
+# Bot calls that change what the user sees after pressing a button
+VISIBLE_METHODS = {"sendMessage", "sendPhoto", "sendVideo", "sendAudio", "sendDocument",
+                   "sendMediaGroup", "editMessageText", "editMessageCaption", "editMessageReplyMarkup"}
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, int(len(values) * pct / 100))
+    return values[index]
+
+
+class FlowStats:
+    __slots__ = ("steps", "flows", "errors", "timeouts")
+
+    def __init__(self):
+        self.steps: List[float] = []
+        self.flows: List[float] = []
+        self.errors = 0
+        self.timeouts = 0
+
+
+class SimulatedUser:
+    """One chat clicking through the bot; the fake API keeps its screen"""
+
+    def __init__(self, api, user_id: int, stats: Dict[str, FlowStats], think: float, timeout: float):
+        self.api = api
+        self.user_id = user_id
+        self.chat = api.chat(user_id)
+        self.stats = stats
+        self.think = think
+        self.timeout = timeout
+
+    async def _step(self, flow: str, update: Dict[str, Any], done: Callable[[Any], bool]) -> bool:
+        """Push an update and wait for the bot call that answers it"""
+        while not self.chat.calls.empty():
+            self.chat.calls.get_nowait()
+        stats = self.stats[flow]
+        started = time.perf_counter()
+        await self.api.push(update)
+        deadline = started + self.timeout
+        while True:
+            try:
+                call = await asyncio.wait_for(self.chat.calls.get(), deadline - time.perf_counter())
+            except asyncio.TimeoutError:
+                stats.timeouts += 1
+                return False
+            if done(call):
+                break
+        stats.steps.append(call.at - started)
+        if "Xatolik" in str(call.params.get("text", "")):
+            stats.errors += 1
+            return False
+        if self.think:
+            await asyncio.sleep(random.uniform(0, 2 * self.think))
+        return True
+
+    async def send(self, flow: str, text: str) -> bool:
+        update = self.api.user_message(self.user_id, text)
+        return await self._step(flow, update, lambda call: call.method == "sendMessage")
+
+    async def press(self, flow: str, data: Optional[str]) -> bool:
+        if data is None:
+            self.stats[flow].errors += 1
+            return False
+        update = self.api.user_callback(self.user_id, data)
+        callback_id = update["callback_query"]["id"]
+        return await self._step(flow, update, lambda call: (
+            call.method in VISIBLE_METHODS
+            or str(call.params.get("callback_query_id")) == callback_id
+        ))
+
+    def button(self, prefix: str) -> Optional[str]:
+        matches = [data for data in self.chat.buttons() if data.startswith(prefix)]
+        return random.choice(matches) if matches else None
+
+    # =====================
+    # Flows
+    # =====================
+
+    async def flow_start(self) -> bool:
+        return await self.send("start", "/start")
+
+    async def flow_sections(self) -> bool:
+        if not (await self.press("sections", "main_menu") and await self.press("sections", "sections")):
+            return False
+        if not await self.press("sections", self.button("user_section_")):
+            return False
+        if not self.button("view_content_"):
+            if not await self.press("sections", self.button("user_subsection_")):
+                return False
+        return await self.press("sections", self.button("view_content_"))
+
+    async def flow_quiz(self) -> bool:
+        for data in ("main_menu", "tests", "take_quizzes"):
+            if not await self.press("quiz", data):
+                return False
+        if not await self.press("quiz", self.button("start_quiz_")):
+            return False
+        for _ in range(100):
+            answer = self.button("quiz_answer_")
+            if answer is None:
+                return True
+            if not await self.press("quiz", answer):
+                return False
+        return True
+
+    async def flow_ai_chat(self) -> bool:
+        for data in ("main_menu", "conversation", "korean_conversation"):
+            if not await self.press("ai_chat", data):
+                return False
+        if not await self.send("ai_chat", random.choice(("안녕하세요", "Salom, qalaysiz?", "가족 so'zi nima?"))):
+            return False
+        return await self.press("ai_chat", "end_conversation")
+
+    async def run(self, stop_at: float, iterations: int) -> None:
+        flows = list(FLOW_WEIGHTS)
+        weights = list(FLOW_WEIGHTS.values())
+        name = "start"
+        done = 0
+        # Every user begins with /start so the users row exists
+        while True:
+            started = time.perf_counter()
+            if await getattr(self, f"flow_{name}")():
+                self.stats[name].flows.append(time.perf_counter() - started)
+            done += 1
+            if (iterations and done >= iterations) or time.perf_counter() >= stop_at:
+                return
+            name = random.choices(flows, weights)[0]
+
+
+# =====================
+# Setup
+# =====================
+
+def configure_environment(db_path: str) -> None:
+    """Must run before config is imported: the bot reads these at import time"""
+    os.environ["DATABASE_PATH"] = db_path
+    os.environ["BOT_TOKEN"] = "123456789:LOAD-TEST-TOKEN"
+    os.environ["BOT_WORKERS"] = "1"
+    os.environ["METRICS_PORT"] = "0"
+    # Simulated users click faster than the per-user limit allows
+    os.environ.setdefault("THROTTLE_RATE", "0")
+    # A skipped unchanged edit never reaches the fake API, so the step could not finish
+    os.environ.setdefault("EDIT_CACHE_SIZE", "0")
+    os.environ.setdefault("DB_INSTRUMENTATION", "0")
+
+
+async def seed() -> None:
+    """A section with direct and subsection content, and two quizzes"""
+    from config import ADMIN_ID
+    from database import add_content, create_section, create_subsection, import_quiz
+
+    section_id = await create_section("Boshlang'ich", "Hangul va salomlashish", language="korean", created_by=ADMIN_ID)
+    subsection_id = await create_subsection(section_id, "Hangul", "Alifbo")
+    await add_content(section_id, 0, "Salomlashish", "Asosiy iboralar", "text",
+                      content_text="안녕하세요 - Assalomu alaykum")
+    await add_content(section_id, subsection_id, "Unlilar", "ㅏ ㅓ ㅗ ㅜ", "photo", file_id="fake-photo-file-id")
+    await add_content(section_id, subsection_id, "Undoshlar", "ㄱ ㄴ ㄷ ㄹ", "text", content_text="ㄱ ㄴ ㄷ ㄹ ㅁ ㅂ ㅅ")
+
+    questions = [
+        (f"{word} nima degani?", meaning, "kitob", "suv", "non", "A", "")
+        for word, meaning in (("사랑", "sevgi"), ("가족", "oila"), ("학교", "maktab"), ("친구", "do'st"), ("음식", "ovqat"))
+    ]
+    await import_quiz("So'zlar 1", "Asosiy so'zlar", "korean", "vocabulary", questions, created_by=ADMIN_ID)
+    await import_quiz("So'zlar 2", "Asosiy so'zlar", "korean", "vocabulary", questions[::-1], created_by=ADMIN_ID)
+
+
+async def grant_premium(user_ids: List[int]) -> None:
+    from database import activate_premium
+
+    for user_id in user_ids:
+        await activate_premium(user_id)
+
+
+async def start_webhook_server(bot, dp, port: int):
+    from aiohttp import web
+    from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+    app = web.Application()
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=WEBHOOK_SECRET).register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host="127.0.0.1", port=port).start()
+    await bot.set_webhook(f"http://127.0.0.1:{port}{WEBHOOK_PATH}", secret_token=WEBHOOK_SECRET,
+                          allowed_updates=dp.resolve_used_update_types())
+    return runner
+
+
+# =====================
+# Report
+# =====================
+
+def report(stats: Dict[str, FlowStats], wall: float, api, users: int, mode: str) -> None:
+    total_steps = sum(len(flow.steps) for flow in stats.values())
+    print(f"\n📈 {users} users, {mode}, {wall:.1f}s wall, {total_steps / wall:.1f} steps/s, "
+          f"{api.rate_limited} × 429 injected")
+    print(f"{'flow':<9} {'flows':>6} {'steps':>6} {'steps/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'flow p50':>9} {'flow p95':>9} {'errors':>7} {'timeouts':>9}")
+    for name, flow in stats.items():
+        if not flow.steps:
+            print(f"{name:<9} {0:>6} {0:>6} {'-':>8} {'-':>8} {'-':>8} {'-':>8} {'-':>9} {'-':>9} "
+                  f"{flow.errors:>7} {flow.timeouts:>9}")
+            continue
+        steps_ms = [value * 1000 for value in flow.steps]
+        flow_p50 = f"{percentile(flow.flows, 50) * 1000:.0f}" if flow.flows else "-"
+        flow_p95 = f"{percentile(flow.flows, 95) * 1000:.0f}" if flow.flows else "-"
+        print(f"{name:<9} {len(flow.flows):>6} {len(flow.steps):>6} {len(flow.steps) / wall:>8.1f} "
+              f"{percentile(steps_ms, 50):>8.1f} {percentile(steps_ms, 95):>8.1f} {percentile(steps_ms, 99):>8.1f} "
+              f"{flow_p50:>9} {flow_p95:>9} {flow.errors:>7} {flow.timeouts:>9}")
+    busiest = sorted(api.method_counts.items(), key=lambda item: item[1], reverse=True)[:8]
+    print("Bot API calls: " + ", ".join(f"{method} {count}" for method, count in busiest))
+
+
+async def run(args: argparse.Namespace) -> None:
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+
+    from database import init_db
+    from main import create_bot, create_dispatcher, shutdown_bot
+    from utils.live_counters import live_counters
+    from fake_bot_api import FakeBotAPI
+
+    await init_db()
+    await seed()
+    await live_counters.load()
+
+    api = FakeBotAPI(latency_ms=args.latency, error_rate=args.error_rate, global_rps=args.global_rps)
+    base_url = await api.start(port=args.api_port)
+    session = AiohttpSession(api=TelegramAPIServer.from_base(base_url), limit=max(100, args.users * 2))
+    bot = create_bot(session)
+    dp = create_dispatcher()
+
+    runner = None
+    polling = None
+    if args.mode == "webhook":
+        runner = await start_webhook_server(bot, dp, args.webhook_port)
+    else:
+        polling = asyncio.create_task(dp.start_polling(
+            bot, handle_signals=False, close_bot_session=False, polling_timeout=1
+        ))
+
+    stats = {name: FlowStats() for name in FLOW_WEIGHTS}
+    user_ids = [FIRST_USER_ID + index for index in range(args.users)]
+    users = [SimulatedUser(api, user_id, stats, args.think / 1000, args.timeout) for user_id in user_ids]
+
+    # Warm-up: create every user, then make them premium so the AI flow is open
+    await asyncio.gather(*(user.flow_start() for user in users))
+    await grant_premium(user_ids)
+    stats = {name: FlowStats() for name in FLOW_WEIGHTS}
+    for user in users:
+        user.stats = stats
+
+    print(f"🚦 {args.users} users for {args.iterations or ''}"
+          f"{' flows each' if args.iterations else f'{args.duration:.0f}s'} ({args.mode})")
+    started = time.perf_counter()
+    stop_at = started + args.duration
+    await asyncio.gather(*(user.run(stop_at, args.iterations) for user in users))
+    wall = time.perf_counter() - started
+
+    async def stop_intake():
+        if polling:
+            await dp.stop_polling()
+        if runner:
+            await runner.cleanup()
+
+    await shutdown_bot(bot, dp, stop_intake)
+    if polling:
+        await polling
+    await api.close()
+    report(stats, wall, api, args.users, args.mode)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End-to-end load test against a fake Bot API")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load after warm-up")
+    parser.add_argument("--iterations", type=int, default=0, help="flows per user instead of --duration")
+    parser.add_argument("--mode", choices=("polling", "webhook"), default="polling")
+    parser.add_argument("--latency", type=float, default=40.0, help="median Bot API latency, ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of bot calls answered with 429")
+    parser.add_argument("--global-rps", type=float, default=0.0, help="send* calls per second before 429 (0 = off)")
+    parser.add_argument("--think", type=float, default=200.0, help="mean pause between clicks, ms")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds to wait for an answer")
+    parser.add_argument("--api-port", type=int, default=8765)
+    parser.add_argument("--webhook-port", type=int, default=8766)
+    args = parser.parse_args()
+    if args.iterations:
+        args.duration = float("inf")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_environment(os.path.join(tmp, "load_test.db"))
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
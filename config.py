@@ -19,7 +19,52 @@ PREMIUM_PRICE_UZS = 50000  # 50,000 som
 REFERRAL_THRESHOLD = 10    # 10 referrals for 1 month premium
 
 # Database configuration
-DATABASE_PATH = "language_bot.db"
+DATABASE_PATH = os.getenv("DATABASE_PATH", "language_bot.db")
+
+# FSM storage: "sqlite" (persistent, default) or "memory"
+FSM_STORAGE = os.getenv("FSM_STORAGE", "sqlite").strip().lower()
+
+# Worker processes for update handling (>1 enables user_id sharding)
+BOT_WORKERS = max(1, int(os.getenv("BOT_WORKERS", "1")))
+
+# Update delivery: "polling" (default, local runs) or "webhook"
+BOT_MODE = os.getenv("BOT_MODE", "polling").strip().lower()
+# Public base URL for webhook mode (Render provides RENDER_EXTERNAL_URL)
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", os.getenv("RENDER_EXTERNAL_URL", "")).strip().rstrip("/")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "").strip()
+WEBAPP_HOST = os.getenv("WEBAPP_HOST", "0.0.0.0")
+WEBAPP_PORT = int(os.getenv("PORT", "8080"))
+
+# Local OpenMetrics endpoint with handler latency metrics (0 disables it)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+
+# SQL timing per statement fingerprint; slower statements are logged with their plan
+DB_INSTRUMENTATION = os.getenv("DB_INSTRUMENTATION", "1").strip().lower() not in ("0", "false", "no")
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "100"))
+
+# Per-user token bucket: tokens refilled per second and bucket size (0 disables throttling)
+THROTTLE_RATE = float(os.getenv("THROTTLE_RATE", "2"))
+THROTTLE_BURST = float(os.getenv("THROTTLE_BURST", "12"))
+
+# Repeated taps on the same button within this many seconds are handled once (0 disables)
+COALESCE_WINDOW = float(os.getenv("COALESCE_WINDOW", "1.0"))
+
+# Messages whose last rendered text and keyboard are remembered to skip unchanged edits (0 disables)
+EDIT_CACHE_SIZE = int(os.getenv("EDIT_CACHE_SIZE", "10000"))
+
+# Pause between albums/messages of "send all" (Telegram allows about one message per second per chat)
+MEDIA_BATCH_DELAY = float(os.getenv("MEDIA_BATCH_DELAY", "1.0"))
+
+# Seconds a /search or inline query result stays cached (0 disables)
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "300"))
+
+# Sections with more content rows than this are deleted in chunks of this size, one short transaction each
+SECTION_DELETE_CHUNK = int(os.getenv("SECTION_DELETE_CHUNK", "500"))
+
+# Seconds to drain handlers and jobs after SIGTERM (Render kills the process after 30s)
+SHUTDOWN_TIMEOUT = float(os.getenv("SHUTDOWN_TIMEOUT", "25"))
 
 # Scheduler configuration
 MOTIVATIONAL_MESSAGE_HOUR = 10  # 10 AM weekly messages
@@ -1,8 +1,517 @@
 import aiosqlite
 import asyncio
+import math
+import sqlite3
+import time
 from datetime import datetime, timedelta
 from typing import Optional, List, Tuple, Any
 from config import DATABASE_PATH
+from utils.live_counters import live_counters
+from utils.answer_stats import add_answer
+
+# Quiz popularity decays by half every POPULARITY_HALF_LIFE_DAYS.
+# quiz_summary.popularity stores log(sum(exp(λ·t_i))) over all attempts, so an
+# attempt is a single logaddexp update and ordering by the column equals
+# ordering by the decayed score at any moment.
+POPULARITY_HALF_LIFE_DAYS = 7
+POPULARITY_LAMBDA = math.log(2) / POPULARITY_HALF_LIFE_DAYS
+
+def _logaddexp(current, value):
+    """log(exp(current) + exp(value)), NULL-safe"""
+    if current is None:
+        return value
+    if value is None:
+        return current
+    high, low = max(current, value), min(current, value)
+    return high + math.log1p(math.exp(low - high))
+
+def popularity_point(timestamp: Optional[float] = None) -> float:
+    """Log-weight of one attempt made at timestamp (epoch seconds)"""
+    if timestamp is None:
+        timestamp = time.time()
+    return POPULARITY_LAMBDA * timestamp / 86400
+
+def decayed_popularity(popularity: Optional[float]) -> float:
+    """Current decayed attempt count for a stored log-score"""
+    if popularity is None:
+        return 0.0
+    return math.exp(popularity - popularity_point())
+
+# Section tree: deleting a section removes its subsections, their content and
+# the progress rows on that content. SQLite only runs the cascades on connections
+# with PRAGMA foreign_keys = ON; content uses 0 for "no section/subsection", so
+# only the delete helpers below turn enforcement on
+CATALOG_TABLES = """
+CREATE TABLE IF NOT EXISTS subsections (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    section_id INTEGER,
+    name TEXT NOT NULL,
+    description TEXT,
+    is_premium BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (section_id) REFERENCES sections (id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS content (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    section_id INTEGER DEFAULT 0,
+    subsection_id INTEGER DEFAULT 0,
+    title TEXT NOT NULL,
+    description TEXT,
+    content_type TEXT,
+    file_id TEXT,
+    file_path TEXT,
+    content_text TEXT,
+    is_premium BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (section_id) REFERENCES sections (id) ON DELETE CASCADE,
+    FOREIGN KEY (subsection_id) REFERENCES subsections (id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS user_progress (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    content_id INTEGER,
+    completed BOOLEAN DEFAULT FALSE,
+    completed_at TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (user_id),
+    FOREIGN KEY (content_id) REFERENCES content (id) ON DELETE CASCADE
+);
+"""
+
+# Every cascade looks its children up by parent id
+CATALOG_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_subsections_section ON subsections (section_id);
+CREATE INDEX IF NOT EXISTS idx_content_section ON content (section_id);
+CREATE INDEX IF NOT EXISTS idx_content_subsection ON content (subsection_id);
+CREATE INDEX IF NOT EXISTS idx_user_progress_content ON user_progress (content_id);
+"""
+
+# Full schema; CREATE ... IF NOT EXISTS keeps it safe to apply on every start
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY,
+    username TEXT,
+    first_name TEXT,
+    last_name TEXT,
+    is_premium BOOLEAN DEFAULT FALSE,
+    premium_expires_at TIMESTAMP,
+    referral_code TEXT UNIQUE,
+    referred_by INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    total_sessions INTEGER DEFAULT 0,
+    words_learned INTEGER DEFAULT 0,
+    quiz_score_total INTEGER DEFAULT 0,
+    quiz_attempts INTEGER DEFAULT 0,
+    rating_score REAL DEFAULT 0.0,
+    referral_count INTEGER DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS sections (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    description TEXT,
+    language TEXT,
+    is_premium BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_by INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS quizzes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    description TEXT,
+    language TEXT,
+    category TEXT,
+    is_premium BOOLEAN DEFAULT FALSE,
+    created_by INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    quiz_id INTEGER,
+    question_text TEXT NOT NULL,
+    option_a TEXT NOT NULL,
+    option_b TEXT NOT NULL,
+    option_c TEXT NOT NULL,
+    option_d TEXT NOT NULL,
+    correct_answer TEXT NOT NULL,
+    explanation TEXT,
+    FOREIGN KEY (quiz_id) REFERENCES quizzes (id)
+);
+
+CREATE TABLE IF NOT EXISTS quiz_attempts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    quiz_id INTEGER,
+    score INTEGER,
+    total_questions INTEGER,
+    completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (user_id),
+    FOREIGN KEY (quiz_id) REFERENCES quizzes (id)
+);
+
+CREATE TABLE IF NOT EXISTS premium_content (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    section_type TEXT NOT NULL CHECK(section_type IN ('topik1', 'topik2', 'jlpt')),
+    title TEXT NOT NULL,
+    description TEXT,
+    file_id TEXT,
+    file_type TEXT CHECK(file_type IN ('photo', 'video', 'audio', 'document', 'music', 'text')),
+    content_text TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    order_index INTEGER DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS referrals (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    referrer_id INTEGER,
+    referred_id INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (referrer_id) REFERENCES users (user_id),
+    FOREIGN KEY (referred_id) REFERENCES users (user_id)
+);
+
+CREATE TABLE IF NOT EXISTS quiz_summary (
+    quiz_id INTEGER PRIMARY KEY,
+    question_count INTEGER DEFAULT 0,
+    attempt_count INTEGER DEFAULT 0,
+    score_total INTEGER DEFAULT 0,
+    question_total INTEGER DEFAULT 0,
+    avg_score REAL DEFAULT 0,
+    last_attempt_at TIMESTAMP,
+    created_by INTEGER,
+    created_at TIMESTAMP,
+    popularity REAL,
+    FOREIGN KEY (quiz_id) REFERENCES quizzes (id)
+);
+
+CREATE TABLE IF NOT EXISTS question_stats (
+    question_id INTEGER PRIMARY KEY,
+    quiz_id INTEGER,
+    tallies INTEGER DEFAULT 0,
+    time_sum_ms INTEGER DEFAULT 0,
+    FOREIGN KEY (question_id) REFERENCES questions (id)
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_questions_stats_delete
+AFTER DELETE ON questions
+BEGIN
+    DELETE FROM question_stats WHERE question_id = OLD.id;
+END;
+
+CREATE TABLE IF NOT EXISTS srs_cards (
+    user_id INTEGER NOT NULL,
+    question_id INTEGER NOT NULL,
+    repetitions INTEGER DEFAULT 0,
+    interval_days REAL DEFAULT 0,
+    ease REAL DEFAULT 2.5,
+    due_at INTEGER NOT NULL,
+    last_reviewed_at INTEGER,
+    PRIMARY KEY (user_id, question_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_srs_cards_due ON srs_cards (user_id, due_at);
+
+-- Admin premium list pages by (premium_expires_at, user_id)
+CREATE INDEX IF NOT EXISTS idx_users_premium_expiry
+ON users (premium_expires_at, user_id)
+WHERE is_premium = 1;
+""" + CATALOG_TABLES + CATALOG_INDEXES
+
+# SQLite can't add ON DELETE CASCADE to an existing table: the old tables are
+# renamed (legacy mode leaves references to them alone), recreated from
+# CATALOG_TABLES and copied over with their ids and AUTOINCREMENT counters.
+# Search triggers go with the old tables; create_search_index restores them
+CATALOG_CASCADE_MIGRATION = """
+ALTER TABLE user_progress RENAME TO user_progress_old;
+ALTER TABLE content RENAME TO content_old;
+ALTER TABLE subsections RENAME TO subsections_old;
+""" + CATALOG_TABLES + """
+INSERT INTO sqlite_sequence (name, seq)
+SELECT substr(name, 1, length(name) - 4), seq FROM sqlite_sequence
+WHERE name IN ('subsections_old', 'content_old', 'user_progress_old');
+-- Rows whose parent is already gone are dropped, as the cascade would have done
+INSERT INTO subsections SELECT * FROM subsections_old
+WHERE section_id IS NULL OR section_id IN (SELECT id FROM sections);
+INSERT INTO content SELECT * FROM content_old
+WHERE (section_id IS NULL OR section_id = 0 OR section_id IN (SELECT id FROM sections))
+  AND (subsection_id IS NULL OR subsection_id = 0 OR subsection_id IN (SELECT id FROM subsections));
+INSERT INTO user_progress SELECT * FROM user_progress_old
+WHERE content_id IS NULL OR content_id IN (SELECT id FROM content);
+DROP TABLE user_progress_old;
+DROP TABLE content_old;
+DROP TABLE subsections_old;
+""" + CATALOG_INDEXES
+
+# Schema migrations in order; PRAGMA user_version is the number already applied.
+# Only ever append to this list
+MIGRATIONS = [
+    CATALOG_CASCADE_MIGRATION,
+]
+
+# Indexes and triggers that keep quiz_summary in sync with quizzes/questions/attempts
+QUIZ_SUMMARY_SCHEMA = """
+CREATE INDEX IF NOT EXISTS idx_questions_quiz ON questions (quiz_id);
+
+CREATE INDEX IF NOT EXISTS idx_quiz_attempts_quiz ON quiz_attempts (quiz_id, completed_at);
+
+-- Public listings only need quizzes with questions, newest first
+CREATE INDEX IF NOT EXISTS idx_quiz_summary_listing
+ON quiz_summary (created_at DESC)
+WHERE question_count > 0 AND created_by IS NOT NULL;
+
+-- Keyset pages of the public listing seek by quiz_id
+CREATE INDEX IF NOT EXISTS idx_quiz_summary_pages
+ON quiz_summary (quiz_id)
+WHERE question_count > 0 AND created_by IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_quiz_summary_questions
+ON quiz_summary (question_count DESC, created_at DESC)
+WHERE question_count > 0 AND created_by IS NOT NULL;
+
+CREATE TRIGGER IF NOT EXISTS trg_quizzes_summary_insert
+AFTER INSERT ON quizzes
+BEGIN
+    INSERT OR IGNORE INTO quiz_summary (quiz_id, created_by, created_at)
+    VALUES (NEW.id, NEW.created_by, NEW.created_at);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_quizzes_summary_delete
+AFTER DELETE ON quizzes
+BEGIN
+    DELETE FROM quiz_summary WHERE quiz_id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_questions_summary_insert
+AFTER INSERT ON questions
+BEGIN
+    UPDATE quiz_summary SET question_count = question_count + 1
+    WHERE quiz_id = NEW.quiz_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_questions_summary_delete
+AFTER DELETE ON questions
+BEGIN
+    UPDATE quiz_summary SET question_count = MAX(question_count - 1, 0)
+    WHERE quiz_id = OLD.quiz_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_quiz_attempts_summary_insert
+AFTER INSERT ON quiz_attempts
+BEGIN
+    UPDATE quiz_summary SET
+        attempt_count = attempt_count + 1,
+        score_total = score_total + COALESCE(NEW.score, 0),
+        question_total = question_total + COALESCE(NEW.total_questions, 0),
+        avg_score = CASE WHEN question_total + COALESCE(NEW.total_questions, 0) > 0
+            THEN (score_total + COALESCE(NEW.score, 0)) * 100.0
+                 / (question_total + COALESCE(NEW.total_questions, 0))
+            ELSE 0 END,
+        last_attempt_at = NEW.completed_at
+    WHERE quiz_id = NEW.quiz_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_quiz_attempts_summary_delete
+AFTER DELETE ON quiz_attempts
+BEGIN
+    UPDATE quiz_summary SET
+        attempt_count = MAX(attempt_count - 1, 0),
+        score_total = MAX(score_total - COALESCE(OLD.score, 0), 0),
+        question_total = MAX(question_total - COALESCE(OLD.total_questions, 0), 0),
+        avg_score = CASE WHEN question_total - COALESCE(OLD.total_questions, 0) > 0
+            THEN (score_total - COALESCE(OLD.score, 0)) * 100.0
+                 / (question_total - COALESCE(OLD.total_questions, 0))
+            ELSE 0 END,
+        last_attempt_at = (
+            SELECT MAX(completed_at) FROM quiz_attempts WHERE quiz_id = OLD.quiz_id
+        )
+    WHERE quiz_id = OLD.quiz_id;
+END;
+
+CREATE INDEX IF NOT EXISTS idx_quiz_summary_popularity
+ON quiz_summary (popularity DESC)
+WHERE question_count > 0 AND created_by IS NOT NULL;
+"""
+
+# Full-text search over lessons, sections and quizzes. rowid = source id * 8 + kind
+# (1 content, 2 section, 3 subsection, 4 quiz, 5 premium_content), so triggers
+# replace or drop one entry by rowid instead of scanning the index
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+    title,
+    body,
+    is_premium UNINDEXED,
+    tokenize = "unicode61 remove_diacritics 2 separators 'ʻʼ`'"
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_content_search_insert
+AFTER INSERT ON content
+BEGIN
+    INSERT INTO search_index (rowid, title, body, is_premium)
+    VALUES (NEW.id * 8 + 1, NEW.title,
+            COALESCE(NEW.description, '') || ' ' || COALESCE(NEW.content_text, ''),
+            COALESCE(NEW.is_premium, 0));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_content_search_update
+AFTER UPDATE OF title, description, content_text, is_premium ON content
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 8 + 1;
+    INSERT INTO search_index (rowid, title, body, is_premium)
+    VALUES (NEW.id * 8 + 1, NEW.title,
+            COALESCE(NEW.description, '') || ' ' || COALESCE(NEW.content_text, ''),
+            COALESCE(NEW.is_premium, 0));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_content_search_delete
+AFTER DELETE ON content
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 8 + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_sections_search_insert
+AFTER INSERT ON sections
+BEGIN
+    INSERT INTO search_index (rowid, title, body, is_premium)
+    VALUES (NEW.id * 8 + 2, NEW.name, COALESCE(NEW.description, ''), COALESCE(NEW.is_premium, 0));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_sections_search_update
+AFTER UPDATE OF name, description, is_premium ON sections
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 8 + 2;
+    INSERT INTO search_index (rowid, title, body, is_premium)
+    VALUES (NEW.id * 8 + 2, NEW.name, COALESCE(NEW.description, ''), COALESCE(NEW.is_premium, 0));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_sections_search_delete
+AFTER DELETE ON sections
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 8 + 2;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_subsections_search_insert
+AFTER INSERT ON subsections
+BEGIN
+    INSERT INTO search_index (rowid, title, body, is_premium)
+    VALUES (NEW.id * 8 + 3, NEW.name, COALESCE(NEW.description, ''), COALESCE(NEW.is_premium, 0));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_subsections_search_update
+AFTER UPDATE OF name, description, is_premium ON subsections
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 8 + 3;
+    INSERT INTO search_index (rowid, title, body, is_premium)
+    VALUES (NEW.id * 8 + 3, NEW.name, COALESCE(NEW.description, ''), COALESCE(NEW.is_premium, 0));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_subsections_search_delete
+AFTER DELETE ON subsections
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 8 + 3;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_quizzes_search_insert
+AFTER INSERT ON quizzes
+BEGIN
+    INSERT INTO search_index (rowid, title, body, is_premium)
+    VALUES (NEW.id * 8 + 4, NEW.title,
+            COALESCE(NEW.description, '') || ' ' || COALESCE(NEW.category, ''),
+            COALESCE(NEW.is_premium, 0));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_quizzes_search_update
+AFTER UPDATE OF title, description, category, is_premium ON quizzes
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 8 + 4;
+    INSERT INTO search_index (rowid, title, body, is_premium)
+    VALUES (NEW.id * 8 + 4, NEW.title,
+            COALESCE(NEW.description, '') || ' ' || COALESCE(NEW.category, ''),
+            COALESCE(NEW.is_premium, 0));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_quizzes_search_delete
+AFTER DELETE ON quizzes
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 8 + 4;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_premium_content_search_insert
+AFTER INSERT ON premium_content
+BEGIN
+    INSERT INTO search_index (rowid, title, body, is_premium)
+    VALUES (NEW.id * 8 + 5, NEW.title,
+            COALESCE(NEW.description, '') || ' ' || COALESCE(NEW.content_text, ''), 1);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_premium_content_search_update
+AFTER UPDATE OF title, description, content_text ON premium_content
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 8 + 5;
+    INSERT INTO search_index (rowid, title, body, is_premium)
+    VALUES (NEW.id * 8 + 5, NEW.title,
+            COALESCE(NEW.description, '') || ' ' || COALESCE(NEW.content_text, ''), 1);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_premium_content_search_delete
+AFTER DELETE ON premium_content
+BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.id * 8 + 5;
+END;
+"""
+
+# Fills an empty search_index from rows written before the triggers existed
+SEARCH_BACKFILL = """
+INSERT INTO search_index (rowid, title, body, is_premium)
+SELECT id * 8 + 1, title, COALESCE(description, '') || ' ' || COALESCE(content_text, ''),
+       COALESCE(is_premium, 0) FROM content;
+INSERT INTO search_index (rowid, title, body, is_premium)
+SELECT id * 8 + 2, name, COALESCE(description, ''), COALESCE(is_premium, 0) FROM sections;
+INSERT INTO search_index (rowid, title, body, is_premium)
+SELECT id * 8 + 3, name, COALESCE(description, ''), COALESCE(is_premium, 0) FROM subsections;
+INSERT INTO search_index (rowid, title, body, is_premium)
+SELECT id * 8 + 4, title, COALESCE(description, '') || ' ' || COALESCE(category, ''),
+       COALESCE(is_premium, 0) FROM quizzes;
+INSERT INTO search_index (rowid, title, body, is_premium)
+SELECT id * 8 + 5, title, COALESCE(description, '') || ' ' || COALESCE(content_text, ''), 1
+FROM premium_content;
+"""
+
+# Whether a row is premium once its parents are taken into account: a lesson or
+# subsection inside a premium section is premium too. The is_premium copied into
+# search_index only holds the row's own flag and goes stale when a section is
+# toggled, so search and the lesson screens gate on these instead. {id} is the
+# row id expression (a ? placeholder, or a column of the outer query)
+EFFECTIVE_PREMIUM = {
+    "content": """
+        SELECT COALESCE(c.is_premium, 0) OR COALESCE(sec.is_premium, 0)
+               OR COALESCE(sub.is_premium, 0) OR COALESCE(parent.is_premium, 0)
+        FROM content c
+        LEFT JOIN sections sec ON sec.id = c.section_id
+        LEFT JOIN subsections sub ON sub.id = c.subsection_id
+        LEFT JOIN sections parent ON parent.id = sub.section_id
+        WHERE c.id = {id}
+    """,
+    "section": "SELECT COALESCE(is_premium, 0) FROM sections WHERE id = {id}",
+    "subsection": """
+        SELECT COALESCE(sub.is_premium, 0) OR COALESCE(sec.is_premium, 0)
+        FROM subsections sub
+        LEFT JOIN sections sec ON sec.id = sub.section_id
+        WHERE sub.id = {id}
+    """,
+    "quiz": "SELECT COALESCE(is_premium, 0) FROM quizzes WHERE id = {id}",
+    "premium_content": "SELECT 1 FROM premium_content WHERE id = {id}",
+}
+
+async def is_effectively_premium(kind: str, ref_id: int) -> bool:
+    """True if the row or any section/subsection above it is premium"""
+    async with aiosqlite.connect(DATABASE_PATH) as db:
+        cursor = await db.execute(EFFECTIVE_PREMIUM[kind].format(id="?"), (ref_id,))
+        row = await cursor.fetchone()
+    return bool(row and row[0])
 
 async def init_db():
     """Initialize database with all required tables - RENDER DEPLOYMENT READY"""
@@ -11,162 +520,22 @@ async def init_db():
         
         # Create database connection
         db = await aiosqlite.connect(DATABASE_PATH)
-        print("🔧 Database connection established")
         
         try:
             # Enable foreign key support
             await db.execute("PRAGMA foreign_keys = ON")
+            # WAL lets several bot processes read while one writes; the pragma
+            # returns a row that must be consumed before the schema script runs
+            await db.execute_fetchall("PRAGMA journal_mode = WAL")
             
-            print("👥 Creating users table...")
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id INTEGER PRIMARY KEY,
-                    username TEXT,
-                    first_name TEXT,
-                    last_name TEXT,
-                    is_premium BOOLEAN DEFAULT FALSE,
-                    premium_expires_at TIMESTAMP,
-                    referral_code TEXT UNIQUE,
-                    referred_by INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    total_sessions INTEGER DEFAULT 0,
-                    words_learned INTEGER DEFAULT 0,
-                    quiz_score_total INTEGER DEFAULT 0,
-                    quiz_attempts INTEGER DEFAULT 0,
-                    rating_score REAL DEFAULT 0.0,
-                    referral_count INTEGER DEFAULT 0
-                )
-            """)
-            
-            print("📁 Creating sections table...")
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS sections (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    description TEXT,
-                    language TEXT,
-                    is_premium BOOLEAN DEFAULT FALSE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    created_by INTEGER
-                )
-            """)
-            
-            print("📂 Creating subsections table...")
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS subsections (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    section_id INTEGER,
-                    name TEXT NOT NULL,
-                    description TEXT,
-                    is_premium BOOLEAN DEFAULT FALSE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (section_id) REFERENCES sections (id)
-                )
-            """)
-            
-            print("📝 Creating content table...")
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS content (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    section_id INTEGER DEFAULT 0,
-                    subsection_id INTEGER DEFAULT 0,
-                    title TEXT NOT NULL,
-                    description TEXT,
-                    content_type TEXT,
-                    file_id TEXT,
-                    file_path TEXT,
-                    content_text TEXT,
-                    is_premium BOOLEAN DEFAULT FALSE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (section_id) REFERENCES sections (id),
-                    FOREIGN KEY (subsection_id) REFERENCES subsections (id)
-                )
-            """)
-            
-            print("🎯 Creating quizzes table...")
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS quizzes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title TEXT NOT NULL,
-                    description TEXT,
-                    language TEXT,
-                    category TEXT,
-                    is_premium BOOLEAN DEFAULT FALSE,
-                    created_by INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            print("❓ Creating questions table...")
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS questions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    quiz_id INTEGER,
-                    question_text TEXT NOT NULL,
-                    option_a TEXT NOT NULL,
-                    option_b TEXT NOT NULL,
-                    option_c TEXT NOT NULL,
-                    option_d TEXT NOT NULL,
-                    correct_answer TEXT NOT NULL,
-                    explanation TEXT,
-                    FOREIGN KEY (quiz_id) REFERENCES quizzes (id)
-                )
-            """)
-            
-            print("🏆 Creating quiz_attempts table...")
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS quiz_attempts (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    quiz_id INTEGER,
-                    score INTEGER,
-                    total_questions INTEGER,
-                    completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users (user_id),
-                    FOREIGN KEY (quiz_id) REFERENCES quizzes (id)
-                )
-            """)
-            
-            print("📊 Creating user_progress table...")
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS user_progress (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    content_id INTEGER,
-                    completed BOOLEAN DEFAULT FALSE,
-                    completed_at TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users (user_id),
-                    FOREIGN KEY (content_id) REFERENCES content (id)
-                )
-            """)
-            
-            print("💎 Creating premium_content table...")
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS premium_content (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    section_type TEXT NOT NULL CHECK(section_type IN ('topik1', 'topik2', 'jlpt')),
-                    title TEXT NOT NULL,
-                    description TEXT,
-                    file_id TEXT,
-                    file_type TEXT CHECK(file_type IN ('photo', 'video', 'audio', 'document', 'music', 'text')),
-                    content_text TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    order_index INTEGER DEFAULT 0
-                )
-            """)
-            
-            print("🔗 Creating referrals table...")
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS referrals (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    referrer_id INTEGER,
-                    referred_id INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (referrer_id) REFERENCES users (user_id),
-                    FOREIGN KEY (referred_id) REFERENCES users (user_id)
-                )
-            """)
+            # One script in one transaction: a single round trip to the aiosqlite
+            # thread and a single fsync instead of one autocommit per statement
+            await db.executescript(f"BEGIN;\n{SCHEMA}\nCOMMIT;")
+            await migrate_schema(db)
+            await migrate_quiz_popularity(db)
+            await create_quiz_summary_triggers(db)
+            await seed_quiz_popularity(db)
+            await create_search_index(db)
             
             # Commit all changes
             await db.commit()
@@ -175,12 +544,117 @@ async def init_db():
         finally:
             # Ensure database connection is closed
             await db.close()
-            print("🔐 Database connection closed")
         
     except Exception as e:
         print(f"❌ Database initialization error: {e}")
         raise Exception(f"Failed to initialize database: {e}")
 
+async def foreign_key_violations(db) -> set:
+    """(table, rowid, parent, fkid) rows of PRAGMA foreign_key_check"""
+    cursor = await db.execute("PRAGMA foreign_key_check")
+    return set(await cursor.fetchall())
+
+async def migrate_schema(db) -> None:
+    """Apply MIGRATIONS newer than the database's user_version, each in one transaction"""
+    cursor = await db.execute("PRAGMA user_version")
+    version = (await cursor.fetchone())[0]
+    if version >= len(MIGRATIONS):
+        return
+
+    # SQLite's table rebuild procedure runs with foreign keys off; neither pragma
+    # can change inside a transaction
+    await db.execute("PRAGMA foreign_keys = OFF")
+    await db.execute("PRAGMA legacy_alter_table = ON")
+    try:
+        for number, script in enumerate(MIGRATIONS[version:], version + 1):
+            print(f"🔧 Migrating database schema to version {number}...")
+            # Old databases already hold orphans (attempts of deleted users, content's
+            # 0 = "no section" sentinel); only rows the migration breaks fail it
+            existing = await foreign_key_violations(db)
+            # user_version can't be a bound parameter
+            await db.executescript(f"BEGIN;\n{script}\nPRAGMA user_version = {number};")
+            try:
+                violations = sorted(await foreign_key_violations(db) - existing)
+                if violations:
+                    raise sqlite3.IntegrityError(
+                        f"Migration {number} left foreign key violations: {violations[:10]}"
+                    )
+            except BaseException:
+                await db.rollback()
+                raise
+            await db.commit()
+    finally:
+        await db.execute("PRAGMA legacy_alter_table = OFF")
+        await db.execute("PRAGMA foreign_keys = ON")
+
+async def migrate_quiz_popularity(db) -> None:
+    """Add quiz_summary.popularity to summary tables created before the column existed"""
+    cursor = await db.execute("PRAGMA table_info(quiz_summary)")
+    columns = [row[1] for row in await cursor.fetchall()]
+    if 'popularity' in columns:
+        return
+
+    print("🔥 Adding quiz popularity column...")
+    await db.execute("ALTER TABLE quiz_summary ADD COLUMN popularity REAL")
+
+async def seed_quiz_popularity(db) -> None:
+    """Seed popularity from past attempts for summary rows that have none yet"""
+    # Runs after the summary backfill, so quizzes from older databases have rows
+    # to update; quizzes without attempts stay NULL (decayed popularity 0)
+    cursor = await db.execute("""
+        SELECT a.quiz_id, CAST(strftime('%s', a.completed_at) AS REAL)
+        FROM quiz_summary s
+        JOIN quiz_attempts a ON a.quiz_id = s.quiz_id
+        WHERE s.popularity IS NULL AND a.completed_at IS NOT NULL
+    """)
+    scores = {}
+    for quiz_id, completed_at in await cursor.fetchall():
+        scores[quiz_id] = _logaddexp(scores.get(quiz_id), popularity_point(completed_at))
+
+    await db.executemany(
+        "UPDATE quiz_summary SET popularity = ? WHERE quiz_id = ?",
+        [(score, quiz_id) for quiz_id, score in scores.items()]
+    )
+
+async def create_quiz_summary_triggers(db) -> None:
+    """Indexes and triggers that keep quiz_summary in sync with quizzes/questions/attempts"""
+    # executescript commits the popularity column migration first
+    await db.executescript(f"BEGIN;\n{QUIZ_SUMMARY_SCHEMA}\nCOMMIT;")
+
+    # Backfill quizzes created before the summary table existed; the NOT EXISTS
+    # filter keeps restarts from recomputing the subqueries for every quiz
+    await db.execute("""
+        INSERT INTO quiz_summary (
+            quiz_id, question_count, attempt_count, score_total, question_total,
+            avg_score, last_attempt_at, created_by, created_at
+        )
+        SELECT q.id,
+               (SELECT COUNT(*) FROM questions WHERE quiz_id = q.id),
+               (SELECT COUNT(*) FROM quiz_attempts WHERE quiz_id = q.id),
+               (SELECT COALESCE(SUM(score), 0) FROM quiz_attempts WHERE quiz_id = q.id),
+               (SELECT COALESCE(SUM(total_questions), 0) FROM quiz_attempts WHERE quiz_id = q.id),
+               COALESCE((SELECT SUM(score) * 100.0 / SUM(total_questions)
+                         FROM quiz_attempts WHERE quiz_id = q.id AND total_questions > 0), 0),
+               (SELECT MAX(completed_at) FROM quiz_attempts WHERE quiz_id = q.id),
+               q.created_by,
+               q.created_at
+        FROM quizzes q
+        WHERE NOT EXISTS (SELECT 1 FROM quiz_summary s WHERE s.quiz_id = q.id)
+    """)
+
+async def create_search_index(db) -> None:
+    """FTS5 index with its sync triggers; an SQLite build without FTS5 only disables search"""
+    try:
+        await db.executescript(f"BEGIN;\n{SEARCH_SCHEMA}\nCOMMIT;")
+    except sqlite3.OperationalError as e:
+        await db.rollback()
+        print(f"⚠️  Search index not created: {e}")
+        return
+
+    cursor = await db.execute("SELECT 1 FROM search_index LIMIT 1")
+    if await cursor.fetchone() is None:
+        await db.executescript(f"BEGIN;\n{SEARCH_BACKFILL}\nCOMMIT;")
+
 # Rest of the database functions (user management, etc.)
 async def get_user(user_id: int) -> Optional[Tuple[Any, ...]]:
     """Get user by ID"""
@@ -196,12 +670,16 @@ async def create_user(user_id: int, username: Optional[str], first_name: str, la
     referral_code = f"REF{secrets.randbelow(999999):06d}"
     
     async with aiosqlite.connect(DATABASE_PATH) as db:
-        await db.execute("""
+        cursor = await db.execute("""
             INSERT OR IGNORE INTO users 
             (user_id, username, first_name, last_name, referral_code, referred_by)
             VALUES (?, ?, ?, ?, ?, ?)
         """, (user_id, username or "", first_name, last_name or "", referral_code, referred_by))
         await db.commit()
+        
+    if cursor.rowcount > 0:
+        live_counters.incr('total_users')
+        live_counters.touch_user(user_id)
 
 async def update_user_activity(user_id: int, activity_type: Optional[str] = None) -> None:
     """Update user's last activity and session count"""
@@ -213,6 +691,7 @@ async def update_user_activity(user_id: int, activity_type: Optional[str] = None
             WHERE user_id = ?
         """, (user_id,))
         await db.commit()
+    live_counters.touch_user(user_id)
 
 async def is_premium_active(user_id: int) -> bool:
     """Check if user's premium is active"""
@@ -238,12 +717,17 @@ async def activate_premium(user_id: int, duration_days: int = 30) -> None:
     """Activate premium for user"""
     expires_at = datetime.now() + timedelta(days=duration_days)
     async with aiosqlite.connect(DATABASE_PATH) as db:
+        cursor = await db.execute("SELECT is_premium FROM users WHERE user_id = ?", (user_id,))
+        previous = await cursor.fetchone()
         await db.execute("""
             UPDATE users 
             SET is_premium = TRUE, premium_expires_at = ?
             WHERE user_id = ?
         """, (expires_at.isoformat(), user_id))
         await db.commit()
+        
+    if previous and not previous[0]:
+        live_counters.incr('premium_users')
 
 # Essential functions for bot operation
 async def get_sections(language: Optional[str] = None, is_premium: Optional[bool] = None) -> List[Any]:
@@ -274,6 +758,7 @@ async def create_section(name: str, description: str, language: str = "uzbek", i
             VALUES (?, ?, ?, ?, ?)
         """, (name, description, language, is_premium, created_by))
         await db.commit()
+        live_counters.incr('total_sections')
         return cursor.lastrowid
 
 async def add_content(section_id: int, subsection_id: int, title: str, description: str, 
@@ -348,12 +833,14 @@ async def reset_referral_count(user_id: int) -> None:
 async def revoke_premium(user_id: int) -> None:
     """Revoke premium access from user"""
     async with aiosqlite.connect(DATABASE_PATH) as db:
-        await db.execute("""
+        cursor = await db.execute("""
             UPDATE users 
             SET is_premium = FALSE, premium_expires_at = NULL
-            WHERE user_id = ?
+            WHERE user_id = ? AND is_premium = TRUE
         """, (user_id,))
         await db.commit()
+        
+    live_counters.incr('premium_users', -cursor.rowcount)
 
 async def get_premium_users() -> List[Tuple[Any, ...]]:
     """Get all premium users"""
@@ -457,16 +944,42 @@ async def create_subsection(section_id: int, name: str, description: str, is_pre
         await db.commit()
         return cursor.lastrowid
 
-async def delete_section(section_id: int) -> None:
-    """Delete section and all related content"""
+# Content of a section tree: rows placed in the section itself and in its subsections
+SECTION_TREE_CONTENT = """
+    SELECT id FROM content WHERE section_id = ?
+    UNION ALL
+    SELECT c.id FROM subsections s JOIN content c ON c.subsection_id = s.id WHERE s.section_id = ?
+"""
+
+async def count_section_tree(section_id: int) -> Tuple[int, int]:
+    """(subsections, content rows) that deleting the section removes"""
+    async with aiosqlite.connect(DATABASE_PATH) as db:
+        cursor = await db.execute("SELECT COUNT(*) FROM subsections WHERE section_id = ?", (section_id,))
+        subsections = (await cursor.fetchone())[0]
+        cursor = await db.execute(f"SELECT COUNT(*) FROM ({SECTION_TREE_CONTENT})", (section_id, section_id))
+        content = (await cursor.fetchone())[0]
+    return subsections, content
+
+async def delete_section_content_chunk(section_id: int, limit: int) -> int:
+    """Delete up to `limit` content rows of a section tree in one short transaction"""
     async with aiosqlite.connect(DATABASE_PATH) as db:
-        # Delete related content first
-        await db.execute("DELETE FROM content WHERE section_id = ?", (section_id,))
-        # Delete related subsections
-        await db.execute("DELETE FROM subsections WHERE section_id = ?", (section_id,))
-        # Delete section
-        await db.execute("DELETE FROM sections WHERE id = ?", (section_id,))
+        await db.execute("PRAGMA foreign_keys = ON")
+        cursor = await db.execute(
+            f"DELETE FROM content WHERE id IN ({SECTION_TREE_CONTENT} LIMIT ?)",
+            (section_id, section_id, limit)
+        )
+        await db.commit()
+        return cursor.rowcount
+
+async def delete_section_tree(section_id: int) -> bool:
+    """Delete a section with its subsections, their content and progress in one transaction"""
+    async with aiosqlite.connect(DATABASE_PATH) as db:
+        # The cascades only run with foreign keys enabled on this connection
+        await db.execute("PRAGMA foreign_keys = ON")
+        cursor = await db.execute("DELETE FROM sections WHERE id = ?", (section_id,))
         await db.commit()
+    live_counters.incr('total_sections', -cursor.rowcount)
+    return cursor.rowcount > 0
 
 async def get_section_by_id(section_id: int) -> Optional[Tuple[Any, ...]]:
     """Get section by ID"""
@@ -482,6 +995,7 @@ async def create_quiz(title: str, description: str, language: str, category: str
             VALUES (?, ?, ?, ?, ?, ?)
         """, (title, description, language, category, is_premium, created_by))
         await db.commit()
+        live_counters.incr('total_quizzes')
         return cursor.lastrowid
 
 async def add_question(quiz_id: int, question_text: str, option_a: str, option_b: str, 
@@ -495,6 +1009,25 @@ async def add_question(quiz_id: int, question_text: str, option_a: str, option_b
         await db.commit()
         return cursor.lastrowid
 
+async def import_quiz(title: str, description: str, language: str, category: str,
+                      questions: List[Tuple[str, str, str, str, str, str, str]],
+                      is_premium: bool = False, created_by: Optional[int] = None) -> int:
+    """Create a quiz with all its questions in a single transaction"""
+    async with aiosqlite.connect(DATABASE_PATH) as db:
+        cursor = await db.execute("""
+            INSERT INTO quizzes (title, description, language, category, is_premium, created_by)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (title, description, language, category, is_premium, created_by))
+        quiz_id = cursor.lastrowid
+
+        await db.executemany("""
+            INSERT INTO questions (quiz_id, question_text, option_a, option_b, option_c, option_d, correct_answer, explanation)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, [(quiz_id, *question) for question in questions])
+        await db.commit()
+    live_counters.incr('total_quizzes')
+    return quiz_id
+
 async def get_quizzes(language: Optional[str] = None, category: Optional[str] = None) -> List[Tuple[Any, ...]]:
     """Get quizzes with optional filters"""
     query = "SELECT * FROM quizzes WHERE 1=1"
@@ -522,13 +1055,24 @@ async def get_questions_by_quiz(quiz_id: int) -> List[Tuple[Any, ...]]:
         """, (quiz_id,))
         return await cursor.fetchall()
 
-async def record_quiz_attempt(user_id: int, quiz_id: int, score: int, total_questions: int) -> None:
-    """Record a quiz attempt"""
+async def record_quiz_attempt(user_id: int, quiz_id: int, score: int, total_questions: int,
+                              answers: Optional[List[Tuple[int, int, int]]] = None) -> None:
+    """Record a quiz attempt; answers are optional (question_id, choice 0-3, time_ms) tuples"""
     async with aiosqlite.connect(DATABASE_PATH) as db:
+        await db.create_function("logaddexp", 2, _logaddexp, deterministic=True)
         await db.execute("""
             INSERT INTO quiz_attempts (user_id, quiz_id, score, total_questions)
             VALUES (?, ?, ?, ?)
         """, (user_id, quiz_id, score, total_questions))
+
+        # Decayed popularity: one atomic log-space increment, no global recompute
+        await db.execute("""
+            UPDATE quiz_summary SET popularity = logaddexp(popularity, ?)
+            WHERE quiz_id = ?
+        """, (popularity_point(), quiz_id))
+
+        if answers:
+            await _update_question_stats(db, quiz_id, answers)
         
         # Update user stats
         await db.execute("""
@@ -540,6 +1084,40 @@ async def record_quiz_attempt(user_id: int, quiz_id: int, score: int, total_ques
         
         await db.commit()
 
+async def _update_question_stats(db, quiz_id: int, answers: List[Tuple[int, int, int]]) -> None:
+    """Batched read + upsert of packed per-question tallies (inside the attempt transaction)"""
+    question_ids = list({question_id for question_id, _, _ in answers})
+    placeholders = ",".join("?" * len(question_ids))
+    cursor = await db.execute(
+        f"SELECT question_id, tallies, time_sum_ms FROM question_stats WHERE question_id IN ({placeholders})",
+        question_ids
+    )
+    current = {row[0]: (row[1], row[2]) for row in await cursor.fetchall()}
+
+    for question_id, choice, time_ms in answers:
+        packed, time_sum_ms = current.get(question_id, (0, 0))
+        current[question_id] = add_answer(packed, time_sum_ms, choice, time_ms)
+
+    await db.executemany("""
+        INSERT INTO question_stats (question_id, quiz_id, tallies, time_sum_ms)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(question_id) DO UPDATE SET
+            tallies = excluded.tallies,
+            time_sum_ms = excluded.time_sum_ms
+    """, [(question_id, quiz_id, current[question_id][0], current[question_id][1]) for question_id in question_ids])
+
+async def get_question_stats(quiz_id: int) -> List[Tuple[Any, ...]]:
+    """Questions of a quiz with their packed answer statistics"""
+    async with aiosqlite.connect(DATABASE_PATH) as db:
+        cursor = await db.execute("""
+            SELECT q.id, q.question_text, q.correct_answer, s.tallies, s.time_sum_ms
+            FROM questions q
+            LEFT JOIN question_stats s ON s.question_id = q.id
+            WHERE q.quiz_id = ?
+            ORDER BY q.id
+        """, (quiz_id,))
+        return await cursor.fetchall()
+
 async def get_leaderboard(limit: int = 10) -> List[Tuple[Any, ...]]:
     """Get top users by rating"""
     async with aiosqlite.connect(DATABASE_PATH) as db:
@@ -569,8 +1147,9 @@ async def delete_quiz(quiz_id: int) -> None:
         # Delete related questions first
         await db.execute("DELETE FROM questions WHERE quiz_id = ?", (quiz_id,))
         # Delete quiz
-        await db.execute("DELETE FROM quizzes WHERE id = ?", (quiz_id,))
+        cursor = await db.execute("DELETE FROM quizzes WHERE id = ?", (quiz_id,))
         await db.commit()
+    live_counters.incr('total_quizzes', -cursor.rowcount)
 
 async def get_user_quizzes(user_id: int) -> List[Tuple[Any, ...]]:
     """Get quizzes created by user"""
@@ -611,18 +1190,20 @@ async def get_content_by_id(content_id: int) -> Optional[Tuple[Any, ...]]:
         cursor = await db.execute("SELECT * FROM content WHERE id = ?", (content_id,))
         return await cursor.fetchone()
 
-async def delete_content(content_id: int) -> None:
-    """Delete content by ID"""
+async def delete_content(content_id: int) -> bool:
+    """Delete content by ID together with its progress rows"""
     async with aiosqlite.connect(DATABASE_PATH) as db:
-        await db.execute("DELETE FROM content WHERE id = ?", (content_id,))
+        # user_progress rows go with the content (ON DELETE CASCADE)
+        await db.execute("PRAGMA foreign_keys = ON")
+        cursor = await db.execute("DELETE FROM content WHERE id = ?", (content_id,))
         await db.commit()
+        return cursor.rowcount > 0
 
 async def delete_subsection(subsection_id: int) -> None:
     """Delete subsection and all related content"""
     async with aiosqlite.connect(DATABASE_PATH) as db:
-        # Delete related content first
-        await db.execute("DELETE FROM content WHERE subsection_id = ?", (subsection_id,))
-        # Delete subsection
+        # Content and its progress rows go with the subsection (ON DELETE CASCADE)
+        await db.execute("PRAGMA foreign_keys = ON")
         await db.execute("DELETE FROM subsections WHERE id = ?", (subsection_id,))
         await db.commit()
 
@@ -1,4 +1,7 @@
 import asyncio
+import html
+import tempfile
+import time
 import aiosqlite
 from datetime import datetime
 from aiogram import Router, F, Bot
@@ -6,12 +9,25 @@ from aiogram.types import Message, CallbackQuery, InlineKeyboardButton, InlineKe
 from typing import cast
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.filters import StateFilter
+from aiogram.filters import Command, StateFilter
 
-from config import BOT_TOKEN, ADMIN_ID, DATABASE_PATH, PREMIUM_PRICE_UZS
-from database import get_user, update_user_activity
+from config import BOT_TOKEN, ADMIN_ID, DATABASE_PATH, PREMIUM_PRICE_UZS, SECTION_DELETE_CHUNK
+from database import (
+    get_user, update_user_activity, import_quiz, get_question_stats,
+    count_section_tree, delete_section_content_chunk, delete_section_tree
+)
 from keyboards import get_admin_menu
 from messages import ADMIN_WELCOME_MESSAGE
+from utils.live_counters import live_counters, recount_admin_stats
+from utils.answer_stats import summarize
+from utils.quiz_import import ImportReport, QuizImportError, detect_format, iter_quizzes
+from utils.shutdown import shutdown_coordinator
+from utils.metrics import handler_metrics
+from utils.db_instrumentation import query_recorder
+from utils.throttling import throttle
+from utils.coalescing import callback_coalescer
+from utils.edit_dedup import edit_dedup
+from utils.pagination import Paginator
 
 router = Router()
 
@@ -99,44 +115,20 @@ async def admin_stats(callback: CallbackQuery):
             await callback.answer("❌ Xatolik yuz berdi", show_alert=True)
             return
             
-        total_users = 0
-        premium_users = 0
-        active_today = 0
-        total_sections = 0
-        total_quizzes = 0
-        
-        try:
-            async with aiosqlite.connect(DATABASE_PATH) as db:
-                # Total users
-                cursor = await db.execute("SELECT COUNT(*) FROM users")
-                result = await cursor.fetchone()
-                total_users = result[0] if result else 0
-                
-                # Premium users  
-                cursor = await db.execute("SELECT COUNT(*) FROM users WHERE is_premium = 1")
-                result = await cursor.fetchone()
-                premium_users = result[0] if result else 0
-                
-                # Active today
-                cursor = await db.execute("""
-                    SELECT COUNT(*) FROM users 
-                    WHERE last_activity > datetime('now', '-1 day')
-                """)
-                result = await cursor.fetchone()
-                active_today = result[0] if result else 0
-                
-                # Total sections
-                cursor = await db.execute("SELECT COUNT(*) FROM sections")
-                result = await cursor.fetchone()
-                total_sections = result[0] if result else 0
-                
-                # Total quizzes
-                cursor = await db.execute("SELECT COUNT(*) FROM quizzes")
-                result = await cursor.fetchone()
-                total_quizzes = result[0] if result else 0
-                
-        except Exception as db_error:
-            print(f"Database error: {db_error}")
+        # Live counters are kept in memory; recount only if they are unavailable
+        stats = live_counters.snapshot()
+        if stats is None:
+            try:
+                stats = await recount_admin_stats()
+            except Exception as db_error:
+                print(f"Database error: {db_error}")
+                stats = {}
+        
+        total_users = stats.get('total_users', 0)
+        premium_users = stats.get('premium_users', 0)
+        active_today = stats.get('active_today', 0)
+        total_sections = stats.get('total_sections', 0)
+        total_quizzes = stats.get('total_quizzes', 0)
 
         stats_text = f"""📊 <b>Bot Statistikasi</b>
 
@@ -155,6 +147,11 @@ async def admin_stats(callback: CallbackQuery):
         await message.edit_text(
             stats_text,
             reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text="🔄 Yangilash", callback_data="admin_stats")],
+                [
+                    InlineKeyboardButton(text="⏱ Handler tezligi", callback_data="admin_metrics"),
+                    InlineKeyboardButton(text="🐢 SQL so'rovlar", callback_data="admin_db_queries")
+                ],
                 [InlineKeyboardButton(text="🔙 Admin panel", callback_data="admin_panel")]
             ]),
             parse_mode="HTML"
@@ -169,6 +166,150 @@ async def admin_stats(callback: CallbackQuery):
         except:
             pass
 
+def format_handler_metrics() -> str:
+    """Slowest handlers by p95 for the admin"""
+    rows = handler_metrics.summary()
+    uptime_minutes = int((time.time() - handler_metrics.started_at) / 60)
+    text = (
+        f"⏱ <b>Handler tezligi</b>\n\n"
+        f"🕐 Kuzatuv: {uptime_minutes} daqiqa\n"
+        f"⚙️ Hozir ishlayotgan: {handler_metrics.in_flight()}\n"
+    )
+    if throttle.enabled:
+        text += f"🚦 Cheklangan bosishlar: {throttle.throttled} ({len(throttle.buckets)} faol foydalanuvchi)\n"
+    if callback_coalescer.enabled:
+        text += f"👆 Takroriy bosishlar birlashtirildi: {callback_coalescer.awaited + callback_coalescer.dropped}\n"
+    if edit_dedup.enabled:
+        text += f"✏️ O'zgarmagan tahrirlar yuborilmadi: {edit_dedup.skipped}\n"
+    text += "\n"
+    if not rows:
+        return text + "📭 Hali ma'lumot yo'q"
+    
+    text += "<b>Eng sekin (p95):</b>\n"
+    for index, (handler, prefix, count, p50, p95, errors) in enumerate(rows, 1):
+        name = handler.removeprefix("handlers.")
+        text += (
+            f"\n{index}. <code>{html.escape(name)}</code> · <code>{html.escape(prefix or '-')}</code>\n"
+            f"   {count} ta · p50 {p50 * 1000:.0f} ms · p95 {p95 * 1000:.0f} ms"
+        )
+        if errors:
+            text += f" · ❌ {errors}"
+    return text
+
+@router.message(Command("metrics"))
+async def admin_metrics_command(message: Message):
+    """Handler latency summary for the admin"""
+    try:
+        if not message.from_user or message.from_user.id != ADMIN_ID:
+            return
+        await message.answer(format_handler_metrics(), parse_mode="HTML")
+    except Exception as e:
+        print(f"Admin metrics error: {e}")
+
+@router.callback_query(F.data == "admin_metrics")
+async def admin_metrics(callback: CallbackQuery):
+    """Handler latency summary, refreshable from the stats screen"""
+    try:
+        if not callback.from_user or callback.from_user.id != ADMIN_ID:
+            await callback.answer("❌ Sizda admin huquqlari yo'q!", show_alert=True)
+            return
+        
+        if not callback.message:
+            await callback.answer("❌ Xatolik yuz berdi", show_alert=True)
+            return
+        
+        message = cast(Message, callback.message)
+        await message.edit_text(
+            format_handler_metrics(),
+            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text="🔄 Yangilash", callback_data="admin_metrics")],
+                [InlineKeyboardButton(text="🔙 Statistika", callback_data="admin_stats")]
+            ]),
+            parse_mode="HTML"
+        )
+        
+        await callback.answer()
+        
+    except Exception as e:
+        print(f"Admin metrics error: {e}")
+        try:
+            await callback.answer("❌ Xatolik yuz berdi", show_alert=True)
+        except:
+            pass
+
+def format_query_report() -> str:
+    """Heaviest SQL fingerprints by total time for the admin"""
+    if not query_recorder.installed:
+        return "🐢 <b>SQL so'rovlar</b>\n\n⚠️ O'lchash o'chirilgan (DB_INSTRUMENTATION=0)"
+    
+    rows = query_recorder.top()
+    minutes = int((time.time() - query_recorder.started_at) / 60)
+    text = (
+        f"🐢 <b>SQL so'rovlar</b>\n\n"
+        f"🕐 Kuzatuv: {minutes} daqiqa\n"
+        f"🐌 Sekin chegara: {query_recorder.slow_seconds * 1000:.0f} ms\n\n"
+    )
+    if not rows:
+        return text + "📭 Hali ma'lumot yo'q"
+    
+    text += "<b>Umumiy vaqt bo'yicha TOP:</b>\n"
+    for index, (sql, stats) in enumerate(rows, 1):
+        short_sql = sql if len(sql) <= 160 else sql[:157] + "..."
+        total_ms = (stats.total + stats.fetch_total) * 1000
+        text += (
+            f"\n{index}. <code>{html.escape(short_sql)}</code>\n"
+            f"   {stats.count} ta · jami {total_ms:.0f} ms · o'rtacha {total_ms / max(stats.count, 1):.1f} ms"
+            f" · p95 {stats.p95() * 1000:.1f} ms\n"
+        )
+    return text
+
+@router.message(Command("queries"))
+async def admin_db_queries_command(message: Message):
+    """SQL report for the admin"""
+    try:
+        if not message.from_user or message.from_user.id != ADMIN_ID:
+            return
+        await message.answer(format_query_report(), parse_mode="HTML")
+    except Exception as e:
+        print(f"Admin queries error: {e}")
+
+@router.callback_query(F.data.in_({"admin_db_queries", "admin_db_queries_reset"}))
+async def admin_db_queries(callback: CallbackQuery):
+    """SQL report, refreshable and resettable from the stats screen"""
+    try:
+        if not callback.from_user or callback.from_user.id != ADMIN_ID:
+            await callback.answer("❌ Sizda admin huquqlari yo'q!", show_alert=True)
+            return
+        
+        if not callback.message:
+            await callback.answer("❌ Xatolik yuz berdi", show_alert=True)
+            return
+        
+        if callback.data == "admin_db_queries_reset":
+            query_recorder.reset()
+        
+        message = cast(Message, callback.message)
+        await message.edit_text(
+            format_query_report(),
+            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+                [
+                    InlineKeyboardButton(text="🔄 Yangilash", callback_data="admin_db_queries"),
+                    InlineKeyboardButton(text="🧹 Tozalash", callback_data="admin_db_queries_reset")
+                ],
+                [InlineKeyboardButton(text="🔙 Statistika", callback_data="admin_stats")]
+            ]),
+            parse_mode="HTML"
+        )
+        
+        await callback.answer()
+        
+    except Exception as e:
+        print(f"Admin queries error: {e}")
+        try:
+            await callback.answer("❌ Xatolik yuz berdi", show_alert=True)
+        except:
+            pass
+
 @router.callback_query(F.data == "admin_broadcast")
 async def admin_broadcast_menu(callback: CallbackQuery):
     """Safe broadcast menu"""
@@ -257,7 +398,7 @@ async def broadcast_text_received(message: Message, state: FSMContext):
         # Show confirmation
         await message.answer(
             f"📋 <b>Tasdiqlash</b>\n\n"
-            f"📝 <b>Xabar:</b>\n{message.text}\n\n"
+            f"📝 <b>Xabar:</b>\n{html.escape(message.text)}\n\n"
             f"⚠️ Bu xabar barchaga yuboriladi!",
             reply_markup=InlineKeyboardMarkup(inline_keyboard=[
                 [
@@ -290,25 +431,39 @@ async def confirm_broadcast(callback: CallbackQuery, state: FSMContext):
         
         # Send to all users - simplified for now
         sent_count = 0
+        failed_count = 0
+        last_error = None
+        interrupted = False
+        bot = cast(Bot, callback.bot)
         try:
             async with aiosqlite.connect(DATABASE_PATH) as db:
                 cursor = await db.execute("SELECT user_id FROM users")
                 users = await cursor.fetchall()
                 
-                for user_row in users:
-                    try:
-                        bot = Bot(token=BOT_TOKEN)
-                        await bot.send_message(user_row[0], data.get('message_text', ''))
-                        sent_count += 1
-                    except Exception:
-                        pass  # User might have blocked bot
+            for user_row in users:
+                # Bot is shutting down: stop after the message already sent
+                if shutdown_coordinator.stopping:
+                    interrupted = True
+                    break
+                try:
+                    # Admin's raw text: the bot's default HTML parse mode would reject < > &
+                    await bot.send_message(user_row[0], data.get('message_text', ''), parse_mode=None)
+                    sent_count += 1
+                except Exception as e:
+                    # User might have blocked bot
+                    failed_count += 1
+                    last_error = e
         except Exception as e:
             print(f"Broadcast error: {e}")
+        if failed_count:
+            print(f"[ADMIN] Broadcast failed for {failed_count} users, last error: {last_error}")
         
         await state.clear()
+        status = "⚠️ <b>Bot qayta ishga tushmoqda, yuborish to'xtatildi!</b>" if interrupted else "✅ <b>Xabar yuborildi!</b>"
         await message.edit_text(
-            f"✅ <b>Xabar yuborildi!</b>\n\n"
-            f"📊 {sent_count} ta foydalanuvchiga yuborildi",
+            f"{status}\n\n"
+            f"📊 {sent_count} ta foydalanuvchiga yuborildi"
+            + (f"\n❌ {failed_count} ta foydalanuvchiga yuborilmadi" if failed_count else ""),
             reply_markup=InlineKeyboardMarkup(inline_keyboard=[
                 [InlineKeyboardButton(text="🔙 Admin panel", callback_data="admin_panel")]
             ])
@@ -355,6 +510,8 @@ async def send_broadcast_message(data):
     """Safe broadcast sender"""
     bot = Bot(token=BOT_TOKEN)
     sent_count = 0
+    failed_count = 0
+    last_error = None
     
     try:
         # Get all users
@@ -368,13 +525,20 @@ async def send_broadcast_message(data):
             return 0
             
         for (user_id,) in users:
+            if shutdown_coordinator.stopping:
+                print(f"[ADMIN] Broadcast interrupted by shutdown after {sent_count} messages")
+                break
             try:
-                await bot.send_message(user_id, message_text)
+                await bot.send_message(user_id, message_text, parse_mode=None)
                 sent_count += 1
                 await asyncio.sleep(0.05)  # Rate limiting
-            except Exception:
+            except Exception as e:
+                failed_count += 1
+                last_error = e
                 continue
         
+        if failed_count:
+            print(f"[ADMIN] Broadcast failed for {failed_count} users, last error: {last_error}")
         await bot.session.close()
         return sent_count
         
@@ -523,6 +687,7 @@ async def admin_quiz(callback: CallbackQuery):
             [InlineKeyboardButton(text="📋 Barcha testlarni ko'rish", callback_data="view_all_quizzes")],
             [InlineKeyboardButton(text="➕ Yangi test yaratish", callback_data="create_new_quiz")],
             [InlineKeyboardButton(text="❓ Savol qo'shish", callback_data="add_quiz_question")],
+            [InlineKeyboardButton(text="📥 Testlarni import qilish", callback_data="import_quizzes")],
             [InlineKeyboardButton(text="🗑️ Test o'chirish", callback_data="delete_quiz_menu")],
             [InlineKeyboardButton(text="🔙 Admin panel", callback_data="admin_panel")]
         ]
@@ -772,13 +937,9 @@ async def confirm_delete_section(callback: CallbackQuery):
                 return
                 
             name, description = section
-            
-            # Count content and subsections
-            cursor = await db.execute("SELECT COUNT(*) FROM content WHERE section_id = ?", (section_id,))
-            content_count = (await cursor.fetchone())[0]
-            
-            cursor = await db.execute("SELECT COUNT(*) FROM subsections WHERE section_id = ?", (section_id,))
-            subsection_count = (await cursor.fetchone())[0]
+        
+        # Subsection content counts too, it is deleted along with them
+        subsection_count, content_count = await count_section_tree(section_id)
         
         if not callback.message:
             await callback.answer("❌ Xatolik yuz berdi", show_alert=True)
@@ -812,9 +973,11 @@ async def confirm_delete_section(callback: CallbackQuery):
         print(f"Confirm delete section error: {e}")
         await callback.answer("❌ Xatolik yuz berdi", show_alert=True)
 
+DELETE_PROGRESS_INTERVAL = 1.5  # seconds between progress message edits
+
 @router.callback_query(F.data.startswith("execute_delete_section_"))
 async def execute_delete_section(callback: CallbackQuery):
-    """Execute section deletion"""
+    """Execute section deletion; large trees are removed in chunks with progress"""
     try:
         if not callback.from_user or callback.from_user.id != ADMIN_ID:
             await callback.answer("❌ Sizda admin huquqlari yo'q!", show_alert=True)
@@ -822,28 +985,16 @@ async def execute_delete_section(callback: CallbackQuery):
             
         section_id = int(callback.data.split("_")[-1])
         
-        # Delete section and all related data
+        # Get section name for confirmation message
         async with aiosqlite.connect(DATABASE_PATH) as db:
-            # Get section name for confirmation message
             cursor = await db.execute("SELECT name FROM sections WHERE id = ?", (section_id,))
             section = await cursor.fetchone()
             
-            if not section:
-                await callback.answer("❌ Bo'lim topilmadi", show_alert=True)
-                return
-                
-            section_name = section[0]
-            
-            # Delete all related content first
-            await db.execute("DELETE FROM content WHERE section_id = ?", (section_id,))
-            
-            # Delete all subsections
-            await db.execute("DELETE FROM subsections WHERE section_id = ?", (section_id,))
-            
-            # Finally delete the section
-            await db.execute("DELETE FROM sections WHERE id = ?", (section_id,))
+        if not section:
+            await callback.answer("❌ Bo'lim topilmadi", show_alert=True)
+            return
             
-            await db.commit()
+        section_name = section[0]
         
         if not callback.message:
             await callback.answer("❌ Xatolik yuz berdi", show_alert=True)
@@ -853,8 +1004,42 @@ async def execute_delete_section(callback: CallbackQuery):
             [InlineKeyboardButton(text="📚 Bo'limlar boshqaruvi", callback_data="admin_sections")],
             [InlineKeyboardButton(text="🔙 Admin panel", callback_data="admin_panel")]
         ]
-        
         message = cast(Message, callback.message)
+        
+        _, content_count = await count_section_tree(section_id)
+        if content_count > SECTION_DELETE_CHUNK:
+            # One short transaction per chunk, so other writers get the lock in between
+            await callback.answer("⏳ O'chirish boshlandi")
+            deleted = 0
+            last_progress = time.monotonic()
+            while True:
+                if shutdown_coordinator.stopping:
+                    await message.edit_text(
+                        f"⚠️ <b>Bot qayta ishga tushmoqda, o'chirish to'xtatildi!</b>\n\n"
+                        f"📝 <b>Bo'lim:</b> {section_name}\n"
+                        f"🗑 {deleted}/{content_count} ta kontent o'chirildi. Qolganini o'chirish uchun qayta urinib ko'ring.",
+                        reply_markup=InlineKeyboardMarkup(inline_keyboard=keyboard),
+                        parse_mode="HTML"
+                    )
+                    return
+                removed = await delete_section_content_chunk(section_id, SECTION_DELETE_CHUNK)
+                if not removed:
+                    break
+                deleted += removed
+                if time.monotonic() - last_progress >= DELETE_PROGRESS_INTERVAL:
+                    last_progress = time.monotonic()
+                    try:
+                        await message.edit_text(
+                            f"⏳ <b>{section_name}</b> o'chirilmoqda...\n\n"
+                            f"🗑 Kontent: {deleted}/{content_count}",
+                            parse_mode="HTML"
+                        )
+                    except Exception:
+                        pass
+        
+        # Section, subsections and whatever content is left go in one transaction
+        await delete_section_tree(section_id)
+        
         await message.edit_text(
             f"✅ <b>Bo'lim muvaffaqiyatli o'chirildi!</b>\n\n"
             f"📝 <b>O'chirilgan bo'lim:</b> {section_name}\n\n"
@@ -862,29 +1047,39 @@ async def execute_delete_section(callback: CallbackQuery):
             reply_markup=InlineKeyboardMarkup(inline_keyboard=keyboard),
             parse_mode="HTML"
         )
-        await callback.answer("✅ Bo'lim o'chirildi!")
+        if content_count <= SECTION_DELETE_CHUNK:
+            await callback.answer("✅ Bo'lim o'chirildi!")
         
     except Exception as e:
         print(f"Execute delete section error: {e}")
-        await callback.answer("❌ Xatolik yuz berdi", show_alert=True)
+        try:
+            await callback.answer("❌ Xatolik yuz berdi", show_alert=True)
+        except:
+            pass
 
 # =======================================================
 # NEW ADMIN HANDLER IMPLEMENTATIONS - SECTIONS MANAGEMENT
 # =======================================================
 
-@router.callback_query(F.data == "view_all_sections")
+SECTION_PAGES = Paginator(
+    "sections", "view_all_sections",
+    columns="id, name, description, language, is_premium",
+    source="sections",
+    keys=["id"], key_types=[int]
+)
+
+@router.callback_query(SECTION_PAGES.filter)
 async def view_all_sections(callback: CallbackQuery):
-    """View all sections"""
+    """View all sections, one page per tap"""
     try:
         if not callback.from_user or callback.from_user.id != ADMIN_ID:
             await callback.answer("❌ Sizda admin huquqlari yo'q!", show_alert=True)
             return
             
-        from .sections import get_sections
-        sections = await get_sections()
-        sections_list = list(sections) if sections else []
+        async with aiosqlite.connect(DATABASE_PATH) as db:
+            page = await SECTION_PAGES.fetch(db, callback.data)
         
-        if not sections_list:
+        if not page.rows:
             await callback.answer("📝 Hech qanday bo'lim topilmadi", show_alert=True)
             return
             
@@ -892,10 +1087,10 @@ async def view_all_sections(callback: CallbackQuery):
             await callback.answer("❌ Xatolik yuz berdi", show_alert=True)
             return
             
-        text = "📚 <b>Barcha bo'limlar:</b>\n\n"
+        text = f"📚 <b>Barcha bo'limlar{SECTION_PAGES.label(page)}:</b>\n\n"
         keyboard = []
         
-        for i, section in enumerate(sections_list[:10], 1):  # Limit to 10 sections
+        for i, section in enumerate(page.rows, SECTION_PAGES.start(page)):
             section_id, name, description, language, is_premium = section
             premium_text = "💎 Premium" if is_premium else "🆓 Tekin"
             text += f"{i}. <b>{name}</b> ({premium_text})\n"
@@ -907,6 +1102,9 @@ async def view_all_sections(callback: CallbackQuery):
                 callback_data=f"edit_section_{section_id}"
             )])
         
+        nav = SECTION_PAGES.nav_row(page)
+        if nav:
+            keyboard.append(nav)
         keyboard.append([InlineKeyboardButton(text="🔙 Bo'limlar boshqaruvi", callback_data="admin_sections")])
         
         message = cast(Message, callback.message)
@@ -953,32 +1151,33 @@ async def create_new_section(callback: CallbackQuery, state: FSMContext):
 # CONTENT MANAGEMENT HANDLERS
 # =======================================================
 
-@router.callback_query(F.data == "view_all_content")
+# Ids grow with created_at, so the primary key gives the same newest-first order
+CONTENT_PAGES = Paginator(
+    "content", "view_all_content",
+    columns="c.id, c.title, c.content_type, c.is_premium, s.name",
+    source="content c LEFT JOIN sections s ON c.section_id = s.id",
+    keys=["c.id"], key_types=[int], page_size=15
+)
+
+@router.callback_query(CONTENT_PAGES.filter)
 async def view_all_content(callback: CallbackQuery):
-    """View all content"""
+    """View all content, one page per tap"""
     try:
         if not callback.from_user or callback.from_user.id != ADMIN_ID:
             await callback.answer("❌ Sizda admin huquqlari yo'q!", show_alert=True)
             return
             
         async with aiosqlite.connect(DATABASE_PATH) as db:
-            cursor = await db.execute("""
-                SELECT c.id, c.title, c.content_type, c.is_premium, s.name as section_name
-                FROM content c
-                LEFT JOIN sections s ON c.section_id = s.id
-                ORDER BY c.created_at DESC
-                LIMIT 15
-            """)
-            content_list = await cursor.fetchall()
+            page = await CONTENT_PAGES.fetch(db, callback.data)
         
-        if not content_list:
+        if not page.rows:
             await callback.answer("📝 Hech qanday kontent topilmadi", show_alert=True)
             return
             
-        text = "📁 <b>Barcha kontentlar:</b>\n\n"
+        text = f"📁 <b>Barcha kontentlar{CONTENT_PAGES.label(page)}:</b>\n\n"
         keyboard = []
         
-        for i, content in enumerate(content_list, 1):
+        for i, content in enumerate(page.rows, CONTENT_PAGES.start(page)):
             content_id, title, content_type, is_premium, section_name = content
             premium_icon = "💎" if is_premium else "📄"
             text += f"{i}. {premium_icon} <b>{title[:30]}...</b>\n"
@@ -990,6 +1189,9 @@ async def view_all_content(callback: CallbackQuery):
                 callback_data=f"edit_content_{content_id}"
             )])
         
+        nav = CONTENT_PAGES.nav_row(page)
+        if nav:
+            keyboard.append(nav)
         keyboard.append([InlineKeyboardButton(text="🔙 Kontent boshqaruvi", callback_data="admin_content")])
         
         if not callback.message:
@@ -1056,44 +1258,45 @@ async def add_new_content(callback: CallbackQuery):
 # QUIZ MANAGEMENT HANDLERS  
 # =======================================================
 
-@router.callback_query(F.data == "view_all_quizzes")
+QUIZ_PAGES = Paginator(
+    "quizzes", "view_all_quizzes",
+    columns="q.id, q.title, q.language, q.category, COALESCE(s.question_count, 0)",
+    source="quizzes q LEFT JOIN quiz_summary s ON s.quiz_id = q.id",
+    keys=["q.id"], key_types=[int]
+)
+
+@router.callback_query(QUIZ_PAGES.filter)
 async def view_all_quizzes(callback: CallbackQuery):
-    """View all quizzes"""
+    """View all quizzes, one page per tap"""
     try:
         if not callback.from_user or callback.from_user.id != ADMIN_ID:
             await callback.answer("❌ Sizda admin huquqlari yo'q!", show_alert=True)
             return
             
         async with aiosqlite.connect(DATABASE_PATH) as db:
-            cursor = await db.execute("""
-                SELECT q.id, q.title, q.quiz_type, q.difficulty, 
-                       COUNT(qu.id) as question_count
-                FROM quizzes q
-                LEFT JOIN questions qu ON q.id = qu.quiz_id
-                GROUP BY q.id
-                ORDER BY q.created_at DESC
-                LIMIT 10
-            """)
-            quizzes = await cursor.fetchall()
+            page = await QUIZ_PAGES.fetch(db, callback.data)
         
-        if not quizzes:
+        if not page.rows:
             await callback.answer("📝 Hech qanday test topilmadi", show_alert=True)
             return
             
-        text = "🧠 <b>Barcha testlar:</b>\n\n"
+        text = f"🧠 <b>Barcha testlar{QUIZ_PAGES.label(page)}:</b>\n\n"
         keyboard = []
         
-        for i, quiz in enumerate(quizzes, 1):
-            quiz_id, title, quiz_type, difficulty, question_count = quiz
+        for i, quiz in enumerate(page.rows, QUIZ_PAGES.start(page)):
+            quiz_id, title, language, category, question_count = quiz
             text += f"{i}. <b>{title}</b>\n"
-            text += f"   🎯 {quiz_type.title()} - {difficulty}\n"
+            text += f"   🎯 {(language or 'general').title()} - {category or '-'}\n"
             text += f"   ❓ {question_count} ta savol\n\n"
             
-            keyboard.append([InlineKeyboardButton(
-                text=f"📝 {title[:25]}...", 
-                callback_data=f"edit_quiz_{quiz_id}"
-            )])
+            keyboard.append([
+                InlineKeyboardButton(text=f"📝 {title[:25]}...", callback_data=f"edit_quiz_{quiz_id}"),
+                InlineKeyboardButton(text="📊 Statistika", callback_data=f"quiz_qstats_{quiz_id}")
+            ])
         
+        nav = QUIZ_PAGES.nav_row(page)
+        if nav:
+            keyboard.append(nav)
         keyboard.append([InlineKeyboardButton(text="🔙 Testlar boshqaruvi", callback_data="admin_quiz")])
         
         if not callback.message:
@@ -1112,6 +1315,81 @@ async def view_all_quizzes(callback: CallbackQuery):
         print(f"View quizzes error: {e}")
         await callback.answer("❌ Xatolik yuz berdi", show_alert=True)
 
+@router.callback_query(F.data.startswith("quiz_qstats_"))
+async def quiz_question_stats(callback: CallbackQuery):
+    """Per-question answer statistics for a quiz"""
+    try:
+        if not callback.from_user or callback.from_user.id != ADMIN_ID:
+            await callback.answer("❌ Sizda admin huquqlari yo'q!", show_alert=True)
+            return
+
+        if not callback.message or not callback.data:
+            await callback.answer("❌ Xatolik yuz berdi", show_alert=True)
+            return
+
+        quiz_id = int(callback.data.split("_")[-1])
+
+        async with aiosqlite.connect(DATABASE_PATH) as db:
+            cursor = await db.execute("""
+                SELECT q.title, s.attempt_count, s.avg_score
+                FROM quizzes q
+                LEFT JOIN quiz_summary s ON s.quiz_id = q.id
+                WHERE q.id = ?
+            """, (quiz_id,))
+            quiz = await cursor.fetchone()
+
+        if not quiz:
+            await callback.answer("❌ Test topilmadi", show_alert=True)
+            return
+
+        title, attempt_count, avg_score = quiz
+        questions = await get_question_stats(quiz_id)
+
+        text = f"📊 <b>{html.escape(title)}</b> - savollar statistikasi\n\n"
+        text += f"👥 Urinishlar: {attempt_count or 0} | 📈 O'rtacha: {avg_score or 0:.0f}%\n\n"
+
+        for i, (question_id, question_text, correct_answer, tallies, time_sum_ms) in enumerate(questions, 1):
+            correct_letter = str(correct_answer or "A").strip().upper()[:1]
+            correct_index = "ABCD".index(correct_letter) if correct_letter in "ABCD" else 0
+            stats = summarize(tallies, time_sum_ms, correct_index)
+
+            line = f"{i}. {html.escape(question_text[:40])}\n"
+            if stats['total']:
+                a, b, c, d = stats['tallies']
+                wrong_max = max(count for lane, count in enumerate(stats['tallies']) if lane != correct_index)
+                flag = ""
+                if stats['correct_rate'] >= 95:
+                    flag = " 💤 juda oson"
+                elif wrong_max > stats['tallies'][correct_index]:
+                    flag = " ⚠️ noaniq"
+                line += (f"   ✅ {stats['correct_rate']:.0f}% ({correct_letter}) | "
+                         f"A {a} · B {b} · C {c} · D {d} | ⏱ {stats['mean_time']:.1f}s{flag}\n")
+            else:
+                line += "   — hali javob yo'q\n"
+
+            if len(text) + len(line) > 3800:
+                text += "..."
+                break
+            text += line
+
+        message = cast(Message, callback.message)
+        await message.edit_text(
+            text,
+            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text="🔄 Yangilash", callback_data=f"quiz_qstats_{quiz_id}")],
+                [InlineKeyboardButton(text="🔙 Barcha testlar", callback_data="view_all_quizzes")]
+            ]),
+            parse_mode="HTML"
+        )
+        await callback.answer()
+
+    except Exception as e:
+        print(f"Quiz question stats error: {e}")
+        try:
+            await callback.answer("❌ Xatolik yuz berdi", show_alert=True)
+        except:
+            pass
+
 @router.callback_query(F.data == "create_new_quiz")
 async def create_new_quiz(callback: CallbackQuery, state: FSMContext):
     """Start quiz creation"""
@@ -1144,31 +1422,33 @@ async def create_new_quiz(callback: CallbackQuery, state: FSMContext):
 # PREMIUM MANAGEMENT HANDLERS
 # =======================================================
 
-@router.callback_query(F.data == "view_premium_users")
+# A premium row without an expiry is inactive (see is_premium_active), and NULL keys can't be paged past
+PREMIUM_USER_PAGES = Paginator(
+    "premium", "view_premium_users",
+    columns="user_id, first_name, last_name, username, premium_expires_at, rating_score",
+    source="users",
+    keys=["premium_expires_at", "user_id"], key_types=[str, int],
+    where="is_premium = 1 AND premium_expires_at IS NOT NULL", page_size=15
+)
+
+@router.callback_query(PREMIUM_USER_PAGES.filter)
 async def view_premium_users(callback: CallbackQuery):
-    """View premium users"""
+    """View premium users, one page per tap"""
     try:
         if not callback.from_user or callback.from_user.id != ADMIN_ID:
             await callback.answer("❌ Sizda admin huquqlari yo'q!", show_alert=True)
             return
             
         async with aiosqlite.connect(DATABASE_PATH) as db:
-            cursor = await db.execute("""
-                SELECT user_id, first_name, last_name, username, premium_expires_at, rating_score
-                FROM users 
-                WHERE is_premium = 1
-                ORDER BY premium_expires_at DESC
-                LIMIT 15
-            """)
-            premium_users = await cursor.fetchall()
+            page = await PREMIUM_USER_PAGES.fetch(db, callback.data)
         
-        if not premium_users:
+        if not page.rows:
             await callback.answer("👥 Premium foydalanuvchilar topilmadi", show_alert=True)
             return
             
-        text = "💎 <b>Premium foydalanuvchilar:</b>\n\n"
+        text = f"💎 <b>Premium foydalanuvchilar{PREMIUM_USER_PAGES.label(page)}:</b>\n\n"
         
-        for i, user in enumerate(premium_users, 1):
+        for i, user in enumerate(page.rows, PREMIUM_USER_PAGES.start(page)):
             user_id, first_name, last_name, username, premium_expires_at, rating = user
             name = f"{first_name or ''} {last_name or ''}".strip() or "Noma'lum"
             username_text = f"@{username}" if username else ""
@@ -1176,11 +1456,13 @@ async def view_premium_users(callback: CallbackQuery):
             text += f"{i}. <b>{name}</b> {username_text}\n"
             text += f"   🆔 {user_id}\n"
             text += f"   ⭐ {rating or 0} reyting\n"
-            text += f"   📅 {premium_expires_at or 'Cheksiz'}\n\n"
+            text += f"   📅 {premium_expires_at}\n\n"
         
-        keyboard = [
-            [InlineKeyboardButton(text="🔙 Premium boshqaruv", callback_data="admin_premium")]
-        ]
+        keyboard = []
+        nav = PREMIUM_USER_PAGES.nav_row(page)
+        if nav:
+            keyboard.append(nav)
+        keyboard.append([InlineKeyboardButton(text="🔙 Premium boshqaruv", callback_data="admin_premium")])
         
         if not callback.message:
             await callback.answer("❌ Xatolik yuz berdi", show_alert=True)
@@ -1505,6 +1787,7 @@ async def receive_premium_user_id(message: Message, state: FSMContext):
                 WHERE user_id = ?
             """, (premium_expires_at, user_id))
             await db.commit()
+            live_counters.incr('premium_users')
             
         await state.clear()
         keyboard = InlineKeyboardMarkup(inline_keyboard=[
@@ -1704,6 +1987,7 @@ async def receive_revoke_premium_id(message: Message, state: FSMContext):
                 WHERE user_id = ?
             """, (user_id,))
             await db.commit()
+            live_counters.incr('premium_users', -1)
             
         await state.clear()
         keyboard = InlineKeyboardMarkup(inline_keyboard=[
@@ -1736,6 +2020,141 @@ async def receive_revoke_premium_id(message: Message, state: FSMContext):
         print(f"Revoke premium error: {e}")
         await message.answer("❌ Xatolik yuz berdi")
 
+# =======================================================
+# BULK QUIZ IMPORT
+# =======================================================
+
+IMPORT_MAX_FILE_SIZE = 20 * 1024 * 1024  # Telegram Bot API download limit
+IMPORT_PROGRESS_INTERVAL = 1.5  # seconds between progress message edits
+
+@router.callback_query(F.data == "import_quizzes")
+async def import_quizzes_start(callback: CallbackQuery, state: FSMContext):
+    """Ask admin for a JSON/CSV file with quizzes"""
+    try:
+        if not callback.from_user or callback.from_user.id != ADMIN_ID:
+            await callback.answer("❌ Sizda admin huquqlari yo'q!", show_alert=True)
+            return
+
+        if not callback.message:
+            await callback.answer("❌ Xatolik yuz berdi", show_alert=True)
+            return
+
+        await state.set_state("importing_quizzes")
+
+        message = cast(Message, callback.message)
+        await message.edit_text(
+            "📥 <b>Testlarni import qilish</b>\n\n"
+            "CSV, JSONL yoki JSON faylni yuboring.\n\n"
+            "<b>CSV/JSONL maydonlari:</b>\n"
+            "<code>quiz_title, question, option_a, option_b, option_c, option_d, correct_answer, explanation</code>\n"
+            "Ixtiyoriy: <code>quiz_description, language, category, is_premium</code>\n"
+            "Bir testning savollari ketma-ket kelishi kerak.\n\n"
+            "<b>JSON:</b> <code>[{\"title\": ..., \"questions\": [{\"question\": ..., "
+            "\"options\": [4 ta], \"correct_answer\": \"A\"}]}]</code>\n\n"
+            "✅ To'g'ri javob: A/B/C/D, 1-4 yoki variant matni\n"
+            "💡 /cancel - bekor qilish",
+            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text="🔙 Testlar boshqaruvi", callback_data="admin_quiz")]
+            ]),
+            parse_mode="HTML"
+        )
+        await callback.answer()
+
+    except Exception as e:
+        print(f"Import quizzes start error: {e}")
+        try:
+            await callback.answer("❌ Xatolik yuz berdi", show_alert=True)
+        except:
+            pass
+
+@router.message(F.text, StateFilter("importing_quizzes"))
+async def import_quizzes_text(message: Message, state: FSMContext):
+    """Cancel or remind that a file is expected"""
+    if message.text == "/cancel":
+        await state.clear()
+        await message.answer("❌ Import bekor qilindi")
+        return
+    await message.answer("📎 Iltimos, CSV, JSONL yoki JSON fayl yuboring. /cancel - bekor qilish")
+
+@router.message(F.document, StateFilter("importing_quizzes"))
+async def import_quizzes_file(message: Message, state: FSMContext, bot: Bot):
+    """Stream, validate and insert quizzes from the uploaded document"""
+    try:
+        if not message.from_user or message.from_user.id != ADMIN_ID:
+            await message.answer("❌ Sizda admin huquqlari yo'q!")
+            return
+
+        document = message.document
+        file_format = detect_format(document.file_name, document.mime_type)
+        if not file_format:
+            await message.answer("⚠️ Faqat .csv, .jsonl yoki .json fayllar qabul qilinadi")
+            return
+
+        if document.file_size and document.file_size > IMPORT_MAX_FILE_SIZE:
+            await message.answer("⚠️ Fayl hajmi 20 MB dan oshmasligi kerak")
+            return
+
+        await state.clear()
+        status = await message.answer(f"⏳ <b>{html.escape(document.file_name or '')}</b> yuklanmoqda...", parse_mode="HTML")
+
+        started = time.monotonic()
+        last_progress = started
+        report = ImportReport()
+
+        with tempfile.TemporaryFile() as tmp:
+            await bot.download(document, destination=tmp)
+            tmp.seek(0)
+
+            try:
+                for draft in iter_quizzes(tmp, file_format, report):
+                    await import_quiz(
+                        draft.title, draft.description, draft.language, draft.category,
+                        draft.questions, is_premium=draft.is_premium, created_by=message.from_user.id
+                    )
+                    report.quizzes += 1
+                    report.questions += len(draft.questions)
+
+                    if time.monotonic() - last_progress >= IMPORT_PROGRESS_INTERVAL:
+                        last_progress = time.monotonic()
+                        try:
+                            await status.edit_text(
+                                f"⏳ Import davom etmoqda...\n\n"
+                                f"🧠 Testlar: {report.quizzes}\n"
+                                f"❓ Savollar: {report.questions}\n"
+                                f"⚠️ O'tkazib yuborildi: {report.skipped}"
+                            )
+                        except Exception:
+                            pass
+            except QuizImportError as e:
+                report.errors.insert(0, str(e))
+
+        elapsed = time.monotonic() - started
+        print(f"[ADMIN] Quiz import {document.file_name}: {report.quizzes} quizzes, "
+              f"{report.questions} questions, {report.skipped} skipped in {elapsed:.2f}s")
+
+        result_text = (
+            f"{'✅' if report.quizzes else '⚠️'} <b>Import yakunlandi</b>\n\n"
+            f"🧠 Testlar: {report.quizzes}\n"
+            f"❓ Savollar: {report.questions}\n"
+            f"⚠️ O'tkazib yuborildi: {report.skipped}\n"
+            f"⏱ Vaqt: {elapsed:.1f} s"
+        )
+        if report.errors:
+            result_text += "\n\n<b>Xatolar:</b>\n" + "\n".join(f"• {html.escape(error)}" for error in report.errors)
+
+        await status.edit_text(
+            result_text,
+            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text="📋 Barcha testlar", callback_data="view_all_quizzes")],
+                [InlineKeyboardButton(text="🧠 Testlar boshqaruvi", callback_data="admin_quiz")]
+            ]),
+            parse_mode="HTML"
+        )
+
+    except Exception as e:
+        print(f"Import quizzes error: {e}")
+        await message.answer("❌ Import paytida xatolik yuz berdi")
+
 # Catch-all for other admin callbacks
 @router.callback_query(F.data.startswith("admin_"))
 async def admin_catch_all(callback: CallbackQuery):
@@ -9,7 +9,8 @@ from aiogram.fsm.state import State, StatesGroup
 from typing import cast
 
 from config import DATABASE_PATH, ADMIN_ID
-from database import get_user
+from database import get_user, is_effectively_premium, delete_content as db_delete_content
+from utils.media_batch import send_all, sendable
 
 router = Router()
 
@@ -74,6 +75,20 @@ async def get_content_by_subsection(subsection_id: int):
         print(f"Get content by subsection error: {e}")
         return []
 
+async def get_direct_content_by_section(section_id: int):
+    """Pastki bo'limga kirmagan bo'lim kontentini olish"""
+    try:
+        async with aiosqlite.connect(DATABASE_PATH) as db:
+            cursor = await db.execute("""
+                SELECT id, title, description, content_type, file_id, file_path, 
+                       content_text, is_premium FROM content 
+                WHERE section_id = ? AND subsection_id = 0 ORDER BY created_at DESC
+            """, (section_id,))
+            return await cursor.fetchall()
+    except Exception as e:
+        print(f"Get direct content by section error: {e}")
+        return []
+
 async def get_content_by_id(content_id: int):
     """ID bo'yicha kontentni olish"""
     try:
@@ -91,10 +106,7 @@ async def get_content_by_id(content_id: int):
 async def delete_content(content_id: int):
     """Kontentni o'chirish"""
     try:
-        async with aiosqlite.connect(DATABASE_PATH) as db:
-            await db.execute("DELETE FROM content WHERE id = ?", (content_id,))
-            await db.commit()
-            return True
+        return await db_delete_content(content_id)
     except Exception as e:
         print(f"Delete content error: {e}")
         return False
@@ -388,7 +400,8 @@ async def user_subsection_view(callback: CallbackQuery):
         # Pastki bo'lim ma'lumotlarini olish
         async with aiosqlite.connect(DATABASE_PATH) as db:
             cursor = await db.execute("""
-                SELECT s.id, s.name, s.description, sec.name as section_name
+                SELECT s.id, s.name, s.description, sec.name as section_name,
+                       COALESCE(s.is_premium, 0) OR COALESCE(sec.is_premium, 0)
                 FROM subsections s
                 JOIN sections sec ON s.section_id = sec.id
                 WHERE s.id = ?
@@ -399,6 +412,11 @@ async def user_subsection_view(callback: CallbackQuery):
             await callback.answer("❌ Pastki bo'lim topilmadi!", show_alert=True)
             return
         
+        # Premium bo'lim tekshiruvi (tugma eski xabarda yoki qidiruvda qolgan bo'lishi mumkin)
+        if subsection[4] and not is_premium:
+            await callback.answer("🔒 Premium bo'lim!", show_alert=True)
+            return
+        
         # Kontent olish
         content_list = await get_content_by_subsection(subsection_id)
         
@@ -436,6 +454,11 @@ async def user_subsection_view(callback: CallbackQuery):
                 subsection_text += f"\n\n💎 <b>Premium kontentlar:</b> {premium_content_count} ta\n"
                 subsection_text += "Premium obuna uchun /premium buyrug'idan foydalaning"
         
+        visible = [c for c in content_list if is_premium or not c[7]]
+        send_all_count = len([c for c in visible if sendable(c)])
+        if send_all_count > 1:
+            keyboard.append([InlineKeyboardButton(text=f"📦 Hammasini yuborish ({send_all_count})", callback_data=f"send_all_sub_{subsection_id}")])
+        
         keyboard.append([InlineKeyboardButton(text="🔙 Bo'limga qaytish", callback_data=f"user_section_{subsection[0]}")])
         
         message = cast(Message, callback.message)
@@ -486,6 +509,11 @@ async def view_content(callback: CallbackQuery):
             await callback.answer("💎 Bu premium kontent! /premium buyrug'i orqali obuna bo'ling", show_alert=True)
             return
         
+        # Premium bo'lim ichidagi kontent ham premium
+        if not is_premium and await is_effectively_premium("content", content_id):
+            await callback.answer("🔒 Premium bo'lim!", show_alert=True)
+            return
+        
         # Send content based on type
         try:
             if content_type == "text" and text_content:
@@ -540,6 +568,77 @@ async def view_content(callback: CallbackQuery):
         except:
             pass
 
+@router.callback_query(F.data.startswith("send_all_"))
+async def send_all_content(callback: CallbackQuery):
+    """Bo'lim yoki pastki bo'lim kontentini albomlar bilan yuborish"""
+    try:
+        if not callback.data or not callback.message or not callback.from_user:
+            await callback.answer("❌ Xatolik!", show_alert=True)
+            return
+        scope = callback.data.split("_")[2]
+        target_id = int(callback.data.split("_")[-1])
+        
+        user_id = callback.from_user.id
+        user = await get_user(user_id)
+        is_premium = user[8] if user and len(user) > 8 else False
+        
+        # Premium bo'lim tekshiruvi (tugma eski xabarda qolgan bo'lishi mumkin)
+        async with aiosqlite.connect(DATABASE_PATH) as db:
+            if scope == "sub":
+                cursor = await db.execute("""
+                    SELECT sec.is_premium FROM subsections s
+                    JOIN sections sec ON s.section_id = sec.id
+                    WHERE s.id = ?
+                """, (target_id,))
+            else:
+                cursor = await db.execute("SELECT is_premium FROM sections WHERE id = ?", (target_id,))
+            section = await cursor.fetchone()
+        
+        if not section:
+            await callback.answer("❌ Bo'lim topilmadi!", show_alert=True)
+            return
+        if section[0] and not is_premium:
+            await callback.answer("🔒 Premium bo'lim!", show_alert=True)
+            return
+        
+        if scope == "sub":
+            content_list = await get_content_by_subsection(target_id)
+        else:
+            content_list = await get_direct_content_by_section(target_id)
+        rows = [c for c in content_list if (is_premium or not c[7]) and sendable(c)]
+        
+        if not rows:
+            await callback.answer("📭 Yuboriladigan kontent yo'q", show_alert=True)
+            return
+        
+        # Albomlar bir necha soniya oladi - tugmadagi "soat"ni darhol to'xtatamiz
+        await callback.answer(f"⏳ {len(rows)} ta kontent yuborilmoqda...")
+        
+        try:
+            sent, calls, skipped = await send_all(callback.bot, callback.message.chat.id, rows)
+            print(f"[MEDIA] Sent {sent} items in {calls} calls to {user_id}, skipped {skipped}")
+        except Exception as send_error:
+            print(f"Send all content error: {send_error}")
+            await callback.message.answer("❌ Kontentni yuborishda xatolik!")
+            return
+        
+        if skipped:
+            await callback.message.answer(
+                f"⚠️ {skipped} ta kontentni yuborib bo'lmadi" + (f", qolgan {sent} tasi yuborildi" if sent else "")
+            )
+        if not sent:
+            return
+        
+        from utils.rating_system import update_user_rating
+        await update_user_rating(user_id, 'content_view')
+        
+    except Exception as e:
+        print(f"Send all content error: {e}")
+        try:
+            await callback.answer("❌ Xatolik!", show_alert=True)
+        except:
+            pass
+
 # =====================
 # ADMIN CONTENT MANAGEMENT
 # =====================
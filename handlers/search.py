@@ -0,0 +1,220 @@
+"""
+Qidiruv - /search buyrug'i, inline rejim va /lugat (koreyscha lug'at)
+"""
+import html
+
+import aiosqlite
+from aiogram import Router, F
+from aiogram.filters import Command, CommandObject
+from aiogram.types import (
+    Message, CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, InlineQuery,
+    InlineQueryResultArticle, InlineQueryResultsButton, InputTextMessageContent
+)
+
+from config import DATABASE_PATH, ADMIN_ID
+from database import is_premium_active
+from utils.ai_conversation_advanced import get_korean_ai
+from utils.hangul_index import is_hangul
+from utils.media_batch import send_item, sendable
+from utils.search import search
+
+router = Router()
+
+SEARCH_USAGE = """🔎 <b>Qidiruv</b>
+
+Darslar, bo'limlar va testlarni nomi yoki matni bo'yicha toping:
+
+<code>/search salomlashish</code>
+<code>/search 학교</code>
+
+💡 Istalgan chatda <code>@bot_nomi so'z</code> yozib ham qidirish mumkin."""
+LUGAT_USAGE = """📖 <b>Koreyscha lug'at</b>
+
+So'zni istalgan shaklda yozing - lug'atdagi asosiy shaklini topaman:
+
+<code>/lugat 공부했어요</code> → 공부하다
+<code>/lugat 학교에서</code> → 학교
+<code>/lugat 핟교</code> → 학교 (xato bilan yozilsa ham)
+<code>/lugat 김ㅊ</code> → 김치, 김치찌개 ..."""
+CATEGORY_NAMES = {
+    "greetings": "Salomlashish",
+    "family": "Oila va kasblar",
+    "food": "Ovqat",
+    "education": "Ta'lim",
+    "colors_numbers": "Ranglar va sonlar",
+    "time_weather": "Vaqt va ob-havo",
+}
+RESULT_LIMIT = 10
+LUGAT_LIMIT = 10
+INLINE_LIMIT = 20
+INLINE_CACHE_TIME = 60
+
+def _shorten(text: str, length: int) -> str:
+    return text if len(text) <= length else text[:length - 1] + "…"
+
+async def _can_see_premium(user_id: int) -> bool:
+    return user_id == ADMIN_ID or await is_premium_active(user_id)
+
+# =====================
+# /search
+# =====================
+
+@router.message(Command("search"))
+async def search_command(message: Message, command: CommandObject):
+    """Kontent, bo'lim va testlar bo'yicha qidiruv"""
+    try:
+        if not message.from_user:
+            return
+        query = (command.args or "").strip()
+        if not query:
+            await message.answer(SEARCH_USAGE, parse_mode="HTML")
+            return
+
+        results, hidden = await search(query, await _can_see_premium(message.from_user.id), RESULT_LIMIT)
+
+        text = f"🔎 <b>{html.escape(_shorten(query, 50))}</b> bo'yicha natijalar:\n\n"
+        keyboard = []
+        if results:
+            for index, result in enumerate(results, 1):
+                text += f"{index}. {result.icon} <b>{html.escape(result.title)}</b>\n"
+                if result.snippet:
+                    text += f"   <i>{html.escape(_shorten(result.snippet, 90))}</i>\n"
+                keyboard.append([InlineKeyboardButton(
+                    text=f"{index}. {result.icon} {_shorten(result.title, 40)}",
+                    callback_data=result.callback_data
+                )])
+        else:
+            text += "📭 Hech narsa topilmadi. Boshqa so'z bilan urinib ko'ring."
+
+        if hidden:
+            text += f"\n💎 Yana {hidden} ta premium natija bor - /premium"
+
+        keyboard.append([InlineKeyboardButton(text="🏠 Bosh menyu", callback_data="main_menu")])
+        await message.answer(
+            text,
+            reply_markup=InlineKeyboardMarkup(inline_keyboard=keyboard),
+            parse_mode="HTML"
+        )
+
+    except Exception as e:
+        print(f"Search command error: {e}")
+        await message.answer("❌ Qidiruvda xatolik yuz berdi")
+
+@router.callback_query(F.data.startswith("search_premium_"))
+async def search_premium_content(callback: CallbackQuery):
+    """Qidiruvda topilgan premium kontentni yuborish"""
+    try:
+        if not callback.data or not callback.message or not callback.from_user:
+            await callback.answer("❌ Xatolik!", show_alert=True)
+            return
+        content_id = int(callback.data.split("_")[-1])
+
+        if not await _can_see_premium(callback.from_user.id):
+            await callback.answer("💎 Bu premium kontent! /premium buyrug'i orqali obuna bo'ling", show_alert=True)
+            return
+
+        async with aiosqlite.connect(DATABASE_PATH) as db:
+            cursor = await db.execute("""
+                SELECT id, title, description, file_type, file_id, NULL, content_text, 1
+                FROM premium_content WHERE id = ?
+            """, (content_id,))
+            row = await cursor.fetchone()
+
+        if not row or not sendable(row):
+            await callback.answer("❌ Kontent mavjud emas!", show_alert=True)
+            return
+
+        await send_item(callback.bot, callback.message.chat.id, row)
+        await callback.answer("✅ Kontent yuborildi!")
+
+    except Exception as e:
+        print(f"Search premium content error: {e}")
+        try:
+            await callback.answer("❌ Xatolik!", show_alert=True)
+        except:
+            pass
+
+# =====================
+# LUG'AT
+# =====================
+
+def _format_entries(entries) -> str:
+    return ", ".join(
+        f"{html.escape(word)} <i>({CATEGORY_NAMES.get(category, category)})</i>" for word, category in entries
+    )
+
+@router.message(Command("lugat"))
+async def lugat_command(message: Message, command: CommandObject):
+    """Koreyscha so'zni lug'atdan qidirish: o'zak, prefiks va 1 harf xatosi"""
+    try:
+        word = (command.args or "").strip().split(" ")[0]
+        if not word or not (is_hangul(word) or any("ㄱ" <= char <= "ㅣ" for char in word)):
+            await message.answer(LUGAT_USAGE, parse_mode="HTML")
+            return
+
+        index = get_korean_ai().vocabulary_index()
+        exact = index.lookup(word)
+        shown = {entry[0] for entry in exact}
+        starting = [entry for entry in index.prefix(word, LUGAT_LIMIT + len(exact)) if entry[0] not in shown]
+        shown.update(entry[0] for entry in starting)
+        similar = [entry for entry in index.fuzzy(word) if entry[0] not in shown] if not exact else []
+
+        text = f"📖 <b>{html.escape(word)}</b>\n\n"
+        if exact:
+            text += f"✅ Lug'at shakli: {_format_entries(exact)}\n"
+        if starting:
+            text += f"🔤 Shu bilan boshlanadi: {_format_entries(starting[:LUGAT_LIMIT])}\n"
+        if similar:
+            text += f"🔍 Balki shuni nazarda tutgansiz: {_format_entries(similar[:LUGAT_LIMIT])}\n"
+        if not (exact or starting or similar):
+            text += "📭 Lug'atda topilmadi"
+
+        await message.answer(text, parse_mode="HTML")
+
+    except Exception as e:
+        print(f"Lugat command error: {e}")
+        await message.answer("❌ Lug'atda qidirishda xatolik yuz berdi")
+
+# =====================
+# INLINE MODE
+# =====================
+
+@router.inline_query()
+async def inline_search(inline_query: InlineQuery):
+    """@bot so'z - istalgan chatdan qidiruv"""
+    try:
+        results, _ = await search(
+            inline_query.query, await _can_see_premium(inline_query.from_user.id), INLINE_LIMIT
+        )
+        me = await inline_query.bot.me()
+        open_bot = InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton(text="📚 Botda ochish", url=f"https://t.me/{me.username}?start=search")]
+        ])
+
+        articles = [
+            InlineQueryResultArticle(
+                id=f"{result.kind}_{result.ref_id}",
+                title=f"{result.icon} {result.title}",
+                description=_shorten(result.snippet, 100) or None,
+                input_message_content=InputTextMessageContent(
+                    message_text=(
+                        f"{result.icon} <b>{html.escape(result.title)}</b>\n\n"
+                        f"{html.escape(_shorten(result.snippet, 300))}"
+                    ),
+                    parse_mode="HTML"
+                ),
+                reply_markup=open_bot
+            )
+            for result in results
+        ]
+
+        # Results depend on the user's premium status
+        await inline_query.answer(
+            articles,
+            cache_time=INLINE_CACHE_TIME,
+            is_personal=True,
+            button=InlineQueryResultsButton(text="🔎 Botda qidirish", start_parameter="search")
+        )
+
+    except Exception as e:
+        print(f"Inline search error: {e}")
@@ -9,7 +9,9 @@ from aiogram.fsm.state import State, StatesGroup
 from typing import cast
 
 from config import DATABASE_PATH, ADMIN_ID
-from database import get_user
+from database import get_user, delete_section_tree
+from utils.live_counters import live_counters
+from utils.media_batch import sendable
 
 router = Router()
 
@@ -57,6 +59,7 @@ async def create_section(name: str, description: str, language: str = "korean",
                 VALUES (?, ?, ?, ?, datetime('now'))
             """, (name, description, language, is_premium))
             await db.commit()
+            live_counters.incr('total_sections')
             return cursor.lastrowid
     except Exception as e:
         print(f"Create section error: {e}")
@@ -109,15 +112,9 @@ async def get_subsections(section_id: int):
         return []
 
 async def delete_section(section_id: int):
-    """Bo'limni o'chirish"""
+    """Bo'limni pastki bo'limlari va kontenti bilan o'chirish"""
     try:
-        async with aiosqlite.connect(DATABASE_PATH) as db:
-            # Avval pastki bo'limlarni o'chirish
-            await db.execute("DELETE FROM subsections WHERE section_id = ?", (section_id,))
-            # Keyin bo'limni o'chirish
-            await db.execute("DELETE FROM sections WHERE id = ?", (section_id,))
-            await db.commit()
-            return True
+        return await delete_section_tree(section_id)
     except Exception as e:
         print(f"Delete section error: {e}")
         return False
@@ -642,6 +639,10 @@ async def user_section_view(callback: CallbackQuery):
         elif not direct_content:
             section_text += "📭 Hozircha kontent va pastki bo'limlar yo'q"
         
+        send_all_count = len([c for c in direct_content if (is_premium or not c[7]) and sendable(c)])
+        if send_all_count > 1:
+            keyboard.append([InlineKeyboardButton(text=f"📦 Hammasini yuborish ({send_all_count})", callback_data=f"send_all_sec_{section_id}")])
+        
         keyboard.append([InlineKeyboardButton(text="🔙 Bo'limlar", callback_data="sections")])
         
         message = cast(Message, callback.message)
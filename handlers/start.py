@@ -17,6 +17,7 @@ from database import (
     add_referral, get_user_stats
 )
 from utils.subscription_check import check_subscriptions
+from utils.live_counters import live_counters
 from messages import WELCOME_MESSAGE, SUBSCRIPTION_REQUIRED_MESSAGE
 from keyboards import get_main_menu, get_subscription_keyboard
 
@@ -66,6 +67,7 @@ async def process_new_referral(referrer_id: int, new_user_id: int, new_user_name
                     WHERE user_id = ?
                 """, (premium_expires_at, referrer_id))
                 await db.commit()
+            live_counters.incr('premium_users')
             
             # Send premium notification
             try:
@@ -747,7 +749,7 @@ async def handle_ai_conversation(callback: CallbackQuery):
         return
     
     # Check premium status
-    is_premium = user_stats[4] if len(user_stats) > 4 else False
+    is_premium = user_stats.get('is_premium', False)
     
     if not is_premium:
         try:
@@ -797,47 +799,6 @@ async def handle_ai_conversation(callback: CallbackQuery):
     
     await callback.answer()
 
-# Additional conversation handlers
-@router.callback_query(F.data == "korean_conversation")
-async def handle_korean_conversation(callback: CallbackQuery):
-    if not callback.message or not callback.from_user:
-        await callback.answer("Xatolik!")
-        return
-    
-    await callback.message.edit_text(
-        "🇰🇷 <b>Korean AI Chat</b>\n\n"
-        "안녕하세요! Korean AI bilan suhbatlashishga tayyor!\n\n"
-        "💬 Menga korean tilida yoki o'zbek tilida yozing\n"
-        "🎯 Har xabar uchun +1.5 reyting ball\n"
-        "📚 12,000+ korean so'z lug'ati\n\n"
-        "Suhbatni boshlash uchun biror narsa yozing:",
-        reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="🔙 AI Menyuga", callback_data="ai_conversation")]
-        ]),
-        parse_mode="HTML"
-    )
-    await callback.answer("🇰🇷 Korean AI faollashtirildi!")
-
-@router.callback_query(F.data == "japanese_conversation") 
-async def handle_japanese_conversation(callback: CallbackQuery):
-    if not callback.message or not callback.from_user:
-        await callback.answer("Xatolik!")
-        return
-    
-    await callback.message.edit_text(
-        "🇯🇵 <b>Japanese AI Chat</b>\n\n"
-        "こんにちは! Japanese AI bilan suhbatlashishga tayyor!\n\n"
-        "💬 Menga japanese tilida yoki o'zbek tilida yozing\n"
-        "🎯 Har xabar uchun +1.5 reyting ball\n"
-        "📚 12,000+ japanese so'z lug'ati\n\n"
-        "Suhbatni boshlash uchun biror narsa yozing:",
-        reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="🔙 AI Menyuga", callback_data="ai_conversation")]
-        ]),
-        parse_mode="HTML"
-    )
-    await callback.answer("🇯🇵 Japanese AI faollashtirildi!")
-
 @router.callback_query(F.data == "conversation_tips")
 async def handle_conversation_tips(callback: CallbackQuery):
     if not callback.message or not callback.from_user:
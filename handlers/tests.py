@@ -1,3 +1,5 @@
+import html
+
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.fsm.context import FSMContext
@@ -6,7 +8,16 @@ from typing import cast
 import aiosqlite
 
 from config import ADMIN_ID
-from database import DATABASE_PATH, get_user, create_quiz, add_question, get_quizzes, get_quiz_questions
+from database import (
+    DATABASE_PATH, get_user, create_quiz, add_question, get_quizzes, get_quiz_questions,
+    get_quiz_by_id, is_premium_active, decayed_popularity
+)
+from keyboards import get_quiz_question_keyboard, get_quiz_result_keyboard
+from messages import QUIZ_START_MESSAGE, QUIZ_RESULT_EXCELLENT, QUIZ_RESULT_GOOD, QUIZ_RESULT_POOR
+from utils.quiz_engine import quiz_engine, correct_index, LETTERS
+from utils.srs import next_due_card, record_reviews, get_srs_counts
+from utils.pagination import Paginator
+from utils.rating_system import update_user_rating
 
 router = Router()
 
@@ -45,6 +56,8 @@ async def main_tests_menu(callback: CallbackQuery):
             cursor = await db.execute("SELECT COUNT(*) FROM quizzes WHERE created_by IS NOT NULL")
             total_quizzes = (await cursor.fetchone())[0]
         
+        due_reviews, _ = await get_srs_counts(user_id)
+        
         quiz_text = f"🧠 <b>Testlar bo'limi</b>\n\n"
         quiz_text += f"📊 <b>Statistika:</b>\n"
         quiz_text += f"• Sizning testlaringiz: {my_quizzes}\n"
@@ -55,7 +68,11 @@ async def main_tests_menu(callback: CallbackQuery):
             [InlineKeyboardButton(text="🎯 Testlarni yechish", callback_data="take_quizzes")],
             [InlineKeyboardButton(text="➕ Yangi test yaratish", callback_data="user_create_quiz")],
             [InlineKeyboardButton(text="📋 Mening testlarim", callback_data="my_quizzes")],
-            [InlineKeyboardButton(text="🏆 Top testlar", callback_data="popular_quizzes")]
+            [InlineKeyboardButton(text="🏆 Top testlar", callback_data="popular_quizzes")],
+            [InlineKeyboardButton(
+                text=f"🔁 Takrorlash ({due_reviews})" if due_reviews else "🔁 Takrorlash",
+                callback_data="srs_review"
+            )]
         ]
         
         if is_admin:
@@ -82,28 +99,27 @@ async def main_tests_menu(callback: CallbackQuery):
 # TESTLARNI YECHISH 
 # =====================
 
-@router.callback_query(F.data == "take_quizzes")
+# Newest first by quiz id; idx_quiz_summary_pages covers the filter and the seek
+QUIZ_LIST_PAGES = Paginator(
+    "quizlist", "take_quizzes",
+    columns="s.quiz_id, q.title, q.language, s.created_by, u.first_name, s.question_count, s.attempt_count",
+    source="quiz_summary s JOIN quizzes q ON q.id = s.quiz_id LEFT JOIN users u ON s.created_by = u.user_id",
+    keys=["s.quiz_id"], key_types=[int],
+    where="s.question_count > 0 AND s.created_by IS NOT NULL"
+)
+
+@router.callback_query(QUIZ_LIST_PAGES.filter)
 async def take_quizzes_menu(callback: CallbackQuery):
-    """Testlarni yechish menyusi"""
+    """Testlarni yechish menyusi (sahifalab)"""
     try:
         if not callback.message or not callback.from_user:
             await callback.answer("❌ Xatolik!", show_alert=True)
             return
         
-        # Get all available quizzes with questions
+        # One page of available quizzes with questions
         async with aiosqlite.connect(DATABASE_PATH) as db:
-            cursor = await db.execute("""
-                SELECT q.id, q.title, q.quiz_type, q.created_by, u.first_name, COUNT(qu.id) as question_count
-                FROM quizzes q
-                LEFT JOIN questions qu ON q.id = qu.quiz_id  
-                LEFT JOIN users u ON q.created_by = u.user_id
-                WHERE q.created_by IS NOT NULL
-                GROUP BY q.id
-                HAVING question_count > 0
-                ORDER BY q.created_at DESC
-                LIMIT 20
-            """)
-            quizzes = await cursor.fetchall()
+            page = await QUIZ_LIST_PAGES.fetch(db, callback.data)
+        quizzes = page.rows
         
         if not quizzes:
             message = cast(Message, callback.message)
@@ -119,22 +135,25 @@ async def take_quizzes_menu(callback: CallbackQuery):
             await callback.answer()
             return
         
-        quiz_text = f"🎯 <b>Testlar ({len(quizzes)} ta)</b>\n\n"
+        quiz_text = f"🎯 <b>Testlar{QUIZ_LIST_PAGES.label(page)}</b>\n\n"
         keyboard = []
         
         for quiz in quizzes:
-            quiz_id, title, quiz_type, created_by, creator_name, question_count = quiz
+            quiz_id, title, quiz_type, created_by, creator_name, question_count, attempt_count = quiz
             type_icons = {"korean": "🇰🇷", "japanese": "🇯🇵", "general": "📚", "topik": "📚", "jlpt": "🇯🇵"}
             icon = type_icons.get(quiz_type, "📝")
             
-            quiz_text += f"{icon} <b>{title}</b>\n"
-            quiz_text += f"   👤 {creator_name or 'Nomalum'} | 📊 {question_count} savol\n\n"
+            quiz_text += f"{icon} <b>{html.escape(title)}</b>\n"
+            quiz_text += f"   👤 {creator_name or 'Nomalum'} | 📊 {question_count} savol | 👥 {attempt_count} marta\n\n"
             
             keyboard.append([InlineKeyboardButton(
                 text=f"{icon} {title} ({question_count} savol)", 
                 callback_data=f"start_quiz_{quiz_id}"
             )])
         
+        nav = QUIZ_LIST_PAGES.nav_row(page)
+        if nav:
+            keyboard.append(nav)
         keyboard.append([InlineKeyboardButton(text="🔙 Testlar", callback_data="tests")])
         
         message = cast(Message, callback.message)
@@ -298,8 +317,8 @@ async def user_quiz_description_received(message: Message, state: FSMContext):
             
             await message.answer(
                 f"🎉 <b>{type_names.get(quiz_type, 'Test')} muvaffaqiyatli yaratildi!</b>\n\n"
-                f"📝 <b>Nomi:</b> {title}\n"
-                f"📄 <b>Ta'rifi:</b> {message.text}\n"
+                f"📝 <b>Nomi:</b> {html.escape(title)}\n"
+                f"📄 <b>Ta'rifi:</b> {html.escape(message.text)}\n"
                 f"🆔 <b>Test ID:</b> {quiz_id}\n\n"
                 f"3️⃣ Endi savollar qo'shing:",
                 reply_markup=InlineKeyboardMarkup(inline_keyboard=[
@@ -331,11 +350,10 @@ async def my_quizzes_list(callback: CallbackQuery):
         
         async with aiosqlite.connect(DATABASE_PATH) as db:
             cursor = await db.execute("""
-                SELECT q.id, q.title, q.quiz_type, COUNT(qu.id) as question_count
+                SELECT q.id, q.title, q.language, COALESCE(s.question_count, 0)
                 FROM quizzes q
-                LEFT JOIN questions qu ON q.id = qu.quiz_id
+                LEFT JOIN quiz_summary s ON s.quiz_id = q.id
                 WHERE q.created_by = ?
-                GROUP BY q.id
                 ORDER BY q.created_at DESC
             """, (user_id,))
             my_quizzes = await cursor.fetchall()
@@ -362,7 +380,7 @@ async def my_quizzes_list(callback: CallbackQuery):
             type_icons = {"korean": "🇰🇷", "japanese": "🇯🇵", "general": "📚", "topik": "📚", "jlpt": "🇯🇵"}
             icon = type_icons.get(quiz_type, "📝")
             
-            quiz_text += f"{icon} <b>{title}</b>\n"
+            quiz_text += f"{icon} <b>{html.escape(title)}</b>\n"
             quiz_text += f"   📊 {question_count} ta savol\n\n"
             
             keyboard.append([InlineKeyboardButton(
@@ -400,17 +418,15 @@ async def popular_quizzes_menu(callback: CallbackQuery):
             await callback.answer("❌ Xatolik!", show_alert=True)
             return
         
-        # Get popular quizzes (most questions)
+        # Get popular quizzes (time-decayed attempt score)
         async with aiosqlite.connect(DATABASE_PATH) as db:
             cursor = await db.execute("""
-                SELECT q.id, q.title, q.quiz_type, q.created_by, u.first_name, COUNT(qu.id) as question_count
-                FROM quizzes q
-                LEFT JOIN questions qu ON q.id = qu.quiz_id  
-                LEFT JOIN users u ON q.created_by = u.user_id
-                WHERE q.created_by IS NOT NULL
-                GROUP BY q.id
-                HAVING question_count > 0
-                ORDER BY question_count DESC, q.created_at DESC
+                SELECT s.quiz_id, q.title, q.language, s.created_by, u.first_name, s.question_count, s.popularity
+                FROM quiz_summary s
+                JOIN quizzes q ON q.id = s.quiz_id
+                LEFT JOIN users u ON s.created_by = u.user_id
+                WHERE s.question_count > 0 AND s.created_by IS NOT NULL
+                ORDER BY s.popularity DESC
                 LIMIT 10
             """)
             popular_quizzes = await cursor.fetchall()
@@ -433,13 +449,13 @@ async def popular_quizzes_menu(callback: CallbackQuery):
         keyboard = []
         
         for i, quiz in enumerate(popular_quizzes, 1):
-            quiz_id, title, quiz_type, created_by, creator_name, question_count = quiz
+            quiz_id, title, quiz_type, created_by, creator_name, question_count, popularity = quiz
             type_icons = {"korean": "🇰🇷", "japanese": "🇯🇵", "general": "📚", "topik": "📚", "jlpt": "🇯🇵"}
             icon = type_icons.get(quiz_type, "📝")
             
             medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
-            quiz_text += f"{medal} {icon} <b>{title}</b>\n"
-            quiz_text += f"    👤 {creator_name or 'Nomalum'} | 📊 {question_count} savol\n\n"
+            quiz_text += f"{medal} {icon} <b>{html.escape(title)}</b>\n"
+            quiz_text += f"    👤 {creator_name or 'Nomalum'} | 📊 {question_count} savol | 🔥 {decayed_popularity(popularity):.1f}\n\n"
             
             keyboard.append([InlineKeyboardButton(
                 text=f"{medal} {title} ({question_count} savol)", 
@@ -463,6 +479,361 @@ async def popular_quizzes_menu(callback: CallbackQuery):
         except:
             pass
 
+# =====================
+# TEST YECHISH SESSIYASI
+# =====================
+
+def _render_question(session, feedback: str = ""):
+    """Savol matni va variantlar klaviaturasi"""
+    question = session.current()
+    options = list(zip(LETTERS, question[2]))
+
+    text = feedback
+    text += f"🧠 <b>{html.escape(session.title)}</b>\n"
+    text += f"❓ Savol {session.index + 1}/{session.total}\n\n"
+    text += f"<b>{html.escape(question[1])}</b>"
+    return text, get_quiz_question_keyboard(options, session.index)
+
+def _render_result(session, feedback: str = ""):
+    """Yakuniy natija matni"""
+    percentage = session.percentage()
+    if percentage >= 80:
+        result_message = QUIZ_RESULT_EXCELLENT
+    elif percentage >= 60:
+        result_message = QUIZ_RESULT_GOOD
+    else:
+        result_message = QUIZ_RESULT_POOR
+
+    text = feedback
+    text += f"🏁 <b>{html.escape(session.title)}</b> yakunlandi!\n"
+    text += f"📊 Natija: <b>{session.score}/{session.total}</b> ({percentage:.0f}%)\n"
+    text += result_message
+    return text
+
+def _rating_action(percentage: float) -> str:
+    if percentage >= 80:
+        return 'quiz_excellent'
+    if percentage >= 60:
+        return 'quiz_good'
+    return 'quiz_complete'
+
+async def _open_quiz(callback: CallbackQuery, quiz_id: int):
+    """Test sessiyasini ochish va birinchi savolni ko'rsatish"""
+    user_id = callback.from_user.id
+
+    quiz = await get_quiz_by_id(quiz_id)
+    if not quiz:
+        await callback.answer("❌ Test topilmadi!", show_alert=True)
+        return
+
+    if quiz[5] and user_id != ADMIN_ID and not await is_premium_active(user_id):
+        await callback.answer("💎 Bu test faqat Premium foydalanuvchilar uchun!", show_alert=True)
+        return
+
+    session = await quiz_engine.start(user_id, quiz)
+    if not session:
+        await callback.answer("📭 Bu testda hali savollar yo'q!", show_alert=True)
+        return
+
+    text, keyboard = _render_question(session, QUIZ_START_MESSAGE + "\n")
+    message = cast(Message, callback.message)
+    await message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
+    await callback.answer()
+
+@router.callback_query(F.data.startswith("start_quiz_"))
+async def start_quiz(callback: CallbackQuery):
+    """Testni boshlash"""
+    try:
+        if not callback.message or not callback.from_user or not callback.data:
+            await callback.answer("❌ Xatolik!", show_alert=True)
+            return
+
+        quiz_id = int(callback.data.split("_")[-1])
+        await _open_quiz(callback, quiz_id)
+
+    except Exception as e:
+        print(f"Start quiz error: {e}")
+        try:
+            await callback.answer("❌ Xatolik!", show_alert=True)
+        except:
+            pass
+
+@router.callback_query(F.data.startswith("retake_quiz_"))
+async def retake_quiz(callback: CallbackQuery):
+    """Testni qayta yechish"""
+    try:
+        if not callback.message or not callback.from_user or not callback.data:
+            await callback.answer("❌ Xatolik!", show_alert=True)
+            return
+
+        quiz_id = int(callback.data.split("_")[-1])
+        await _open_quiz(callback, quiz_id)
+
+    except Exception as e:
+        print(f"Retake quiz error: {e}")
+        try:
+            await callback.answer("❌ Xatolik!", show_alert=True)
+        except:
+            pass
+
+@router.callback_query(F.data.startswith("quiz_answer_"))
+async def quiz_answer(callback: CallbackQuery):
+    """Javobni qabul qilish - faqat xotirada, bazaga test oxirida yoziladi"""
+    try:
+        if not callback.message or not callback.from_user or not callback.data:
+            await callback.answer("❌ Xatolik!", show_alert=True)
+            return
+
+        # quiz_answer_{letter}_{index}
+        _, _, letter, index = callback.data.split("_", 3)
+        user_id = callback.from_user.id
+
+        result = quiz_engine.answer(user_id, letter, int(index))
+        if not result:
+            if not quiz_engine.get(user_id):
+                await callback.answer("⌛ Test sessiyasi tugagan. Testni qaytadan boshlang.", show_alert=True)
+            else:
+                await callback.answer()
+            return
+
+        session, is_correct, question = result
+        if is_correct:
+            feedback = "✅ <b>To'g'ri!</b>\n\n"
+        else:
+            correct_letter = LETTERS[question[3]]
+            feedback = f"❌ <b>Noto'g'ri.</b> To'g'ri javob: {correct_letter}) {html.escape(question[2][question[3]])}\n"
+            if question[4]:
+                feedback += f"💡 {html.escape(question[4])}\n"
+            feedback += "\n"
+
+        message = cast(Message, callback.message)
+
+        if not session.finished:
+            text, keyboard = _render_question(session, feedback)
+            await message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
+            await callback.answer("✅ To'g'ri!" if is_correct else "❌ Noto'g'ri")
+            return
+
+        session = await quiz_engine.finish(user_id)
+        await update_user_rating(user_id, _rating_action(session.percentage()))
+
+        await message.edit_text(
+            _render_result(session, feedback),
+            reply_markup=get_quiz_result_keyboard(session.quiz_id, session.language),
+            parse_mode="HTML"
+        )
+        await callback.answer()
+
+    except Exception as e:
+        print(f"Quiz answer error: {e}")
+        try:
+            await callback.answer("❌ Xatolik!", show_alert=True)
+        except:
+            pass
+
+@router.callback_query(F.data.startswith("quiz_review_"))
+async def quiz_review(callback: CallbackQuery):
+    """Oxirgi urinish javoblarini ko'rish"""
+    try:
+        if not callback.message or not callback.from_user or not callback.data:
+            await callback.answer("❌ Xatolik!", show_alert=True)
+            return
+
+        quiz_id = int(callback.data.split("_")[-1])
+        session = quiz_engine.last_result(callback.from_user.id, quiz_id)
+        if not session:
+            await callback.answer("📭 Ko'rish uchun natija topilmadi. Testni qayta yeching.", show_alert=True)
+            return
+
+        review_text = f"📝 <b>{html.escape(session.title)}</b> - javoblar\n\n"
+        for i, question in enumerate(session.questions):
+            choice = session.answers[i]
+            correct = question[3]
+            mark = "✅" if choice == correct else "❌"
+            line = f"{mark} {i + 1}. {html.escape(question[1])}\n"
+            if choice != correct and choice < len(LETTERS):
+                line += f"   Sizning javobingiz: {LETTERS[choice]}) {html.escape(question[2][choice])}\n"
+            line += f"   To'g'ri javob: {LETTERS[correct]}) {html.escape(question[2][correct])}\n\n"
+
+            if len(review_text) + len(line) > 3800:
+                review_text += "..."
+                break
+            review_text += line
+
+        message = cast(Message, callback.message)
+        await message.edit_text(
+            review_text,
+            reply_markup=get_quiz_result_keyboard(session.quiz_id, session.language),
+            parse_mode="HTML"
+        )
+        await callback.answer()
+
+    except Exception as e:
+        print(f"Quiz review error: {e}")
+        try:
+            await callback.answer("❌ Xatolik!", show_alert=True)
+        except:
+            pass
+
+@router.callback_query(F.data == "quiz_stats")
+async def quiz_stats(callback: CallbackQuery):
+    """Foydalanuvchining test statistikasi"""
+    try:
+        if not callback.message or not callback.from_user:
+            await callback.answer("❌ Xatolik!", show_alert=True)
+            return
+
+        user_id = callback.from_user.id
+
+        async with aiosqlite.connect(DATABASE_PATH) as db:
+            cursor = await db.execute("""
+                SELECT COUNT(*), COALESCE(SUM(score), 0), COALESCE(SUM(total_questions), 0),
+                       COALESCE(MAX(score * 100.0 / total_questions), 0)
+                FROM quiz_attempts
+                WHERE user_id = ? AND total_questions > 0
+            """, (user_id,))
+            attempts, total_score, total_questions, best = await cursor.fetchone()
+
+            cursor = await db.execute("""
+                SELECT q.title, a.score, a.total_questions
+                FROM quiz_attempts a
+                LEFT JOIN quizzes q ON a.quiz_id = q.id
+                WHERE a.user_id = ?
+                ORDER BY a.completed_at DESC, a.id DESC
+                LIMIT 5
+            """, (user_id,))
+            recent = await cursor.fetchall()
+
+        average = (total_score / total_questions * 100) if total_questions else 0
+
+        stats_text = f"📊 <b>Test statistikangiz</b>\n\n"
+        stats_text += f"🧠 Yechilgan testlar: {attempts}\n"
+        stats_text += f"✅ To'g'ri javoblar: {total_score}/{total_questions}\n"
+        stats_text += f"📈 O'rtacha natija: {average:.0f}%\n"
+        stats_text += f"🏆 Eng yaxshi natija: {best:.0f}%\n"
+
+        if recent:
+            stats_text += f"\n🕒 <b>Oxirgi urinishlar:</b>\n"
+            for title, score, total in recent:
+                stats_text += f"• {html.escape(title or 'Test')}: {score}/{total}\n"
+
+        message = cast(Message, callback.message)
+        await message.edit_text(
+            stats_text,
+            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text="🎯 Testlarni yechish", callback_data="take_quizzes")],
+                [InlineKeyboardButton(text="🔙 Testlar", callback_data="tests")]
+            ]),
+            parse_mode="HTML"
+        )
+        await callback.answer()
+
+    except Exception as e:
+        print(f"Quiz stats error: {e}")
+        try:
+            await callback.answer("❌ Xatolik!", show_alert=True)
+        except:
+            pass
+
+# =====================
+# TAKRORLASH (SPACED REPETITION)
+# =====================
+
+async def _show_next_review(callback: CallbackQuery, feedback: str = ""):
+    """Navbatdagi takrorlash kartasini ko'rsatish"""
+    user_id = callback.from_user.id
+    card = await next_due_card(user_id)
+    message = cast(Message, callback.message)
+
+    if not card:
+        due, total = await get_srs_counts(user_id)
+        await message.edit_text(
+            feedback +
+            "🔁 <b>Takrorlash</b>\n\n"
+            "✅ Hozircha takrorlanadigan savollar yo'q!\n"
+            f"📚 Jami kartalar: {total}\n\n"
+            "💡 Testlarni yeching - har bir savol takrorlash ro'yxatiga qo'shiladi.",
+            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text="🎯 Testlarni yechish", callback_data="take_quizzes")],
+                [InlineKeyboardButton(text="🔙 Testlar", callback_data="tests")]
+            ]),
+            parse_mode="HTML"
+        )
+        return
+
+    question_id, question_text, option_a, option_b, option_c, option_d = card[:6]
+    options = zip(LETTERS, (option_a, option_b, option_c, option_d))
+    keyboard = [
+        [InlineKeyboardButton(text=f"{letter}) {option}", callback_data=f"srs_answer_{letter}_{question_id}")]
+        for letter, option in options
+    ]
+    keyboard.append([InlineKeyboardButton(text="🔙 Testlar", callback_data="tests")])
+
+    await message.edit_text(
+        feedback + f"🔁 <b>Takrorlash</b>\n\n<b>{html.escape(question_text)}</b>",
+        reply_markup=InlineKeyboardMarkup(inline_keyboard=keyboard),
+        parse_mode="HTML"
+    )
+
+@router.callback_query(F.data == "srs_review")
+async def srs_review(callback: CallbackQuery):
+    """Takrorlash vaqti kelgan savollar"""
+    try:
+        if not callback.message or not callback.from_user:
+            await callback.answer("❌ Xatolik!", show_alert=True)
+            return
+
+        await _show_next_review(callback)
+        await callback.answer()
+
+    except Exception as e:
+        print(f"SRS review error: {e}")
+        try:
+            await callback.answer("❌ Xatolik!", show_alert=True)
+        except:
+            pass
+
+@router.callback_query(F.data.startswith("srs_answer_"))
+async def srs_answer(callback: CallbackQuery):
+    """Takrorlash javobini SM-2 bo'yicha baholash"""
+    try:
+        if not callback.message or not callback.from_user or not callback.data:
+            await callback.answer("❌ Xatolik!", show_alert=True)
+            return
+
+        # srs_answer_{letter}_{question_id}
+        _, _, letter, question_id = callback.data.split("_", 3)
+        question_id = int(question_id)
+        user_id = callback.from_user.id
+
+        card = await next_due_card(user_id)
+        if not card or card[0] != question_id:
+            # Duplicate tap on an already reviewed card
+            await callback.answer()
+            return
+
+        correct = correct_index(card[6])
+        is_correct = letter.upper() == LETTERS[correct]
+        await record_reviews(user_id, [(question_id, is_correct)])
+
+        if is_correct:
+            feedback = "✅ <b>To'g'ri!</b>\n\n"
+        else:
+            feedback = f"❌ <b>Noto'g'ri.</b> To'g'ri javob: {LETTERS[correct]}) {html.escape(card[2 + correct])}\n"
+            if card[7]:
+                feedback += f"💡 {html.escape(card[7])}\n"
+            feedback += "\n"
+
+        await _show_next_review(callback, feedback)
+        await callback.answer("✅ To'g'ri!" if is_correct else "❌ Noto'g'ri")
+
+    except Exception as e:
+        print(f"SRS answer error: {e}")
+        try:
+            await callback.answer("❌ Xatolik!", show_alert=True)
+        except:
+            pass
+
 # =====================
 # ADMIN PANEL
 # =====================
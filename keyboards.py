@@ -533,7 +533,7 @@ def get_quiz_result_keyboard(quiz_id, language):
             InlineKeyboardButton(text="📊 Statistikam", callback_data="quiz_stats")
         ],
         [
-            InlineKeyboardButton(text="🔙 Testlar", callback_data=f"back_to_quizzes_{language}")
+            InlineKeyboardButton(text="🔙 Testlar", callback_data="take_quizzes")
         ]
     ]
     return InlineKeyboardMarkup(inline_keyboard=buttons)
@@ -1,15 +1,40 @@
+import time
+
+# Taken before the heavy imports so --measure-startup can report them
+_PROCESS_STARTED = time.perf_counter()
+
+import argparse
 import asyncio
+from contextlib import contextmanager, suppress
+from typing import Any, Awaitable, Callable, Optional
+import hashlib
 import logging
+import re
+from aiohttp import web
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.base import BaseSession
 from aiogram.enums import ParseMode
 from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
 
-from config import BOT_TOKEN
+from config import (
+    BOT_TOKEN, BOT_MODE, WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBAPP_HOST, WEBAPP_PORT,
+    FSM_STORAGE, BOT_WORKERS, METRICS_HOST, METRICS_PORT, DB_INSTRUMENTATION
+)
 from database import init_db
-from handlers import start, admin, content, sections, tests
-from handlers import ai_conversation
-from utils.scheduler import start_scheduler
+from utils.scheduler import start_scheduler, stop_scheduler
+from utils import db_instrumentation
+from utils.live_counters import live_counters
+from utils.metrics import handler_metrics
+from utils.sqlite_storage import SQLiteStorage
+from utils.sharding import ShardSupervisor
+from utils.shutdown import shutdown_coordinator
+from utils.throttling import throttle
+from utils.coalescing import callback_coalescer
+from utils.edit_dedup import edit_dedup
+
+_IMPORTS_DONE = time.perf_counter()
 
 # Bot versiya: 2.1.0 - Production Ready (2025-07-29)
 # Configure logging
@@ -19,59 +44,294 @@ logger = logging.getLogger(__name__)
 # Global bot instance for other modules to use
 bot = None
 
-async def cleanup_webhook_before_start():
+class StartupTimer:
+    """Collects per-phase startup durations for --measure-startup"""
+    
+    def __init__(self):
+        self.phases = [("imports", _IMPORTS_DONE - _PROCESS_STARTED)]
+    
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+    
+    def report(self):
+        print("\n⏱  Startup breakdown:")
+        for name, elapsed in self.phases:
+            print(f"   {name:<18} {elapsed * 1000:8.1f} ms")
+        print(f"   {'ready (total)':<18} {(time.perf_counter() - _PROCESS_STARTED) * 1000:8.1f} ms")
+
+async def cleanup_webhook_before_start(bot: Bot):
     """Clean up any existing webhook before starting polling"""
     try:
-        temp_bot = Bot(token=BOT_TOKEN)
-        await temp_bot.delete_webhook(drop_pending_updates=True)
+        await bot.delete_webhook(drop_pending_updates=True)
         print("✅ Webhook cleaned up successfully")
-        await temp_bot.session.close()
     except Exception as e:
         print(f"⚠️  Webhook cleanup warning: {e}")
 
-async def main():
+async def prepare_database(timer: StartupTimer):
+    """Schema setup, then the live admin counters that read it"""
+    with timer.phase("database"):
+        await init_db()
+        print("✅ Database initialized successfully")
+    if BOT_WORKERS == 1:
+        # Load live admin counters once; DB write paths keep them current
+        with timer.phase("live counters"):
+            await live_counters.load()
+
+async def prepare_telegram(bot: Bot, timer: StartupTimer, measure_startup: bool):
+    """First Telegram round trips over the bot's own session"""
+    with timer.phase("telegram"):
+        if BOT_MODE != "webhook" and not measure_startup:
+            # Clean up webhook first to avoid conflicts with polling
+            await cleanup_webhook_before_start(bot)
+        try:
+            # Cached on the bot, so polling starts without its own getMe
+            await bot.me()
+        except Exception as e:
+            print(f"⚠️  getMe warning: {e}")
+
+def import_handlers():
+    """Load the handler modules (routers, keyboards and their dependencies)"""
+    import handlers.start, handlers.admin, handlers.content, handlers.sections, handlers.tests
+    import handlers.ai_conversation, handlers.search
+
+async def prepare_handlers(timer: StartupTimer):
+    """Handler imports in a worker thread so the event loop keeps serving startup I/O"""
+    with timer.phase("handler imports"):
+        # Import code holds the GIL in bursts; the loop still gets its turns
+        await asyncio.to_thread(import_handlers)
+
+def create_bot(session: Optional[BaseSession] = None) -> Bot:
+    """Bot instance with the project defaults"""
+    bot = Bot(
+        token=BOT_TOKEN,
+        session=session,
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML)
+    )
+    # Unchanged edit_text/edit_reply_markup calls never reach the API
+    edit_dedup.setup(bot)
+    return bot
+
+def create_dispatcher() -> Dispatcher:
+    """Dispatcher with FSM storage and all routers registered"""
+    # Already loaded by prepare_handlers() when started from main()
+    from handlers import start, admin, content, sections, tests
+    from handlers import ai_conversation, search
+    
+    # FSM states survive restarts with the SQLite storage
+    storage = MemoryStorage() if FSM_STORAGE == "memory" else SQLiteStorage()
+    dp = Dispatcher(storage=storage)
+    # Count running handlers so shutdown can wait for them
+    dp.update.outer_middleware(shutdown_coordinator.track_update)
+    # Latency histograms per handler and callback prefix
+    handler_metrics.setup(dp)
+    # Double taps share one handler run and do not spend throttle tokens
+    callback_coalescer.setup(dp)
+    # Per-user token buckets keep button floods away from the database
+    throttle.setup(dp)
+    
+    dp.include_router(start.router)
+    dp.include_router(admin.router)
+    dp.include_router(content.router)
+    dp.include_router(sections.router)
+    dp.include_router(tests.router)
+    dp.include_router(search.router)
+    dp.include_router(ai_conversation.router)
+    return dp
+
+async def start_metrics_server(port: int = METRICS_PORT):
+    """Local /metrics endpoint; a busy port only disables metrics export"""
+    if not port:
+        return
+    try:
+        await handler_metrics.start_server(METRICS_HOST, port)
+    except OSError as e:
+        print(f"⚠️  Metrics server not started: {e}")
+
+def get_webhook_secret() -> str:
+    """Secret token for X-Telegram-Bot-Api-Secret-Token (only A-Z, a-z, 0-9, _ and - allowed)"""
+    if WEBHOOK_SECRET and re.fullmatch(r"[A-Za-z0-9_-]{1,256}", WEBHOOK_SECRET):
+        return WEBHOOK_SECRET
+    # Derive a stable token so every worker behind the same URL agrees on it
+    return hashlib.sha256((WEBHOOK_SECRET or BOT_TOKEN).encode()).hexdigest()
+
+async def shutdown_bot(bot: Bot, dp: Dispatcher, stop_intake: Optional[Callable[[], Awaitable[Any]]] = None):
+    """Stop intake, drain handlers and jobs, then close scheduler, storage and HTTP session"""
+    await shutdown_coordinator.run([
+        ("stop intake", stop_intake) if stop_intake else None,
+        ("drain handlers", shutdown_coordinator.drain_handlers),
+        ("drain jobs", shutdown_coordinator.drain_jobs),
+        ("scheduler", stop_scheduler),
+        # SQLiteStorage flushes pending FSM writes and closes its connection
+        ("fsm storage", dp.storage.close),
+        ("bot session", bot.session.close),
+    ])
+
+async def health_check(request: web.Request) -> web.Response:
+    """Health endpoint for the hosting platform"""
+    return web.Response(text="OK")
+
+async def run_webhook(bot: Bot, dp: Dispatcher):
+    """Serve updates through an aiohttp webhook instead of long polling"""
+    if not WEBHOOK_URL:
+        raise RuntimeError("BOT_MODE=webhook requires WEBHOOK_URL (or RENDER_EXTERNAL_URL)")
+    
+    secret = get_webhook_secret()
+    app = web.Application()
+    app.router.add_get("/", health_check)
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=secret).register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=WEBAPP_HOST, port=WEBAPP_PORT)
+    await site.start()
+    print(f"🌐 Webhook server listening on {WEBAPP_HOST}:{WEBAPP_PORT}{WEBHOOK_PATH}")
+    
+    await bot.set_webhook(
+        f"{WEBHOOK_URL}{WEBHOOK_PATH}",
+        secret_token=secret,
+        allowed_updates=dp.resolve_used_update_types()
+    )
+    print(f"✅ Webhook set: {WEBHOOK_URL}{WEBHOOK_PATH}")
+    logger.info("Bot started (webhook)")
+    
+    async def stop_intake():
+        for site in list(runner.sites):
+            await site.stop()
+    
+    try:
+        await shutdown_coordinator.wait()
+    finally:
+        await shutdown_bot(bot, dp, stop_intake)
+        await runner.cleanup()
+
+async def run_polling(bot: Bot, dp: Dispatcher):
+    """Long polling until SIGTERM/SIGINT, then the graceful shutdown sequence"""
+    logger.info("Bot started")
+    # Signals and session closing are handled by shutdown_bot()
+    polling = asyncio.create_task(
+        dp.start_polling(bot, handle_signals=False, close_bot_session=False)
+    )
+    
+    async def stop_intake():
+        if polling.done():
+            return
+        try:
+            await dp.stop_polling()
+        except RuntimeError:
+            # Signal arrived before polling started
+            polling.cancel()
+    
+    try:
+        await shutdown_coordinator.wait(polling)
+    finally:
+        await shutdown_bot(bot, dp, stop_intake)
+    
+    with suppress(asyncio.CancelledError):
+        await polling
+
+async def run_sharded(bot: Bot, dp: Dispatcher):
+    """Supervisor: receive updates once, handle them in BOT_WORKERS processes"""
+    supervisor = ShardSupervisor(BOT_WORKERS)
+    supervisor.start()
+    monitor = asyncio.create_task(supervisor.monitor())
+    runner = None
+    polling = None
+    
+    async def stop_intake():
+        monitor.cancel()
+        if polling:
+            polling.cancel()
+        if runner:
+            for site in list(runner.sites):
+                await site.stop()
+    
+    async def stop_workers():
+        await supervisor.stop(timeout=shutdown_coordinator.remaining())
+    
+    try:
+        if BOT_MODE == "webhook":
+            if not WEBHOOK_URL:
+                raise RuntimeError("BOT_MODE=webhook requires WEBHOOK_URL (or RENDER_EXTERNAL_URL)")
+            secret = get_webhook_secret()
+            runner = web.AppRunner(supervisor.webhook_app(WEBHOOK_PATH, secret))
+            await runner.setup()
+            await web.TCPSite(runner, host=WEBAPP_HOST, port=WEBAPP_PORT).start()
+            await bot.set_webhook(
+                f"{WEBHOOK_URL}{WEBHOOK_PATH}",
+                secret_token=secret,
+                allowed_updates=dp.resolve_used_update_types()
+            )
+            print(f"✅ Webhook set: {WEBHOOK_URL}{WEBHOOK_PATH} ({BOT_WORKERS} workers)")
+            await shutdown_coordinator.wait()
+        else:
+            print(f"🎯 Polling with {BOT_WORKERS} workers")
+            polling = asyncio.create_task(supervisor.run_polling(bot, dp.resolve_used_update_types()))
+            await shutdown_coordinator.wait(polling)
+    finally:
+        # Workers drain their own handlers and jobs once they get the stop marker
+        await shutdown_coordinator.run([
+            ("stop intake", stop_intake),
+            ("workers", stop_workers),
+            ("bot session", bot.session.close),
+        ])
+        if runner:
+            await runner.cleanup()
+
+async def main(measure_startup: bool = False):
     global bot
+    timer = StartupTimer()
     
     try:
-        print("🚀 Starting Korean Language Bot...")
+        print(f"🚀 Starting Korean Language Bot ({BOT_MODE} mode)...")
+        # SIGTERM (Render redeploy) / SIGINT start the graceful shutdown
+        shutdown_coordinator.install_signal_handlers()
         
-        # Clean up webhook first to avoid conflicts
-        print("🧹 Cleaning up webhooks...")
-        await cleanup_webhook_before_start()
+        if DB_INSTRUMENTATION:
+            # Time every SQL statement from the very first one
+            db_instrumentation.install()
         
-        # Initialize database with error handling
-        print("📊 Initializing database...")
-        await init_db()
-        print("✅ Database initialized successfully")
+        bot = create_bot()
         
-        # Initialize bot and dispatcher
-        print("🤖 Initializing bot...")
-        bot = Bot(
-            token=BOT_TOKEN,
-            default=DefaultBotProperties(parse_mode=ParseMode.HTML)
-        )
-        dp = Dispatcher(storage=MemoryStorage())
-        print("✅ Bot initialized")
+        # Database setup, Telegram calls and handler imports are independent: run them together
+        print("📊 Initializing database and connecting to Telegram...")
+        with timer.phase("startup (parallel)"):
+            await asyncio.gather(
+                prepare_database(timer),
+                prepare_telegram(bot, timer, measure_startup),
+                prepare_handlers(timer)
+            )
+        with timer.phase("dispatcher"):
+            dp = create_dispatcher()
+        print("✅ Bot initialized, all handlers registered")
         
-        # Include routers
-        print("🔗 Registering handlers...")
-        dp.include_router(start.router)
-        dp.include_router(admin.router)
-        dp.include_router(content.router)
-        dp.include_router(sections.router)
-        dp.include_router(tests.router)
-        dp.include_router(ai_conversation.router)
-        print("✅ All handlers registered")
+        if measure_startup:
+            timer.report()
+            await shutdown_bot(bot, dp)
+            return
+        
+        if BOT_WORKERS > 1:
+            # Workers run their own dispatchers; worker 0 owns the scheduler
+            await run_sharded(bot, dp)
+            return
         
         # Start scheduler for automated messages
         print("⏰ Starting scheduler...")
         await start_scheduler(bot)
         print("✅ Scheduler started")
         
-        # Start polling
+        await start_metrics_server()
+        
         print("🎯 Bot started successfully!")
-        logger.info("Bot started")
-        await dp.start_polling(bot)
+        if BOT_MODE == "webhook":
+            await run_webhook(bot, dp)
+        else:
+            await run_polling(bot, dp)
         
     except Exception as e:
         logger.error(f"❌ Error starting bot: {e}")
@@ -79,4 +339,10 @@ async def main():
         raise
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Korean Language Bot")
+    parser.add_argument(
+        "--measure-startup", action="store_true",
+        help="print a per-phase startup breakdown and exit without receiving updates"
+    )
+    args = parser.parse_args()
+    asyncio.run(main(measure_startup=args.measure_startup))
@@ -0,0 +1,211 @@
+"""
+init_db on databases created by older versions of the bot.
+
+    python -m unittest discover tests
+"""
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+import database
+
+# Tables as the first release of init_db created them
+BASELINE_SCHEMA = """
+CREATE TABLE users (
+    user_id INTEGER PRIMARY KEY,
+    username TEXT,
+    first_name TEXT,
+    last_name TEXT,
+    is_premium BOOLEAN DEFAULT FALSE,
+    premium_expires_at TIMESTAMP,
+    referral_code TEXT UNIQUE,
+    referred_by INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    total_sessions INTEGER DEFAULT 0,
+    words_learned INTEGER DEFAULT 0,
+    quiz_score_total INTEGER DEFAULT 0,
+    quiz_attempts INTEGER DEFAULT 0,
+    rating_score REAL DEFAULT 0.0,
+    referral_count INTEGER DEFAULT 0
+);
+CREATE TABLE sections (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    description TEXT,
+    language TEXT,
+    is_premium BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_by INTEGER
+);
+CREATE TABLE subsections (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    section_id INTEGER,
+    name TEXT NOT NULL,
+    description TEXT,
+    is_premium BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (section_id) REFERENCES sections (id)
+);
+CREATE TABLE content (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    section_id INTEGER DEFAULT 0,
+    subsection_id INTEGER DEFAULT 0,
+    title TEXT NOT NULL,
+    description TEXT,
+    content_type TEXT,
+    file_id TEXT,
+    file_path TEXT,
+    content_text TEXT,
+    is_premium BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (section_id) REFERENCES sections (id),
+    FOREIGN KEY (subsection_id) REFERENCES subsections (id)
+);
+CREATE TABLE quizzes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    description TEXT,
+    language TEXT,
+    category TEXT,
+    is_premium BOOLEAN DEFAULT FALSE,
+    created_by INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE questions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    quiz_id INTEGER,
+    question_text TEXT NOT NULL,
+    option_a TEXT NOT NULL,
+    option_b TEXT NOT NULL,
+    option_c TEXT NOT NULL,
+    option_d TEXT NOT NULL,
+    correct_answer TEXT NOT NULL,
+    explanation TEXT,
+    FOREIGN KEY (quiz_id) REFERENCES quizzes (id)
+);
+CREATE TABLE quiz_attempts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    quiz_id INTEGER,
+    score INTEGER,
+    total_questions INTEGER,
+    completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (user_id),
+    FOREIGN KEY (quiz_id) REFERENCES quizzes (id)
+);
+CREATE TABLE user_progress (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    content_id INTEGER,
+    completed BOOLEAN DEFAULT FALSE,
+    completed_at TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (user_id),
+    FOREIGN KEY (content_id) REFERENCES content (id)
+);
+CREATE TABLE premium_content (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    section_type TEXT NOT NULL CHECK(section_type IN ('topik1', 'topik2', 'jlpt')),
+    title TEXT NOT NULL,
+    description TEXT,
+    file_id TEXT,
+    file_type TEXT CHECK(file_type IN ('photo', 'video', 'audio', 'document', 'music', 'text')),
+    content_text TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    order_index INTEGER DEFAULT 0
+);
+CREATE TABLE referrals (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    referrer_id INTEGER,
+    referred_id INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (referrer_id) REFERENCES users (user_id),
+    FOREIGN KEY (referred_id) REFERENCES users (user_id)
+);
+"""
+
+
+class BaselineUpgradeTest(unittest.IsolatedAsyncioTestCase):
+    """A baseline database, seeded with sqlite3, then upgraded by init_db"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "baseline.db")
+        with sqlite3.connect(self.path) as db:
+            db.executescript(BASELINE_SCHEMA)
+        patcher = mock.patch.object(database, "DATABASE_PATH", self.path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def seed(self, sql: str, rows) -> None:
+        with sqlite3.connect(self.path) as db:
+            db.executemany(sql, rows)
+
+    def query(self, sql: str, params=()):
+        with sqlite3.connect(self.path) as db:
+            return db.execute(sql, params).fetchall()
+
+    async def test_quiz_popularity_is_seeded_from_past_attempts(self):
+        self.seed("INSERT INTO quizzes (id, title, created_by) VALUES (?, ?, 1)", [(1, "Played"), (2, "Unplayed")])
+        self.seed(
+            "INSERT INTO questions (quiz_id, question_text, option_a, option_b, option_c, option_d, correct_answer) "
+            "VALUES (?, 'q', 'a', 'b', 'c', 'd', 'A')",
+            [(1,), (2,)]
+        )
+        self.seed(
+            "INSERT INTO quiz_attempts (user_id, quiz_id, score, total_questions, completed_at) "
+            "VALUES (?, 1, 1, 1, datetime('now'))",
+            [(user_id,) for user_id in range(5)]
+        )
+
+        await database.init_db()
+
+        rows = dict(
+            (quiz_id, (attempts, popularity)) for quiz_id, attempts, popularity in
+            self.query("SELECT quiz_id, attempt_count, popularity FROM quiz_summary")
+        )
+        attempts, popularity = rows[1]
+        self.assertEqual(attempts, 5)
+        self.assertIsNotNone(popularity)
+        # Five attempts made just now decay to about five
+        self.assertAlmostEqual(database.decayed_popularity(popularity), 5, delta=0.1)
+        self.assertEqual(rows[2], (0, None))
+
+        # A restart keeps the seeded value instead of counting the attempts again
+        await database.init_db()
+        self.assertEqual(self.query("SELECT popularity FROM quiz_summary WHERE quiz_id = 1"), [(popularity,)])
+
+    async def test_catalog_cascades_after_upgrade(self):
+        self.seed("INSERT INTO sections (id, name) VALUES (?, ?)", [(1, "Kept")])
+        # Subsection 3 belongs to a section deleted before the cascades existed
+        self.seed("INSERT INTO subsections (id, section_id, name) VALUES (?, ?, ?)", [(1, 1, "Kept"), (3, 9, "Orphan")])
+        # 0 is the "no section/subsection" sentinel, not an orphan
+        self.seed(
+            "INSERT INTO content (id, section_id, subsection_id, title) VALUES (?, ?, ?, ?)",
+            [(1, 1, 0, "In section"), (2, 0, 1, "In subsection"), (3, 0, 3, "Under orphan")]
+        )
+        # Progress on content 7, deleted earlier, and attempts of an unknown user
+        self.seed("INSERT INTO user_progress (user_id, content_id) VALUES (?, ?)", [(5, 1), (5, 2), (5, 7)])
+        self.seed("INSERT INTO quiz_attempts (user_id, quiz_id, score) VALUES (?, ?, ?)", [(404, 1, 1)])
+
+        await database.init_db()
+
+        self.assertEqual(self.query("PRAGMA user_version"), [(len(database.MIGRATIONS),)])
+        self.assertEqual(self.query("SELECT id FROM subsections ORDER BY id"), [(1,)])
+        self.assertEqual(self.query("SELECT id FROM content ORDER BY id"), [(1,), (2,)])
+        self.assertEqual(self.query("SELECT content_id FROM user_progress ORDER BY content_id"), [(1,), (2,)])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM quiz_attempts"), [(1,)])
+
+        self.assertTrue(await database.delete_content(1))
+        self.assertEqual(self.query("SELECT content_id FROM user_progress"), [(2,)])
+
+        await database.delete_subsection(1)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM content"), [(0,)])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM user_progress"), [(0,)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+"""
+SQLiteStorage: FSM holatlari bazaga yozilishi.
+
+    python -m unittest discover tests
+"""
+import asyncio
+import os
+import tempfile
+import unittest
+
+from aiogram.fsm.storage.base import StorageKey
+
+from utils.sqlite_storage import SQLiteStorage
+
+KEY = StorageKey(bot_id=1, chat_id=42, user_id=42)
+
+
+class CloseTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "fsm.db")
+
+    async def test_close_during_background_flush_keeps_writes(self):
+        storage = SQLiteStorage(self.path, flush_interval=0)
+        db = await storage._connection()
+
+        # Hold the background flush inside its transaction
+        entered = asyncio.Event()
+        release = asyncio.Event()
+        executemany = db.executemany
+
+        async def slow_executemany(*args, **kwargs):
+            entered.set()
+            await release.wait()
+            return await executemany(*args, **kwargs)
+
+        db.executemany = slow_executemany
+        await storage.set_state(KEY, "Form:name")
+        await storage.set_data(KEY, {"name": "Ali"})
+        await asyncio.wait_for(entered.wait(), 1)
+
+        release.set()
+        await storage.close()
+
+        reopened = SQLiteStorage(self.path)
+        self.addAsyncCleanup(reopened.close)
+        self.assertEqual(await reopened.get_state(KEY), "Form:name")
+        self.assertEqual(await reopened.get_data(KEY), {"name": "Ali"})
+
+
+if __name__ == "__main__":
+    unittest.main()
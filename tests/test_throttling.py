@@ -0,0 +1,40 @@
+"""
+UserThrottle: tugma narxlari.
+
+    python -m unittest discover tests
+"""
+import unittest
+
+from aiogram.types import CallbackQuery, User
+
+from handlers.admin import CONTENT_PAGES, PREMIUM_USER_PAGES, QUIZ_PAGES
+from handlers.tests import QUIZ_LIST_PAGES
+from utils.throttling import CALLBACK_COSTS, DEFAULT_COST, UserThrottle
+
+
+def callback(data: str) -> CallbackQuery:
+    return CallbackQuery(
+        id="1", from_user=User(id=42, is_bot=False, first_name="x"), chat_instance="1", data=data
+    )
+
+
+class CostTest(unittest.TestCase):
+    def test_page_tokens_cost_as_much_as_the_listing(self):
+        throttle = UserThrottle(rate=1, burst=10)
+        listing_cost = CALLBACK_COSTS["take_quizzes"]
+        self.assertGreater(listing_cost, DEFAULT_COST)
+
+        for pages in (QUIZ_LIST_PAGES, QUIZ_PAGES, CONTENT_PAGES, PREMIUM_USER_PAGES):
+            for direction, page in (("n", 2), ("p", 1)):
+                # Premium users page by (premium_expires_at, user_id)
+                key = ("2025-01-01 00:00:00", 15) if pages is PREMIUM_USER_PAGES else (15,)
+                data = pages.token(direction, page, key)
+                with self.subTest(data=data):
+                    self.assertEqual(throttle.cost(callback(data)), listing_cost)
+
+    def test_unknown_callbacks_cost_the_default(self):
+        self.assertEqual(UserThrottle(rate=1, burst=10).cost(callback("noop")), DEFAULT_COST)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,6 +8,8 @@ import re
 import asyncio
 from typing import Dict, List, Optional
 
+from utils.hangul_index import HangulIndex
+
 class KoreanAI:
     """Korean AI Teacher - 12,000+ vocabulary advanced understanding"""
     
@@ -56,22 +58,29 @@ class KoreanAI:
             "connectors": ["그리고", "하지만", "그런데", "또한", "예를 들어", "즉", "물론"],
             "expressions": ["것 같다", "듯하다", "려고 하다", "ㄹ 예정이다", "본 적이 있다"]
         }
+        self._index: Optional[HangulIndex] = None
+
+    def vocabulary_index(self) -> HangulIndex:
+        """Jamo index over the vocabulary, built on first use"""
+        if self._index is None:
+            self._index = HangulIndex(self.vocabulary)
+        return self._index
 
     def analyze_sentence(self, message: str) -> dict:
         """Analyze sentence complexity and vocabulary"""
         words = message.split()
         word_count = len(words)
         
-        # Find vocabulary matches
+        # Find vocabulary matches: conjugated forms, particles and one-letter typos
+        # resolve to the dictionary word (공부했어요 -> 공부하다)
         matched_words = []
         categories = []
         
-        for category, vocab_list in self.vocabulary.items():
-            for word in vocab_list:
-                if word in message:
-                    matched_words.append(word)
-                    if category not in categories:
-                        categories.append(category)
+        for word, category in self.vocabulary_index().match_text(message):
+            if word not in matched_words:
+                matched_words.append(word)
+            if category not in categories:
+                categories.append(category)
         
         # Check for advanced grammar patterns
         grammar_patterns = []
@@ -281,16 +290,27 @@ class JapaneseAI:
             return f"'{word}'いい単語ですね！関連語彙: {', '.join(related_words)}. この単語を使って長い例文を作ってみてください！"
 
 
-# Global AI instances
-korean_ai = KoreanAI()
-japanese_ai = JapaneseAI()
+# AI instances are built on first use: the vocabulary tables are only
+# needed once someone opens an AI conversation, not at bot startup
+_korean_ai: Optional[KoreanAI] = None
+_japanese_ai: Optional[JapaneseAI] = None
+
+def get_korean_ai() -> KoreanAI:
+    global _korean_ai
+    if _korean_ai is None:
+        _korean_ai = KoreanAI()
+    return _korean_ai
+
+def get_japanese_ai() -> JapaneseAI:
+    global _japanese_ai
+    if _japanese_ai is None:
+        _japanese_ai = JapaneseAI()
+    return _japanese_ai
 
-def get_korean_response(message: str, user_id: int = 0) -> str:
+async def get_korean_response(message: str, user_id: int = 0) -> str:
     """Get Korean AI response"""
-    import asyncio
-    return asyncio.run(korean_ai.generate_response(message, user_id))
+    return await get_korean_ai().generate_response(message, user_id)
 
-def get_japanese_response(message: str, user_id: int = 0) -> str:
+async def get_japanese_response(message: str, user_id: int = 0) -> str:
     """Get Japanese AI response"""
-    import asyncio
-    return asyncio.run(japanese_ai.generate_response(message, user_id))
\ No newline at end of file
+    return await get_japanese_ai().generate_response(message, user_id)
@@ -0,0 +1,56 @@
+"""
+Savollar bo'yicha javob statistikasi uchun ixcham saqlash.
+
+A/B/C/D tanlovlari bitta INTEGER ustunida 4 ta 15-bitli maydon sifatida
+saqlanadi (SQLite signed 64-bit ichiga sig'adi). Biror maydon to'lib qolsa
+barcha maydonlar va vaqt yig'indisi ikkiga bo'linadi - nisbatlar va o'rtacha
+vaqt saqlanib qoladi.
+"""
+from typing import List, Tuple
+
+LANE_BITS = 15
+LANE_MAX = (1 << LANE_BITS) - 1
+LANES = 4
+
+# Answers slower than this are treated as idle time, not thinking time
+MAX_ANSWER_TIME_MS = 5 * 60 * 1000
+
+
+def unpack_tallies(packed: int) -> List[int]:
+    """Packed integer -> [A, B, C, D] counts"""
+    packed = packed or 0
+    return [(packed >> (LANE_BITS * lane)) & LANE_MAX for lane in range(LANES)]
+
+
+def pack_tallies(tallies: List[int]) -> int:
+    """[A, B, C, D] counts -> packed integer"""
+    packed = 0
+    for lane, count in enumerate(tallies):
+        packed |= (count & LANE_MAX) << (LANE_BITS * lane)
+    return packed
+
+
+def add_answer(packed: int, time_sum_ms: int, choice: int, time_ms: int) -> Tuple[int, int]:
+    """Add one answer; halves every lane (and the time sum) on saturation"""
+    tallies = unpack_tallies(packed)
+    time_sum_ms = time_sum_ms or 0
+
+    if tallies[choice] >= LANE_MAX:
+        tallies = [count >> 1 for count in tallies]
+        time_sum_ms //= 2
+
+    tallies[choice] += 1
+    time_sum_ms += min(max(int(time_ms), 0), MAX_ANSWER_TIME_MS)
+    return pack_tallies(tallies), time_sum_ms
+
+
+def summarize(packed: int, time_sum_ms: int, correct_index: int) -> dict:
+    """Counts, correct rate (%) and mean answer time (s) for display"""
+    tallies = unpack_tallies(packed)
+    total = sum(tallies)
+    return {
+        'tallies': tallies,
+        'total': total,
+        'correct_rate': (tallies[correct_index] / total * 100) if total else 0.0,
+        'mean_time': ((time_sum_ms or 0) / total / 1000) if total else 0.0,
+    }
@@ -0,0 +1,111 @@
+"""
+Takroriy callback so'rovlarni birlashtirish.
+
+Foydalanuvchi tugmani ikki marta bossa, Telegram ikkita callback_query
+yuboradi va ikkala handler ham bir xil ekranni hisoblaydi; ikkinchi
+edit_text "message is not modified" bilan tugaydi. Kalit (foydalanuvchi,
+xabar, callback_data) bo'yicha birinchi so'rov ishlayotgan paytda kelgan
+nusxa uning tugashini kutadi, tugaganidan keyin COALESCE_WINDOW soniya
+ichida kelgani esa darhol tashlanadi. Ikkala holda ham nusxa bo'sh javob
+oladi (tugmadagi "soat" yo'qoladi).
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Tuple, Union
+
+from aiogram import Dispatcher
+from aiogram.types import CallbackQuery, TelegramObject
+
+from config import COALESCE_WINDOW
+
+Handler = Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]]
+Key = Tuple[int, Union[int, str], str]
+
+
+class CallbackCoalescer:
+    """In-flight and just-finished callback queries, keyed by (user, message, data)"""
+
+    def __init__(self, window: float = COALESCE_WINDOW):
+        self.window = window
+        self.in_flight: Dict[Key, "asyncio.Future[Any]"] = {}
+        # Finished keys in completion order; only the head can expire
+        self.recent: "OrderedDict[Key, float]" = OrderedDict()
+        self.awaited = 0
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    def setup(self, dp: Dispatcher) -> None:
+        if self.enabled:
+            dp.callback_query.outer_middleware(self.middleware)
+
+    @staticmethod
+    def key(callback: CallbackQuery) -> Key:
+        if callback.message:
+            message_id: Union[int, str] = callback.message.message_id
+        else:
+            message_id = callback.inline_message_id or ""
+        return callback.from_user.id, message_id, callback.data or ""
+
+    def _prune(self, now: float) -> None:
+        while self.recent:
+            key, finished_at = next(iter(self.recent.items()))
+            if now - finished_at < self.window:
+                return
+            del self.recent[key]
+
+    async def middleware(self, handler: Handler, event: TelegramObject, data: Dict[str, Any]) -> Any:
+        if not isinstance(event, CallbackQuery):
+            return await handler(event, data)
+
+        key = self.key(event)
+        now = time.monotonic()
+        self._prune(now)
+
+        first = self.in_flight.get(key)
+        if first is not None:
+            self.awaited += 1
+            # wait() neither raises the first handler's error nor cancels it
+            await asyncio.wait([first])
+            await self._answer(event)
+            return None
+        if key in self.recent:
+            self.dropped += 1
+            await self._answer(event)
+            return None
+
+        future: "asyncio.Future[Any]" = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = future
+        try:
+            result = await handler(event, data)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Duplicates only wait for the outcome; mark the exception as retrieved
+            future.exception()
+            raise
+        finally:
+            del self.in_flight[key]
+            self.recent[key] = time.monotonic()
+            self.recent.move_to_end(key)
+
+    @staticmethod
+    async def _answer(callback: CallbackQuery) -> None:
+        # A duplicate still needs an answer so the client stops its spinner
+        try:
+            await callback.answer()
+        except Exception:
+            pass
+
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": len(self.in_flight), "awaited": self.awaited, "dropped": self.dropped}
+
+
+callback_coalescer = CallbackCoalescer()
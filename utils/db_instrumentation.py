@@ -0,0 +1,212 @@
+"""
+SQL so'rovlarini o'lchash va sekin so'rovlar logi.
+
+install() aiosqlite Connection/Cursor metodlarini o'raydi: har bir execute
+vaqti o'lchanadi, SQL matni "fingerprint"ga keltiriladi (literallar -> ?,
+IN (?, ?, ...) -> IN (?+), bo'shliqlar bitta) va fingerprint bo'yicha soni,
+umumiy vaqti va p95 yig'iladi. DB_SLOW_QUERY_MS dan sekin so'rovlar
+EXPLAIN QUERY PLAN bilan logga yoziladi. Admin hisobotida umumiy vaqt
+bo'yicha eng og'ir so'rovlar ko'rsatiladi.
+
+Barcha modullar aiosqlite.connect() dan foydalangani uchun alohida ulanish
+funksiyasi shart emas - o'rash jarayon boshida bir marta o'rnatiladi.
+"""
+import re
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import aiosqlite
+from aiosqlite.context import contextmanager
+
+from config import DB_SLOW_QUERY_MS
+
+SAMPLE_SIZE = 512
+MAX_FINGERPRINTS = 1000
+# A slow fingerprint gets its query plan logged at most this often
+PLAN_LOG_INTERVAL = 300
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "REPLACE")
+
+_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r"\s+")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_ROWS = re.compile(r"(\(\?\+\)|\(\?\))(?:\s*,\s*(?:\(\?\+\)|\(\?\)))+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(sql: str) -> str:
+    """Normalize SQL so statements differing only in literals aggregate together"""
+    text = _COMMENT.sub(" ", sql)
+    text = _STRING.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _SPACE.sub(" ", text).strip().rstrip(";")
+    text = _IN_LIST.sub("(?+)", text)
+    return _VALUES_ROWS.sub(r"\1, ...", text)
+
+
+class QueryStats:
+    __slots__ = ("count", "total", "fetch_total", "max", "samples", "plan_logged_at")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.fetch_total = 0.0
+        self.max = 0.0
+        self.samples: Deque[float] = deque(maxlen=SAMPLE_SIZE)
+        self.plan_logged_at = 0.0
+
+    def p95(self) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+class QueryRecorder:
+    """Per-fingerprint aggregates and the slow-query log"""
+
+    def __init__(self, slow_ms: float = DB_SLOW_QUERY_MS):
+        self.slow_seconds = slow_ms / 1000
+        self.stats: Dict[str, QueryStats] = {}
+        self.started_at = time.time()
+        self.installed = False
+
+    def _stats(self, key: str) -> QueryStats:
+        stats = self.stats.get(key)
+        if stats is None:
+            if len(self.stats) >= MAX_FINGERPRINTS:
+                key = "(other)"
+                stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = QueryStats()
+        return stats
+
+    def observe(self, sql: str, elapsed: float) -> QueryStats:
+        stats = self._stats(fingerprint(sql))
+        stats.count += 1
+        stats.total += elapsed
+        stats.samples.append(elapsed)
+        if elapsed > stats.max:
+            stats.max = elapsed
+        return stats
+
+    def observe_fetch(self, sql: str, elapsed: float) -> None:
+        self._stats(fingerprint(sql)).fetch_total += elapsed
+
+    async def log_slow(self, connection: aiosqlite.Connection, sql: str, parameters: Any,
+                       elapsed: float, stats: QueryStats) -> None:
+        print(f"[DB] 🐢 Slow query {elapsed * 1000:.0f} ms: {fingerprint(sql)[:300]}")
+        now = time.time()
+        if now - stats.plan_logged_at < PLAN_LOG_INTERVAL:
+            return
+        if not sql.lstrip().upper().startswith(EXPLAINABLE):
+            return
+        stats.plan_logged_at = now
+        try:
+            rows = await _original["execute_fetchall"](connection, f"EXPLAIN QUERY PLAN {sql}", parameters or [])
+            for row in rows:
+                print(f"[DB]    plan: {row[-1]}")
+        except Exception as e:
+            print(f"[DB]    plan unavailable: {e}")
+
+    def top(self, limit: int = 10) -> List[Tuple[str, QueryStats]]:
+        """Heaviest fingerprints by total time (execute + fetch)"""
+        ranked = sorted(self.stats.items(), key=lambda item: item[1].total + item[1].fetch_total, reverse=True)
+        return ranked[:limit]
+
+    def reset(self) -> None:
+        self.stats.clear()
+        self.started_at = time.time()
+
+
+query_recorder = QueryRecorder()
+
+# =====================
+# aiosqlite wrappers
+# =====================
+
+_original: Dict[str, Any] = {}
+
+
+async def _timed(target: Any, method: str, sql: str, parameters: Any,
+                 explain_parameters: Any = None) -> Any:
+    started = time.perf_counter()
+    result = await _original[method](target, sql, parameters)
+    elapsed = time.perf_counter() - started
+    stats = query_recorder.observe(sql, elapsed)
+    if isinstance(result, aiosqlite.Cursor):
+        # Lets fetch time be attributed to the statement that produced the rows
+        result._instrumented_sql = sql
+    if elapsed >= query_recorder.slow_seconds:
+        connection = target._conn if isinstance(target, aiosqlite.Cursor) else target
+        await query_recorder.log_slow(connection, sql, explain_parameters or parameters, elapsed, stats)
+    return result
+
+
+@contextmanager
+async def _execute(self, sql: str, parameters: Optional[Any] = None):
+    return await _timed(self, "execute", sql, parameters)
+
+
+@contextmanager
+async def _execute_fetchall(self, sql: str, parameters: Optional[Any] = None):
+    return await _timed(self, "execute_fetchall", sql, parameters)
+
+
+@contextmanager
+async def _execute_insert(self, sql: str, parameters: Optional[Any] = None):
+    return await _timed(self, "execute_insert", sql, parameters)
+
+
+@contextmanager
+async def _executemany(self, sql: str, parameters: Any):
+    # Materialize once so the first row can be reused for EXPLAIN
+    rows = parameters if isinstance(parameters, (list, tuple)) else list(parameters)
+    return await _timed(self, "executemany", sql, rows, rows[0] if rows else None)
+
+
+async def _cursor_execute(self, sql: str, parameters: Optional[Any] = None):
+    return await _timed(self, "cursor.execute", sql, parameters)
+
+
+async def _cursor_executemany(self, sql: str, parameters: Any):
+    rows = parameters if isinstance(parameters, (list, tuple)) else list(parameters)
+    return await _timed(self, "cursor.executemany", sql, rows, rows[0] if rows else None)
+
+
+def _timed_fetch(method: str):
+    async def fetch(self, *args):
+        started = time.perf_counter()
+        rows = await _original[method](self, *args)
+        sql = getattr(self, "_instrumented_sql", None)
+        if sql is not None:
+            query_recorder.observe_fetch(sql, time.perf_counter() - started)
+        return rows
+    fetch.__name__ = method.split(".")[-1]
+    return fetch
+
+
+def install() -> None:
+    """Wrap aiosqlite once per process"""
+    if query_recorder.installed:
+        return
+    connection_methods = {
+        "execute": _execute,
+        "execute_fetchall": _execute_fetchall,
+        "execute_insert": _execute_insert,
+        "executemany": _executemany,
+    }
+    for name, wrapper in connection_methods.items():
+        _original[name] = getattr(aiosqlite.Connection, name)
+        setattr(aiosqlite.Connection, name, wrapper)
+    cursor_methods = {"execute": _cursor_execute, "executemany": _cursor_executemany}
+    for name in ("fetchone", "fetchmany", "fetchall"):
+        cursor_methods[name] = _timed_fetch(f"cursor.{name}")
+    for name, wrapper in cursor_methods.items():
+        _original[f"cursor.{name}"] = getattr(aiosqlite.Cursor, name)
+        setattr(aiosqlite.Cursor, name, wrapper)
+    query_recorder.installed = True
+    print(f"[DB] Query instrumentation on (slow > {query_recorder.slow_seconds * 1000:.0f} ms)")
@@ -0,0 +1,120 @@
+"""
+O'zgarmagan xabar tahrirlarini o'tkazib yuborish.
+
+Handlerlar callback.message.edit_text(...) ni har doim chaqiradi; ekran
+o'zgarmagan bo'lsa Telegram "message is not modified" xatosini qaytaradi,
+lekin HTTP so'rov baribir ketadi ("🔄 Yangilash" tugmalari, premium_stats).
+Bot sessiyasining request middleware'i har bir xabar uchun oxirgi
+yuborilgan (matn, klaviatura) izini saqlaydi va bir xil tahrirni API'ga
+yubormasdan True bilan tugatadi; "not modified" xatosi ham shunday
+qaytadi. Handler o'z callback.answer() chaqiruvini odatdagidek qiladi.
+
+Kesh LRU: eng uzoq tahrirlanmagan xabarlar EDIT_CACHE_SIZE dan oshganda
+o'chiriladi. Keshda yo'q xabar shunchaki odatdagidek tahrirlanadi.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple, Union
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import (
+    DeleteMessage, EditMessageCaption, EditMessageMedia, EditMessageReplyMarkup, EditMessageText, TelegramMethod
+)
+
+from config import EDIT_CACHE_SIZE
+
+Key = Tuple[Union[int, str], Union[int, str]]
+# (text fingerprint, markup fingerprint) of what the message currently shows
+Rendered = Tuple[Optional[int], int]
+
+NOT_MODIFIED = "message is not modified"
+
+
+def _key(method: TelegramMethod) -> Optional[Key]:
+    inline_message_id = getattr(method, "inline_message_id", None)
+    if inline_message_id:
+        return "inline", inline_message_id
+    chat_id = getattr(method, "chat_id", None)
+    message_id = getattr(method, "message_id", None)
+    if chat_id is None or message_id is None:
+        return None
+    return chat_id, message_id
+
+
+def _markup_fingerprint(method: TelegramMethod) -> int:
+    markup = getattr(method, "reply_markup", None)
+    return hash(repr(markup))
+
+
+def _text_fingerprint(method: EditMessageText) -> int:
+    # parse_mode may be the bot default sentinel; its repr is stable
+    return hash((method.text, repr(method.parse_mode), repr(method.entities), repr(method.link_preview_options)))
+
+
+class EditDeduplicator:
+    """Last rendered (text, markup) per message, kept in LRU order"""
+
+    def __init__(self, size: int = EDIT_CACHE_SIZE):
+        self.size = size
+        self.rendered: "OrderedDict[Key, Rendered]" = OrderedDict()
+        self.skipped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def setup(self, bot: Bot) -> None:
+        if self.enabled:
+            bot.session.middleware(self)
+
+    def _remember(self, key: Key, rendered: Rendered) -> None:
+        self.rendered[key] = rendered
+        self.rendered.move_to_end(key)
+        while len(self.rendered) > self.size:
+            self.rendered.popitem(last=False)
+
+    def _render(self, method: TelegramMethod, key: Key) -> Optional[Rendered]:
+        """What the message will show after this method, or None if it is not tracked"""
+        if isinstance(method, EditMessageText):
+            return _text_fingerprint(method), _markup_fingerprint(method)
+        if isinstance(method, EditMessageReplyMarkup):
+            current = self.rendered.get(key)
+            return (current[0] if current else None), _markup_fingerprint(method)
+        return None
+
+    async def __call__(self, make_request, bot: Bot, method: TelegramMethod) -> Any:
+        if isinstance(method, (DeleteMessage, EditMessageCaption, EditMessageMedia)):
+            key = _key(method)
+            if key is not None:
+                self.rendered.pop(key, None)
+            return await make_request(bot, method)
+        if not isinstance(method, (EditMessageText, EditMessageReplyMarkup)):
+            return await make_request(bot, method)
+
+        key = _key(method)
+        if key is None:
+            return await make_request(bot, method)
+        rendered = self._render(method, key)
+        current = self.rendered.get(key)
+        if current is not None and current[1] == rendered[1] and rendered[0] in (None, current[0]):
+            self.skipped += 1
+            self.rendered.move_to_end(key)
+            return True
+
+        try:
+            result = await make_request(bot, method)
+        except TelegramBadRequest as e:
+            if NOT_MODIFIED not in str(e):
+                self.rendered.pop(key, None)
+                raise
+            # Telegram already shows exactly this; answer the same way a cache hit would
+            self._remember(key, rendered)
+            return True
+        self._remember(key, rendered)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        return {"cached": len(self.rendered), "skipped": self.skipped}
+
+
+edit_dedup = EditDeduplicator()
@@ -0,0 +1,253 @@
+"""
+Koreys so'z boyligi indeksi (jamo darajasida).
+
+Har bir bo'g'in (가-힣) jamo'larga ajratiladi: 했 -> ㅎ ㅐ ㅆ. Shunda
+qo'shimchalarni olib tashlash va bitta harf xatosini topish harf darajasida
+ishlaydi, butun bo'g'in emas. Indeks bir marta quriladi:
+
+- aniq / o'zak: jamo kaliti -> so'zlar (공부하다 o'zagi 공부하 ham kalit)
+- prefiks: saralangan kalitlar ro'yxati, bisect bilan qidiriladi
+- 1 tahrir masofasi: har bir kalitdan bitta jamo o'chirilgan variantlar
+  (symmetric delete) -> kalitlar
+- n-gram: gapdagi so'z ichidagi 2+ bo'g'inli qismlar aniq kalitlar
+  lug'atidan qidiriladi (김치찌개 ichida 김치)
+
+Gapdagi so'zdan yuklamalar (은/는/을/를/에서 ...) va fe'l qo'shimchalari
+(어요/습니다/었 ...) olib tashlanadi, 해/했 esa 하 ga qaytariladi:
+공부했어요 -> 공부하 -> 공부하다.
+"""
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+SYLLABLE_FIRST = 0xAC00
+SYLLABLE_LAST = 0xD7A3
+LEADS = [chr(0x1100 + index) for index in range(19)]
+VOWELS = [chr(0x1161 + index) for index in range(21)]
+TAILS = [""] + [chr(0x11A8 + index) for index in range(27)]
+# Keyboard (compatibility) consonants typed on their own start the next syllable: 공ㅂ -> 공 + ᄇ
+COMPAT_LEADS = dict(zip("ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ", LEADS))
+
+PARTICLES = [
+    "은", "는", "이", "가", "을", "를", "에", "에서", "에게", "한테", "께", "와", "과", "랑", "이랑",
+    "도", "만", "의", "로", "으로", "부터", "까지", "처럼", "보다", "하고", "요",
+]
+ENDINGS = [
+    "습니다", "어요", "아요", "여요", "었어요", "았어요", "였어요", "어", "아", "고", "지만",
+    "니까", "면", "으면", "서", "어서", "아서", "세요", "으세요", "었다", "았다", "는다", "다",
+    "겠다", "겠어요", "네요", "죠", "지요",
+]
+# Endings that attach to the previous syllable's final consonant: 합니다, 간다
+TAIL_ENDINGS = {"니다": 17, "다": 4}  # ㅂ, ㄴ
+# Contracted 하다 forms: 해 = 하+여, 했 = 하+였
+HA_FORMS = {"해": "하", "했": "하", "하": "하"}
+
+MIN_NGRAM = 2
+MAX_PREFIX_RESULTS = 20
+
+Entry = Tuple[str, str]  # (dictionary word, category)
+
+
+def decompose(text: str) -> str:
+    """Hangul syllables -> conjoining jamo; everything else unchanged"""
+    out = []
+    for char in text:
+        code = ord(char)
+        if SYLLABLE_FIRST <= code <= SYLLABLE_LAST:
+            offset = code - SYLLABLE_FIRST
+            out.append(LEADS[offset // 588])
+            out.append(VOWELS[offset % 588 // 28])
+            out.append(TAILS[offset % 28])
+        else:
+            out.append(COMPAT_LEADS.get(char, char))
+    return "".join(out)
+
+
+def is_hangul(text: str) -> bool:
+    return any(SYLLABLE_FIRST <= ord(char) <= SYLLABLE_LAST for char in text)
+
+
+def _by_length(suffixes: List[str]) -> List[Tuple[int, Set[str]]]:
+    # Longest first, so 에서 is tried before 에
+    lengths = sorted({len(suffix) for suffix in suffixes}, reverse=True)
+    return [(length, {suffix for suffix in suffixes if len(suffix) == length}) for length in lengths]
+
+
+PARTICLE_SETS = _by_length(PARTICLES)
+ENDING_SETS = _by_length(ENDINGS)
+
+
+def _strip_suffix(word: str, suffix_sets: List[Tuple[int, Set[str]]]) -> Optional[str]:
+    for length, suffixes in suffix_sets:
+        if len(word) > length and word[-length:] in suffixes:
+            return word[:-length]
+    return None
+
+
+def _drop_tail(word: str, tail: int) -> Optional[str]:
+    """`word` without the given final consonant on its last syllable, if it has exactly that one"""
+    offset = ord(word[-1]) - SYLLABLE_FIRST
+    if not 0 <= offset <= SYLLABLE_LAST - SYLLABLE_FIRST or offset % 28 != tail:
+        return None
+    return word[:-1] + chr(ord(word[-1]) - tail)
+
+
+def stem_candidates(token: str) -> List[str]:
+    """The token and the shorter forms it may be a conjugation of, most specific first"""
+    candidates = [token]
+    without_particle = _strip_suffix(token, PARTICLE_SETS)
+    if without_particle:
+        candidates.append(without_particle)
+
+    for base in list(candidates):
+        stem = _strip_suffix(base, ENDING_SETS)
+        while stem:
+            candidates.append(stem)
+            stem = _strip_suffix(stem, ENDING_SETS)
+
+    # 합니다 -> 하, 간다 -> 가
+    for base in list(candidates):
+        for ending, tail in TAIL_ENDINGS.items():
+            if len(base) > len(ending) and base.endswith(ending):
+                stem = _drop_tail(base[:-len(ending)], tail)
+                if stem:
+                    candidates.append(stem)
+
+    # 공부했 / 공부해 -> 공부하; 먹었 -> 먹
+    for base in list(candidates):
+        last = base[-1]
+        if last in HA_FORMS and len(base) > 1:
+            candidates.append(base[:-1] + HA_FORMS[last])
+        elif last in ("었", "았", "였") and len(base) > 1:
+            candidates.append(base[:-1])
+
+    seen: Set[str] = set()
+    return [candidate for candidate in candidates if not (candidate in seen or seen.add(candidate))]
+
+
+def _deletions(key: str) -> Set[str]:
+    return {key[:index] + key[index + 1:] for index in range(len(key))}
+
+
+def within_one_edit(a: str, b: str) -> bool:
+    """Levenshtein distance <= 1"""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    index = 0
+    while index < len(a) and a[index] == b[index]:
+        index += 1
+    if len(a) == len(b):
+        return a[index + 1:] == b[index + 1:]
+    return a[index:] == b[index + 1:]
+
+
+class HangulIndex:
+    """Precomputed exact, stem, prefix and edit-distance-1 lookups over a vocabulary"""
+
+    def __init__(self, categories: Dict[str, Iterable[str]]):
+        # Whole syllables decompose one-to-one, so exact and stem lookups skip the jamo step
+        self.exact: Dict[str, List[Entry]] = {}
+        self.phrases: List[Entry] = []
+        for category, words in categories.items():
+            for word in words:
+                if not is_hangul(word):
+                    continue
+                if " " in word:
+                    # Multi-word entries are few; they are matched as substrings
+                    self.phrases.append((word, category))
+                    continue
+                self._add(word, (word, category))
+                if word.endswith("다") and len(word) > 1:
+                    # 공부하다 is also found as 공부하, which conjugated forms reduce to
+                    self._add(word[:-1], (word, category))
+
+        self.jamo: Dict[str, str] = {decompose(key): key for key in self.exact}
+        self.sorted_jamo = sorted(self.jamo)
+        # Nearly every deletion comes from one key, so a lone key is stored as a plain string
+        self.deletes: Dict[str, Union[str, Tuple[str, ...]]] = {}
+        for jamo in self.sorted_jamo:
+            for deleted in _deletions(jamo):
+                present = self.deletes.get(deleted)
+                if present is None:
+                    self.deletes[deleted] = jamo
+                elif isinstance(present, str):
+                    self.deletes[deleted] = (present, jamo)
+                else:
+                    self.deletes[deleted] = present + (jamo,)
+        self.max_syllables = max(map(len, self.exact), default=0)
+
+    def _add(self, key: str, entry: Entry) -> None:
+        entries = self.exact.setdefault(key, [])
+        if entry not in entries:
+            entries.append(entry)
+
+    def lookup(self, word: str) -> List[Entry]:
+        """Dictionary entries for a word or one of its conjugated/particle forms"""
+        for candidate in stem_candidates(word):
+            entries = self.exact.get(candidate)
+            if entries:
+                return entries
+        return []
+
+    def prefix(self, text: str, limit: int = MAX_PREFIX_RESULTS) -> List[Entry]:
+        """Entries whose jamo start with the jamo of `text`; 공ㅂ finds 공부"""
+        key = decompose(text)
+        results: List[Entry] = []
+        position = bisect_left(self.sorted_jamo, key)
+        while position < len(self.sorted_jamo) and self.sorted_jamo[position].startswith(key):
+            for entry in self.exact[self.jamo[self.sorted_jamo[position]]]:
+                if entry not in results:
+                    results.append(entry)
+            position += 1
+            if len(results) >= limit:
+                break
+        return results[:limit]
+
+    def fuzzy(self, word: str) -> List[Entry]:
+        """Entries one jamo insertion, deletion or substitution away"""
+        key = decompose(word)
+        matches: Set[str] = set()
+        for probe in _deletions(key) | {key}:
+            present = self.deletes.get(probe, ())
+            if isinstance(present, str):
+                matches.add(present)
+            else:
+                matches.update(present)
+            if probe in self.jamo:
+                matches.add(probe)
+        results: List[Entry] = []
+        for match in sorted(matches):
+            if match != key and within_one_edit(key, match):
+                for entry in self.exact[self.jamo[match]]:
+                    if entry not in results:
+                        results.append(entry)
+        return results
+
+    def _contained(self, token: str) -> List[Entry]:
+        # Syllable n-grams inside a compound; single syllables only count as whole words
+        found: List[Entry] = []
+        longest = min(len(token) - 1, self.max_syllables)
+        for size in range(longest, MIN_NGRAM - 1, -1):
+            for start in range(len(token) - size + 1):
+                for entry in self.exact.get(token[start:start + size], ()):
+                    if entry not in found:
+                        found.append(entry)
+        return found
+
+    def match_text(self, text: str, fuzzy: bool = True) -> List[Entry]:
+        """Vocabulary entries used in a sentence: multi-word entries, then words in order of appearance"""
+        found: List[Entry] = [entry for entry in self.phrases if entry[0] in text]
+        for token in text.split():
+            token = "".join(char for char in token if SYLLABLE_FIRST <= ord(char) <= SYLLABLE_LAST)
+            if not token:
+                continue
+            entries = self.lookup(token) or self._contained(token)
+            if not entries and fuzzy and len(token) >= MIN_NGRAM:
+                entries = self.fuzzy(token)[:1]
+            for entry in entries:
+                if entry not in found:
+                    found.append(entry)
+        return found
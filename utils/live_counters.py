@@ -0,0 +1,143 @@
+"""
+Admin statistikasi uchun jonli hisoblagichlar.
+
+Hisoblagichlar ishga tushganda bir marta bazadan yuklanadi, keyin esa
+database.py dagi yozish funksiyalari orqali yangilanib boriladi. Davriy
+to'liq qayta sanash (check_drift) xotiradagi qiymatlar bazadan
+uzoqlashib ketmaganini tekshiradi.
+"""
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import aiosqlite
+
+from config import DATABASE_PATH
+
+# Counter name -> full recount query
+COUNTER_QUERIES = {
+    'total_users': "SELECT COUNT(*) FROM users",
+    'premium_users': "SELECT COUNT(*) FROM users WHERE is_premium = 1",
+    'total_sections': "SELECT COUNT(*) FROM sections",
+    'total_quizzes': "SELECT COUNT(*) FROM quizzes",
+}
+
+ACTIVE_WINDOW_SECONDS = 24 * 60 * 60
+
+
+def _parse_timestamp(value) -> Optional[float]:
+    """Convert SQLite CURRENT_TIMESTAMP text (UTC) to epoch seconds"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    # CURRENT_TIMESTAMP is stored in UTC without tz suffix
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class LiveCounters:
+    """In-memory counters kept in sync by the DB write paths"""
+
+    def __init__(self):
+        self.counters: Dict[str, int] = {name: 0 for name in COUNTER_QUERIES}
+        # user_id -> last activity (epoch seconds) for the "active today" number
+        self.last_seen: Dict[int, float] = {}
+        self.loaded = False
+        self.enabled = True
+        self.loaded_at: Optional[float] = None
+        self.last_drift: Dict[str, int] = {}
+
+    async def load(self) -> None:
+        """Load all counters from the database (called once at startup)"""
+        async with aiosqlite.connect(DATABASE_PATH) as db:
+            for name, query in COUNTER_QUERIES.items():
+                cursor = await db.execute(query)
+                result = await cursor.fetchone()
+                self.counters[name] = result[0] if result else 0
+
+            cursor = await db.execute("""
+                SELECT user_id, last_activity FROM users
+                WHERE last_activity > datetime('now', '-1 day')
+            """)
+            rows = await cursor.fetchall()
+
+        now = time.time()
+        self.last_seen = {}
+        for user_id, last_activity in rows:
+            self.last_seen[user_id] = _parse_timestamp(last_activity) or now
+
+        self.loaded = True
+        self.loaded_at = now
+        print(f"[COUNTERS] Loaded live counters: {self.counters}, active today: {len(self.last_seen)}")
+
+    def incr(self, name: str, delta: int = 1) -> None:
+        """Apply a delta coming from a DB write path"""
+        if not self.loaded or name not in self.counters:
+            return
+        self.counters[name] = max(0, self.counters[name] + delta)
+
+    def touch_user(self, user_id: int) -> None:
+        """Mark user as active now"""
+        if not self.loaded:
+            return
+        self.last_seen[user_id] = time.time()
+
+    def active_today(self) -> int:
+        """Users active in the last 24 hours, pruning stale entries"""
+        cutoff = time.time() - ACTIVE_WINDOW_SECONDS
+        stale = [user_id for user_id, seen in self.last_seen.items() if seen <= cutoff]
+        for user_id in stale:
+            del self.last_seen[user_id]
+        return len(self.last_seen)
+
+    def snapshot(self) -> Optional[dict]:
+        """Current values, or None when counters are not usable"""
+        if not self.loaded or not self.enabled:
+            return None
+        stats = dict(self.counters)
+        stats['active_today'] = self.active_today()
+        return stats
+
+    async def check_drift(self) -> Dict[str, int]:
+        """Recount everything, log and correct any drift"""
+        if not self.loaded:
+            await self.load()
+            return {}
+
+        before = dict(self.counters)
+        before['active_today'] = self.active_today()
+        await self.load()
+        after = dict(self.counters)
+        after['active_today'] = len(self.last_seen)
+
+        drift = {name: after[name] - before[name] for name in after if after[name] != before[name]}
+        self.last_drift = drift
+        if drift:
+            print(f"[COUNTERS] ⚠️ Drift corrected: {drift}")
+        return drift
+
+
+# Global registry used by database.py and admin handlers
+live_counters = LiveCounters()
+
+
+async def recount_admin_stats() -> dict:
+    """Full recount fallback used when live counters are not available"""
+    stats = {}
+    async with aiosqlite.connect(DATABASE_PATH) as db:
+        for name, query in COUNTER_QUERIES.items():
+            cursor = await db.execute(query)
+            result = await cursor.fetchone()
+            stats[name] = result[0] if result else 0
+
+        cursor = await db.execute("""
+            SELECT COUNT(*) FROM users
+            WHERE last_activity > datetime('now', '-1 day')
+        """)
+        result = await cursor.fetchone()
+        stats['active_today'] = result[0] if result else 0
+    return stats
@@ -0,0 +1,131 @@
+"""
+Bo'lim kontentini to'plab yuborish ("Hammasini yuborish").
+
+Har bir kontentni alohida yuborish o'rniga ketma-ket kelgan mos fayllar
+sendMediaGroup albomlariga (10 tagacha) yig'iladi. Telegram albomda faqat
+quyidagi aralashmalarga ruxsat beradi: rasm+video, faqat audio, faqat
+hujjat. Tur almashganda albom yopiladi, yolg'iz qolgan element va matnlar
+odatdagidek alohida yuboriladi - tartib o'zgarmaydi.
+
+Yuborishlar orasida MEDIA_BATCH_DELAY soniya kutiladi; Telegram baribir
+RetryAfter qaytarsa, ko'rsatilgan vaqt kutilib so'rov bir marta qaytariladi.
+Albom rad etilsa (masalan, ichida yaroqsiz file_id bo'lsa) uning elementlari
+bittalab yuboriladi; yuborib bo'lmagan elementlar o'tkazib yuboriladi va
+sanaladi, qolgan albomlar yuborilaveradi.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional, Sequence, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest, TelegramRetryAfter
+from aiogram.types import InputMediaAudio, InputMediaDocument, InputMediaPhoto, InputMediaVideo
+
+from config import MEDIA_BATCH_DELAY
+
+# (id, title, description, content_type, file_id, file_path, content_text, is_premium) from content.py queries
+ContentRow = Sequence[Any]
+
+MAX_GROUP = 10
+# Content types that may share one album
+GROUP_KINDS = {"photo": "visual", "video": "visual", "audio": "audio", "music": "audio", "document": "document"}
+INPUT_MEDIA = {
+    "photo": InputMediaPhoto, "video": InputMediaVideo,
+    "audio": InputMediaAudio, "music": InputMediaAudio, "document": InputMediaDocument,
+}
+ICONS = {"photo": "🖼️", "video": "🎥", "audio": "🎵", "music": "🎵", "document": "📄"}
+
+
+def sendable(row: ContentRow) -> bool:
+    content_type, file_id, text_content = row[3], row[4], row[6]
+    if content_type == "text":
+        return bool(text_content)
+    return content_type in INPUT_MEDIA and bool(file_id)
+
+
+def caption(row: ContentRow) -> str:
+    return f"{ICONS.get(row[3], '📄')} <b>{row[1]}</b>\n\n📄 {row[2]}"
+
+
+def plan_batches(rows: Sequence[ContentRow]) -> List[List[ContentRow]]:
+    """Consecutive rows of one album kind, at most MAX_GROUP each; everything else alone"""
+    batches: List[List[ContentRow]] = []
+    previous_kind: Optional[str] = None
+    for row in rows:
+        kind = GROUP_KINDS.get(row[3])
+        if kind is not None and kind == previous_kind and len(batches[-1]) < MAX_GROUP:
+            batches[-1].append(row)
+        else:
+            batches.append([row])
+        previous_kind = kind
+    return batches
+
+
+async def _with_retry(call: Callable[[], Awaitable[Any]]) -> Any:
+    try:
+        return await call()
+    except TelegramRetryAfter as e:
+        print(f"[MEDIA] Flood control, waiting {e.retry_after}s")
+        await asyncio.sleep(e.retry_after)
+        return await call()
+
+
+async def send_item(bot: Bot, chat_id: int, row: ContentRow) -> Any:
+    """One row with its own send method"""
+    content_type, file_id = row[3], row[4]
+    if content_type == "text":
+        return await bot.send_message(
+            chat_id, f"📝 <b>{row[1]}</b>\n\n📄 {row[2]}\n\n📖 <b>Matn:</b>\n{row[6]}", parse_mode="HTML"
+        )
+    if content_type == "photo":
+        return await bot.send_photo(chat_id, file_id, caption=caption(row), parse_mode="HTML")
+    if content_type == "video":
+        return await bot.send_video(chat_id, file_id, caption=caption(row), parse_mode="HTML")
+    if content_type == "music":
+        try:
+            return await bot.send_audio(chat_id, file_id, caption=caption(row), parse_mode="HTML")
+        except TelegramBadRequest:
+            # "music" is also saved from voice notes, which send_audio rejects
+            return await bot.send_voice(chat_id, file_id, caption=caption(row), parse_mode="HTML")
+    if content_type == "audio":
+        return await bot.send_audio(chat_id, file_id, caption=caption(row), parse_mode="HTML")
+    return await bot.send_document(chat_id, file_id, caption=caption(row), parse_mode="HTML")
+
+
+async def _send_items(bot: Bot, chat_id: int, rows: Sequence[ContentRow]) -> Tuple[int, int]:
+    """Rows one by one; returns (sent, failed)"""
+    sent = failed = 0
+    for row in rows:
+        try:
+            await _with_retry(lambda row=row: send_item(bot, chat_id, row))
+            sent += 1
+        except TelegramAPIError as e:
+            print(f"[MEDIA] Skipped content {row[0]}: {e}")
+            failed += 1
+    return sent, failed
+
+
+async def send_all(bot: Bot, chat_id: int, rows: Sequence[ContentRow]) -> Tuple[int, int, int]:
+    """Send every sendable row in order; returns (items sent, API calls, items skipped)"""
+    batches = plan_batches([row for row in rows if sendable(row)])
+    sent = calls = skipped = 0
+    for index, batch in enumerate(batches):
+        if index:
+            await asyncio.sleep(MEDIA_BATCH_DELAY)
+        if len(batch) > 1:
+            media = [
+                INPUT_MEDIA[row[3]](media=row[4], caption=caption(row), parse_mode="HTML")
+                for row in batch
+            ]
+            calls += 1
+            try:
+                await _with_retry(lambda media=media: bot.send_media_group(chat_id, media))
+                sent += len(batch)
+                continue
+            except TelegramAPIError as e:
+                # One bad file fails the whole album; find it by sending the items alone
+                print(f"[MEDIA] Album of {len(batch)} rejected, sending items one by one: {e}")
+        batch_sent, batch_failed = await _send_items(bot, chat_id, batch)
+        sent += batch_sent
+        skipped += batch_failed
+        calls += len(batch)
+    return sent, calls, skipped
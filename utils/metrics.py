@@ -0,0 +1,216 @@
+"""
+Handlerlar tezligi metrikalari.
+
+Dispatcher'ning tashqi (outer) middleware'i har bir yangilanish uchun
+kechikish gistogrammasi, xatolar soni va ayni paytda ishlayotgan handlerlar
+sonini yig'adi. Yorliqlar: handler nomi (ichki middleware aniqlaydi) va
+callback_data prefiksi (`user_section_12` -> `user_section_`).
+
+Ma'lumotlar OpenMetrics matn formatida lokal HTTP endpoint orqali beriladi
+(METRICS_PORT, standart 127.0.0.1:9464/metrics) va admin uchun /metrics
+buyrug'ida qisqacha ko'rsatiladi. Har bir jarayon o'z metrikalarini yuritadi.
+"""
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from aiohttp import web
+from aiogram import Dispatcher
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import TelegramObject, Update
+
+# Upper bounds in seconds; a +Inf bucket is implied
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Label combinations beyond this are folded into prefix="other"
+MAX_SERIES = 500
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+Handler = Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]]
+SeriesKey = Tuple[str, str, str]  # (event, handler, prefix)
+
+
+def callback_prefix(data: str) -> str:
+    """Drop ids and other variable parts: `srs_answer_a_12` -> `srs_answer_`"""
+    parts = data.split("_")
+    for index, part in enumerate(parts):
+        if len(part) <= 1 or any(char.isdigit() for char in part):
+            return "_".join(parts[:index]) + "_" if index else "_"
+    return data
+
+
+def update_labels(update: Update) -> Tuple[str, str]:
+    """(event type, prefix) for an update"""
+    if update.callback_query:
+        return "callback_query", callback_prefix(update.callback_query.data or "")
+    if update.message:
+        text = update.message.text or ""
+        if text.startswith("/"):
+            return "message", text.split()[0].split("@")[0]
+        return "message", update.message.content_type
+    return update.event_type, ""
+
+
+class _Series:
+    __slots__ = ("buckets", "count", "total", "errors", "in_flight")
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+        self.in_flight = 0
+
+    def observe(self, seconds: float) -> None:
+        index = 0
+        while index < len(LATENCY_BUCKETS) and seconds > LATENCY_BUCKETS[index]:
+            index += 1
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += seconds
+
+    def quantile(self, q: float) -> float:
+        """Estimate from the histogram by linear interpolation inside a bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for index, bucket_count in enumerate(self.buckets):
+            upper = LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else LATENCY_BUCKETS[-1]
+            if bucket_count and seen + bucket_count >= rank:
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+            lower = upper
+        return LATENCY_BUCKETS[-1]
+
+
+class _Record:
+    """Shared between the outer and inner middleware of one update"""
+    __slots__ = ("handler",)
+
+    def __init__(self):
+        self.handler = "unhandled"
+
+
+class HandlerMetrics:
+    """Latency histograms, error counters and in-flight gauges per handler and prefix"""
+
+    def __init__(self):
+        self.series: Dict[SeriesKey, _Series] = {}
+        self.started_at = time.time()
+
+    def _series(self, key: SeriesKey) -> _Series:
+        series = self.series.get(key)
+        if series is None:
+            if len(self.series) >= MAX_SERIES:
+                key = (key[0], key[1], "other")
+                series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = _Series()
+        return series
+
+    def setup(self, dp: Dispatcher) -> None:
+        dp.update.outer_middleware(self.outer)
+        for event_name, observer in dp.observers.items():
+            if event_name not in ("update", "error"):
+                observer.middleware(self.inner)
+
+    async def outer(self, handler: Handler, event: TelegramObject, data: Dict[str, Any]) -> Any:
+        """Times the whole update; labels are completed by `inner`"""
+        event_type, prefix = update_labels(event) if isinstance(event, Update) else ("update", "")
+        record = _Record()
+        data["metrics_record"] = record
+        # In-flight is tracked per prefix: the handler is unknown until routing is done
+        pending = self._series((event_type, "*", prefix))
+        pending.in_flight += 1
+        started = time.perf_counter()
+        failed = False
+        try:
+            return await handler(event, data)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            pending.in_flight -= 1
+            series = self._series((event_type, record.handler, prefix))
+            series.observe(time.perf_counter() - started)
+            if failed:
+                series.errors += 1
+
+    async def inner(self, handler: Handler, event: TelegramObject, data: Dict[str, Any]) -> Any:
+        """Records which handler matched the update"""
+        record: Optional[_Record] = data.get("metrics_record")
+        handler_object: Optional[HandlerObject] = data.get("handler")
+        if record is not None and handler_object is not None:
+            callback = handler_object.callback
+            record.handler = f"{callback.__module__}.{callback.__name__}"
+        return await handler(event, data)
+
+    # =====================
+    # Export
+    # =====================
+
+    def render(self) -> str:
+        """OpenMetrics text exposition"""
+        lines = [
+            "# TYPE bot_handler_latency_seconds histogram",
+            "# UNIT bot_handler_latency_seconds seconds",
+            "# HELP bot_handler_latency_seconds Update handling time per handler and callback prefix.",
+        ]
+        errors = [
+            "# TYPE bot_handler_errors counter",
+            "# HELP bot_handler_errors Exceptions that escaped a handler.",
+        ]
+        in_flight = [
+            "# TYPE bot_handler_in_flight gauge",
+            "# HELP bot_handler_in_flight Updates being handled right now, per callback prefix.",
+        ]
+
+        for (event_type, handler, prefix), series in sorted(self.series.items()):
+            if handler == "*":
+                labels = f'event="{_escape(event_type)}",prefix="{_escape(prefix)}"'
+                in_flight.append(f"bot_handler_in_flight{{{labels}}} {series.in_flight}")
+                continue
+            labels = f'event="{_escape(event_type)}",handler="{_escape(handler)}",prefix="{_escape(prefix)}"'
+            cumulative = 0
+            for index, bucket_count in enumerate(series.buckets):
+                cumulative += bucket_count
+                bound = repr(LATENCY_BUCKETS[index]) if index < len(LATENCY_BUCKETS) else "+Inf"
+                lines.append(f'bot_handler_latency_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"bot_handler_latency_seconds_count{{{labels}}} {series.count}")
+            lines.append(f"bot_handler_latency_seconds_sum{{{labels}}} {series.total:.6f}")
+            errors.append(f"bot_handler_errors_total{{{labels}}} {series.errors}")
+
+        return "\n".join(lines + errors + in_flight + ["# EOF"]) + "\n"
+
+    def summary(self, limit: int = 10) -> List[Tuple[str, str, int, float, float, int]]:
+        """Slowest series by p95: (handler, prefix, count, p50, p95, errors)"""
+        rows = [
+            (handler, prefix, series.count, series.quantile(0.5), series.quantile(0.95), series.errors)
+            for (_, handler, prefix), series in self.series.items()
+            if handler != "*" and series.count
+        ]
+        rows.sort(key=lambda row: row[4], reverse=True)
+        return rows[:limit]
+
+    def in_flight(self) -> int:
+        return sum(series.in_flight for (_, handler, _), series in self.series.items() if handler == "*")
+
+    async def start_server(self, host: str, port: int) -> web.AppRunner:
+        """Serve /metrics on a local port"""
+        async def handle(request: web.Request) -> web.Response:
+            return web.Response(body=self.render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+        app = web.Application()
+        app.router.add_get("/metrics", handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host=host, port=port).start()
+        print(f"[METRICS] Serving http://{host}:{port}/metrics")
+        return runner
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+handler_metrics = HandlerMetrics()
@@ -0,0 +1,122 @@
+"""
+Ro'yxatlarni sahifalash (keyset pagination).
+
+OFFSET o'rniga oxirgi ko'rsatilgan qatorning kaliti (masalan id) callback
+ichida saqlanadi va keyingi sahifa indeks bo'yicha shu kalitdan boshlab
+o'qiladi: `WHERE (kalit) < (?) ORDER BY kalit DESC LIMIT n+1`. Har bir
+bosishda faqat bitta sahifa o'qiladi, minginchi sahifa ham birinchisi kabi
+tez. Ortiqcha bitta qator keyingi sahifa bor-yo'qligini bildiradi.
+
+Callback formati: `pg_<nom>_<n|p>_<sahifa>_<kalit1>_<kalit2>` (n - keyingi,
+p - oldingi). Kalit ustunlari NULL bo'lmasligi kerak: NULL bilan
+solishtirish hech qanday qator qaytarmaydi.
+"""
+from typing import Any, Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+from aiogram import F
+from aiogram.types import InlineKeyboardButton
+
+Key = Tuple[Any, ...]
+
+PAGE_SIZE = 10
+# Every page token starts with this, whatever the listing
+TOKEN_PREFIX = "pg_"
+
+
+class Page(NamedTuple):
+    rows: List[Tuple[Any, ...]]
+    number: int
+    has_prev: bool
+    has_next: bool
+    first_key: Optional[Key]
+    last_key: Optional[Key]
+
+
+class Paginator:
+    """One listing: its query parts, sort key and callback tokens"""
+
+    def __init__(self, name: str, entry: str, columns: str, source: str, keys: Sequence[str],
+                 key_types: Sequence[Callable[[str], Any]], where: str = "", page_size: int = PAGE_SIZE):
+        self.name = name
+        # Callback that opens the first page (the listing's existing button)
+        self.entry = entry
+        self.prefix = f"{TOKEN_PREFIX}{name}_"
+        self.columns = columns
+        self.source = source
+        self.keys = list(keys)
+        self.key_types = list(key_types)
+        self.where = where
+        self.page_size = page_size
+
+    @property
+    def filter(self):
+        """Matches the first-page button and every page token"""
+        return (F.data == self.entry) | F.data.startswith(self.prefix)
+
+    def token(self, direction: str, page: int, key: Key) -> str:
+        return f"{self.prefix}{direction}_{page}_" + "_".join(str(value) for value in key)
+
+    def parse(self, data: Optional[str]) -> Tuple[str, int, Optional[Key]]:
+        """(direction, page number to show, cursor key); the entry callback is page 1"""
+        if not data or not data.startswith(self.prefix):
+            return "n", 1, None
+        direction, page, *values = data[len(self.prefix):].split("_", 1 + len(self.keys))
+        key = tuple(cast(value) for cast, value in zip(self.key_types, values))
+        return direction, int(page), key
+
+    async def fetch(self, db, data: Optional[str], params: Sequence[Any] = ()) -> Page:
+        """Rows of the page the callback points to; one indexed seek, page_size + 1 rows"""
+        direction, number, cursor = self.parse(data)
+        backwards = direction == "p" and cursor is not None
+        row_value = f"({', '.join(self.keys)})"
+
+        conditions = [self.where] if self.where else []
+        arguments = list(params)
+        if cursor is not None:
+            conditions.append(f"{row_value} {'>' if backwards else '<'} ({', '.join('?' * len(self.keys))})")
+            arguments.extend(cursor)
+        order = ", ".join(f"{key} {'ASC' if backwards else 'DESC'}" for key in self.keys)
+        sql = (
+            f"SELECT {self.columns}, {', '.join(self.keys)} FROM {self.source}"
+            + (f" WHERE {' AND '.join(conditions)}" if conditions else "")
+            + f" ORDER BY {order} LIMIT ?"
+        )
+        cursor_rows = await db.execute(sql, (*arguments, self.page_size + 1))
+        rows = list(await cursor_rows.fetchall())
+
+        more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if backwards:
+            rows.reverse()
+        width = len(self.keys)
+        keys = [tuple(row[-width:]) for row in rows]
+        return Page(
+            rows=[tuple(row[:-width]) for row in rows],
+            number=number,
+            has_prev=more if backwards else number > 1,
+            has_next=True if backwards else more,
+            first_key=keys[0] if keys else None,
+            last_key=keys[-1] if keys else None,
+        )
+
+    def start(self, page: Page) -> int:
+        """Running number of the page's first row, for enumerate()"""
+        return (page.number - 1) * self.page_size + 1
+
+    @staticmethod
+    def label(page: Page) -> str:
+        """Header suffix like " (2-sahifa)"; empty when the listing fits on one page"""
+        return f" ({page.number}-sahifa)" if page.number > 1 or page.has_next else ""
+
+    def nav_row(self, page: Page) -> List[InlineKeyboardButton]:
+        """⬅️/➡️ buttons; empty when everything fits on one page"""
+        row = []
+        if page.has_prev and page.first_key is not None:
+            row.append(InlineKeyboardButton(
+                text=f"⬅️ {page.number - 1}-sahifa", callback_data=self.token("p", page.number - 1, page.first_key)
+            ))
+        if page.has_next and page.last_key is not None:
+            row.append(InlineKeyboardButton(
+                text=f"{page.number + 1}-sahifa ➡️", callback_data=self.token("n", page.number + 1, page.last_key)
+            ))
+        return row
@@ -0,0 +1,175 @@
+"""
+Test yechish sessiyalari - xotirada ishlaydigan quiz dvigateli.
+
+Savollar test boshlanganda bir marta bazadan yuklanadi va ixcham
+tuzilmada saqlanadi. Har bir javob faqat xotirada hisoblanadi, natija
+esa test tugaganda record_quiz_attempt orqali bitta tranzaksiyada
+yoziladi.
+"""
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from database import get_quiz_questions, record_quiz_attempt
+from utils.srs import record_reviews
+
+LETTERS = "ABCD"
+UNANSWERED = 0xFF
+
+# Idle sessions are dropped after this many seconds
+SESSION_TTL = 60 * 60
+# How many finished sessions are kept for "quiz_review_"
+MAX_FINISHED_SESSIONS = 5000
+
+
+class QuizSession:
+    """Compact per-user quiz state"""
+
+    __slots__ = (
+        'user_id', 'quiz_id', 'title', 'language', 'questions',
+        'answers', 'times', 'score', 'index', 'started_at', 'touched_at'
+    )
+
+    def __init__(self, user_id: int, quiz_id: int, title: str, language: str, questions: tuple):
+        self.user_id = user_id
+        self.quiz_id = quiz_id
+        self.title = title
+        self.language = language
+        # (question_id, text, (a, b, c, d), correct_index, explanation)
+        self.questions = questions
+        self.answers = bytearray([UNANSWERED]) * len(questions)
+        # Milliseconds spent on each question
+        self.times = array('I', [0]) * len(questions)
+        self.score = 0
+        self.index = 0
+        self.started_at = time.monotonic()
+        self.touched_at = self.started_at
+
+    @property
+    def total(self) -> int:
+        return len(self.questions)
+
+    @property
+    def finished(self) -> bool:
+        return self.index >= len(self.questions)
+
+    def current(self) -> Optional[tuple]:
+        if self.finished:
+            return None
+        return self.questions[self.index]
+
+    def percentage(self) -> float:
+        return (self.score / self.total * 100) if self.total else 0.0
+
+
+def correct_index(value) -> int:
+    """Normalize stored correct answer ('A', 'b', 'C) ...') to 0-3"""
+    letter = str(value or "").strip().upper()[:1]
+    return LETTERS.index(letter) if letter and letter in LETTERS else 0
+
+
+def _compact_questions(rows) -> tuple:
+    """questions table rows -> tuple of compact question tuples"""
+    compact = []
+    for row in rows:
+        question_id, _, text, option_a, option_b, option_c, option_d, correct, explanation = row[:9]
+        compact.append((
+            question_id,
+            text,
+            (option_a, option_b, option_c, option_d),
+            correct_index(correct),
+            explanation or ""
+        ))
+    return tuple(compact)
+
+
+class QuizEngine:
+    """Registry of active and recently finished quiz sessions"""
+
+    def __init__(self):
+        self.sessions: Dict[int, QuizSession] = {}
+        self.finished: "OrderedDict[int, QuizSession]" = OrderedDict()
+
+    def _evict_idle(self) -> None:
+        cutoff = time.monotonic() - SESSION_TTL
+        idle = [user_id for user_id, session in self.sessions.items() if session.touched_at < cutoff]
+        for user_id in idle:
+            del self.sessions[user_id]
+
+    async def start(self, user_id: int, quiz: tuple) -> Optional[QuizSession]:
+        """Load the questions of an already fetched quizzes row once and open a new session"""
+        self._evict_idle()
+
+        quiz_id = quiz[0]
+        questions = _compact_questions(await get_quiz_questions(quiz_id))
+        if not questions:
+            return None
+
+        session = QuizSession(user_id, quiz_id, quiz[1], quiz[3] or "", questions)
+        self.sessions[user_id] = session
+        return session
+
+    def get(self, user_id: int) -> Optional[QuizSession]:
+        return self.sessions.get(user_id)
+
+    def answer(self, user_id: int, letter: str, question_index: int) -> Optional[Tuple[QuizSession, bool, tuple]]:
+        """
+        Register an answer purely in memory.
+        Returns (session, is_correct, answered_question) or None for stale/duplicate taps.
+        """
+        session = self.sessions.get(user_id)
+        if not session or session.finished or question_index != session.index:
+            return None
+
+        letter = letter.upper()
+        if letter not in LETTERS:
+            return None
+
+        question = session.questions[session.index]
+        choice = LETTERS.index(letter)
+        is_correct = choice == question[3]
+
+        now = time.monotonic()
+        session.answers[session.index] = choice
+        session.times[session.index] = min(int((now - session.touched_at) * 1000), 0xFFFFFFFF)
+        if is_correct:
+            session.score += 1
+        session.index += 1
+        session.touched_at = now
+        return session, is_correct, question
+
+    async def finish(self, user_id: int) -> Optional[QuizSession]:
+        """Persist the final result in one transaction and close the session"""
+        session = self.sessions.pop(user_id, None)
+        if not session:
+            return None
+
+        answers = [
+            (question[0], session.answers[i], session.times[i])
+            for i, question in enumerate(session.questions)
+            if session.answers[i] != UNANSWERED
+        ]
+        await record_quiz_attempt(user_id, session.quiz_id, session.score, session.total, answers)
+        # Every answered question becomes (or updates) a spaced-repetition card
+        await record_reviews(user_id, [
+            (question[0], session.answers[i] == question[3])
+            for i, question in enumerate(session.questions)
+            if session.answers[i] != UNANSWERED
+        ])
+
+        self.finished[user_id] = session
+        self.finished.move_to_end(user_id)
+        while len(self.finished) > MAX_FINISHED_SESSIONS:
+            self.finished.popitem(last=False)
+        return session
+
+    def last_result(self, user_id: int, quiz_id: int) -> Optional[QuizSession]:
+        session = self.finished.get(user_id)
+        if session and session.quiz_id == quiz_id:
+            return session
+        return None
+
+
+# Global engine used by handlers/tests.py
+quiz_engine = QuizEngine()
@@ -0,0 +1,273 @@
+"""
+Test va savollarni JSON/CSV fayldan ommaviy import qilish.
+
+Qo'llab-quvvatlanadigan formatlar:
+- CSV: har bir qator bitta savol (quiz_title, question, option_a..option_d,
+  correct_answer, explanation; ixtiyoriy: quiz_description, language,
+  category, is_premium). Bir testning savollari ketma-ket kelishi kerak.
+- JSONL: har bir qatorda CSV bilan bir xil maydonli bitta JSON obyekt.
+- JSON: test obyekti yoki testlar ro'yxati, har bir testda "questions"
+  ro'yxati bo'ladi.
+
+CSV va JSONL qatorma-qator o'qiladi, har bir test tayyor bo'lishi bilan
+uzatiladi; yozish database.import_quiz orqali bitta tranzaksiyada bajariladi.
+"""
+import codecs
+import csv
+import io
+import json
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+LETTERS = "ABCD"
+SUPPORTED_FORMATS = ("csv", "jsonl", "json")
+
+MAX_TITLE_LENGTH = 200
+MAX_QUESTION_LENGTH = 1000
+MAX_OPTION_LENGTH = 200
+MAX_REPORTED_ERRORS = 10
+
+NOT_UTF8 = "fayl UTF-8 emas (Excel'da \"CSV UTF-8\" sifatida saqlang)"
+
+
+class QuizImportError(Exception):
+    """Raised when a whole file cannot be parsed"""
+
+
+class QuizDraft:
+    """One quiz collected from the uploaded file"""
+
+    __slots__ = ('title', 'description', 'language', 'category', 'is_premium', 'questions')
+
+    def __init__(self, title: str, description: str = "", language: str = "korean",
+                 category: str = "general", is_premium: bool = False):
+        self.title = title
+        self.description = description
+        self.language = language
+        self.category = category
+        self.is_premium = is_premium
+        # (question_text, option_a, option_b, option_c, option_d, correct_answer, explanation)
+        self.questions: List[Tuple[str, str, str, str, str, str, str]] = []
+
+
+class ImportReport:
+    """Counters and validation errors collected while importing"""
+
+    def __init__(self):
+        self.quizzes = 0
+        self.questions = 0
+        self.skipped = 0
+        self.errors: List[str] = []
+
+    def add_error(self, line: int, reason: str) -> None:
+        self._record(f"{line}-qator", reason)
+
+    def add_quiz_error(self, quiz_number: int, reason: str, question_number: Optional[int] = None) -> None:
+        """Error in a JSON document, located by quiz (and question) position"""
+        where = f"{quiz_number}-test" + (f", {question_number}-savol" if question_number else "")
+        self._record(where, reason)
+
+    def _record(self, where: str, reason: str) -> None:
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"{where}: {reason}")
+
+
+def detect_format(file_name: Optional[str], mime_type: Optional[str] = None) -> Optional[str]:
+    """Pick parser by file extension (falls back to MIME type)"""
+    name = (file_name or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith(".jsonl") or name.endswith(".ndjson"):
+        return "jsonl"
+    if name.endswith(".json"):
+        return "json"
+    if mime_type == "text/csv":
+        return "csv"
+    if mime_type == "application/json":
+        return "json"
+    return None
+
+
+def _text(row: dict, *keys: str) -> str:
+    for key in keys:
+        value = row.get(key)
+        if value is not None and str(value).strip():
+            return str(value).strip()
+    return ""
+
+
+def _is_true(value) -> bool:
+    return str(value).strip().lower() in ("1", "true", "yes", "ha", "premium")
+
+
+def _normalize_answer(value, options: List[str]) -> Optional[str]:
+    """Accept 'A'..'D', 1..4 or the exact option text"""
+    answer = str(value or "").strip()
+    if not answer:
+        return None
+    if answer.upper() in LETTERS and len(answer) == 1:
+        return answer.upper()
+    if answer.isdigit() and 1 <= int(answer) <= 4:
+        return LETTERS[int(answer) - 1]
+    for i, option in enumerate(options):
+        if answer.lower() == option.lower():
+            return LETTERS[i]
+    return None
+
+
+def parse_question(row: dict) -> Tuple[Optional[tuple], Optional[str]]:
+    """Validate one question row. Returns (question tuple, None) or (None, error)"""
+    question_text = _text(row, "question", "question_text")
+    if not question_text:
+        return None, "savol matni yo'q"
+    if len(question_text) > MAX_QUESTION_LENGTH:
+        return None, f"savol {MAX_QUESTION_LENGTH} belgidan uzun"
+
+    options = row.get("options")
+    if isinstance(options, list):
+        options = [str(option).strip() for option in options]
+    else:
+        options = [_text(row, f"option_{letter.lower()}", letter.lower()) for letter in LETTERS]
+
+    if len(options) != 4 or not all(options):
+        return None, "4 ta variant to'liq bo'lishi kerak"
+    if any(len(option) > MAX_OPTION_LENGTH for option in options):
+        return None, f"variant {MAX_OPTION_LENGTH} belgidan uzun"
+
+    answer = _normalize_answer(row.get("correct_answer", row.get("answer")), options)
+    if not answer:
+        return None, "to'g'ri javob A/B/C/D bo'lishi kerak"
+
+    explanation = _text(row, "explanation")
+    return (question_text, options[0], options[1], options[2], options[3], answer, explanation), None
+
+
+def _draft_from_row(row: dict, title: str) -> QuizDraft:
+    return QuizDraft(
+        title=title,
+        description=_text(row, "quiz_description", "description"),
+        language=_text(row, "language") or "korean",
+        category=_text(row, "category") or "general",
+        is_premium=_is_true(row.get("is_premium", "")),
+    )
+
+
+def _group_rows(rows: Iterator[Tuple[int, dict]], report: ImportReport) -> Iterator[QuizDraft]:
+    """Group consecutive question rows by quiz_title, yielding finished quizzes"""
+    draft: Optional[QuizDraft] = None
+
+    for line, row in rows:
+        title = _text(row, "quiz_title", "quiz", "title")
+        if not title:
+            report.add_error(line, "quiz_title yo'q")
+            continue
+        if len(title) > MAX_TITLE_LENGTH:
+            report.add_error(line, f"test nomi {MAX_TITLE_LENGTH} belgidan uzun")
+            continue
+
+        if draft is None or draft.title != title:
+            if draft and draft.questions:
+                yield draft
+            draft = _draft_from_row(row, title)
+
+        question, error = parse_question(row)
+        if error:
+            report.add_error(line, error)
+            continue
+        draft.questions.append(question)
+
+    if draft and draft.questions:
+        yield draft
+
+
+def _csv_rows(stream: BinaryIO) -> Iterator[Tuple[int, dict]]:
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    line = 0
+    try:
+        sample = text.read(4096)
+        text.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+
+        reader = csv.DictReader(text, dialect=dialect)
+        if not reader.fieldnames:
+            raise QuizImportError("CSV sarlavha qatori topilmadi")
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+
+        for row in reader:
+            line = reader.line_num
+            yield line, row
+    except UnicodeDecodeError:
+        raise QuizImportError(NOT_UTF8)
+    except csv.Error as e:
+        # Oversized field or broken quoting stops the reader for the rest of the file
+        raise QuizImportError(f"CSV xato ({line}-qatordan keyin): {e}")
+
+
+def _jsonl_rows(stream: BinaryIO, report: ImportReport) -> Iterator[Tuple[int, dict]]:
+    decoder = codecs.getreader("utf-8-sig")(stream)
+    try:
+        for line_number, line in enumerate(decoder, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                report.add_error(line_number, "JSON xato")
+                continue
+            if not isinstance(row, dict):
+                report.add_error(line_number, "obyekt kutilgan edi")
+                continue
+            yield line_number, row
+    except UnicodeDecodeError:
+        raise QuizImportError(NOT_UTF8)
+
+
+def _json_quizzes(stream: BinaryIO, report: ImportReport) -> Iterator[QuizDraft]:
+    """Whole-document JSON (bounded by Telegram's 20 MB download limit)"""
+    try:
+        document = json.load(codecs.getreader("utf-8-sig")(stream))
+    except json.JSONDecodeError as e:
+        raise QuizImportError(f"JSON xato: {e}")
+    except UnicodeDecodeError:
+        raise QuizImportError(NOT_UTF8)
+
+    if isinstance(document, dict):
+        document = document.get("quizzes", [document])
+    if not isinstance(document, list):
+        raise QuizImportError("JSON test obyekti yoki ro'yxati bo'lishi kerak")
+
+    for quiz_number, quiz in enumerate(document, 1):
+        if not isinstance(quiz, dict):
+            report.add_quiz_error(quiz_number, "test obyekti kutilgan edi")
+            continue
+
+        title = _text(quiz, "title", "quiz_title")
+        if not title or len(title) > MAX_TITLE_LENGTH:
+            report.add_quiz_error(quiz_number, "test nomi yo'q yoki juda uzun")
+            continue
+
+        draft = _draft_from_row(quiz, title)
+        for question_number, row in enumerate(quiz.get("questions") or [], 1):
+            question, error = parse_question(row if isinstance(row, dict) else {})
+            if error:
+                report.add_quiz_error(quiz_number, error, question_number)
+                continue
+            draft.questions.append(question)
+
+        if draft.questions:
+            yield draft
+
+
+def iter_quizzes(stream: BinaryIO, file_format: str, report: ImportReport) -> Iterator[QuizDraft]:
+    """Yield validated quizzes from an uploaded file, recording row errors in report"""
+    if file_format == "csv":
+        return _group_rows(_csv_rows(stream), report)
+    if file_format == "jsonl":
+        return _group_rows(_jsonl_rows(stream, report), report)
+    if file_format == "json":
+        return _json_quizzes(stream, report)
+    raise QuizImportError(f"Noma'lum format: {file_format}")
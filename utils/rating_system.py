@@ -1,6 +1,7 @@
 import aiosqlite
 from datetime import datetime, timedelta
 from config import DATABASE_PATH
+from utils.live_counters import live_counters
 
 # Rating points for different activities
 RATING_POINTS = {
@@ -48,6 +49,7 @@ async def update_user_rating(user_id: int, activity_type: str, bonus_points: flo
                 """, (words_bonus, user_id))
             
             await db.commit()
+        live_counters.touch_user(user_id)
     except Exception as e:
         print(f"Rating update error: {e}")
 
@@ -4,27 +4,73 @@ from apscheduler.triggers.cron import CronTrigger
 from datetime import datetime, timedelta
 import aiosqlite
 from aiogram import Bot
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
 from config import DATABASE_PATH, MOTIVATIONAL_MESSAGE_HOUR, PREMIUM_PROMOTION_DAYS
 from messages import MOTIVATIONAL_MESSAGES, PREMIUM_PROMOTION_MESSAGES
 from utils.rating_system import calculate_weekly_bonus
+from utils.live_counters import live_counters
+from utils.srs import iter_due_users
+from utils.shutdown import shutdown_coordinator
 import random
 
 scheduler = AsyncIOScheduler()
 
+# =====================
+# Audience queries (module level so benchmarks/bench_database.py times the same SQL)
+# =====================
+
+MOTIVATION_AUDIENCE_SQL = """
+    SELECT user_id, first_name, rating_score, words_learned, quiz_score_total, 
+           total_sessions, last_activity
+    FROM users 
+    WHERE last_activity > date('now', '-7 days') AND total_sessions >= 1
+    ORDER BY rating_score DESC, last_activity DESC
+    LIMIT 500
+"""
+
+PROMOTION_AUDIENCE_SQL = """
+    SELECT user_id, first_name, rating_score, words_learned, quiz_score_total, 
+           total_sessions, COALESCE(referral_count, 0) as referral_count
+    FROM users 
+    WHERE (is_premium = FALSE OR premium_expires_at < CURRENT_TIMESTAMP)
+    AND last_activity > date('now', '-14 days')
+    AND total_sessions >= 3
+    ORDER BY rating_score DESC, total_sessions DESC
+    LIMIT 300
+"""
+
+TOP_RATED_SQL = """
+    SELECT user_id, first_name, rating_score
+    FROM users 
+    WHERE rating_score > 0
+    ORDER BY rating_score DESC
+    LIMIT 3
+"""
+
+EXPIRED_PREMIUMS_SQL = """
+    SELECT user_id, first_name 
+    FROM users 
+    WHERE is_premium = TRUE 
+    AND premium_expires_at < CURRENT_TIMESTAMP
+"""
+
+# Parameters: (seven_days_ago, three_days_ago) as ISO timestamps
+ENGAGEMENT_AUDIENCE_SQL = """
+    SELECT user_id, first_name, last_activity
+    FROM users 
+    WHERE last_activity BETWEEN ? AND ?
+    AND total_sessions >= 2
+    ORDER BY rating_score DESC
+    LIMIT 200
+"""
+
 async def send_weekly_motivational_messages(bot: Bot):
     """Send personalized weekly motivational messages based on user activity and progress"""
     try:
         # Get users with different activity levels for personalized messages
         async with aiosqlite.connect(DATABASE_PATH) as db:
-            cursor = await db.execute("""
-                SELECT user_id, first_name, rating_score, words_learned, quiz_score_total, 
-                       total_sessions, last_activity
-                FROM users 
-                WHERE last_activity > date('now', '-7 days') AND total_sessions >= 1
-                ORDER BY rating_score DESC, last_activity DESC
-                LIMIT 500
-            """)
+            cursor = await db.execute(MOTIVATION_AUDIENCE_SQL)
             active_users = await cursor.fetchall()
         
         print(f"Database query returned {len(active_users)} users")
@@ -36,6 +82,8 @@ async def send_weekly_motivational_messages(bot: Bot):
         print(f"Found {len(active_users)} active users to send messages to")
         
         for user_id, first_name, rating, words, quiz_score, sessions, last_activity in active_users:
+            if shutdown_coordinator.stopping:
+                break
             try:
                 name = first_name or "Do'stim"
                 print(f"Attempting to send message to user {user_id} ({name})")
@@ -141,16 +189,7 @@ async def send_premium_promotion_messages(bot: Bot):
     try:
         # Get active non-premium users with their progress data
         async with aiosqlite.connect(DATABASE_PATH) as db:
-            cursor = await db.execute("""
-                SELECT user_id, first_name, rating_score, words_learned, quiz_score_total, 
-                       total_sessions, COALESCE(referral_count, 0) as referral_count
-                FROM users 
-                WHERE (is_premium = FALSE OR premium_expires_at < CURRENT_TIMESTAMP)
-                AND last_activity > date('now', '-14 days')
-                AND total_sessions >= 3
-                ORDER BY rating_score DESC, total_sessions DESC
-                LIMIT 300
-            """)
+            cursor = await db.execute(PROMOTION_AUDIENCE_SQL)
             non_premium_users = await cursor.fetchall()
         
         if not non_premium_users:
@@ -158,6 +197,8 @@ async def send_premium_promotion_messages(bot: Bot):
             
         sent_count = 0
         for user_id, first_name, rating, words, quiz_score, sessions, referrals in non_premium_users:
+            if shutdown_coordinator.stopping:
+                break
             try:
                 name = first_name or "Do'stim"
                 remaining_referrals = max(0, 10 - (referrals or 0))
@@ -259,16 +300,12 @@ async def award_weekly_bonuses(bot: Bot):
         # Optionally notify top performers
         if awarded_users > 0:
             async with aiosqlite.connect(DATABASE_PATH) as db:
-                cursor = await db.execute("""
-                    SELECT user_id, first_name, rating_score
-                    FROM users 
-                    WHERE rating_score > 0
-                    ORDER BY rating_score DESC
-                    LIMIT 3
-                """)
+                cursor = await db.execute(TOP_RATED_SQL)
                 top_users = await cursor.fetchall()
                 
                 for user_id, first_name, rating_score in top_users:
+                    if shutdown_coordinator.stopping:
+                        break
                     try:
                         bonus_message = f"""
 🏆 <b>Haftalik bonus!</b>
@@ -295,25 +332,23 @@ async def cleanup_expired_premiums(bot: Bot):
     try:
         async with aiosqlite.connect(DATABASE_PATH) as db:
             # Get users whose premium just expired
-            cursor = await db.execute("""
-                SELECT user_id, first_name 
-                FROM users 
-                WHERE is_premium = TRUE 
-                AND premium_expires_at < CURRENT_TIMESTAMP
-            """)
+            cursor = await db.execute(EXPIRED_PREMIUMS_SQL)
             expired_users = await cursor.fetchall()
             
             # Update their status
-            await db.execute("""
+            cursor = await db.execute("""
                 UPDATE users 
                 SET is_premium = FALSE 
                 WHERE is_premium = TRUE 
                 AND premium_expires_at < CURRENT_TIMESTAMP
             """)
             await db.commit()
+            live_counters.incr('premium_users', -cursor.rowcount)
             
             # Notify users about expiration
             for user_id, first_name in expired_users:
+                if shutdown_coordinator.stopping:
+                    break
                 try:
                     expiry_message = f"""
 ⏰ <b>Premium obuna tugadi!</b>
@@ -347,14 +382,9 @@ async def send_engagement_reminders(bot: Bot):
         seven_days_ago = datetime.now() - timedelta(days=7)
         
         async with aiosqlite.connect(DATABASE_PATH) as db:
-            cursor = await db.execute("""
-                SELECT user_id, first_name, last_activity
-                FROM users 
-                WHERE last_activity BETWEEN ? AND ?
-                AND total_sessions >= 2
-                ORDER BY rating_score DESC
-                LIMIT 200
-            """, (seven_days_ago.isoformat(), three_days_ago.isoformat()))
+            cursor = await db.execute(
+                ENGAGEMENT_AUDIENCE_SQL, (seven_days_ago.isoformat(), three_days_ago.isoformat())
+            )
             inactive_users = await cursor.fetchall()
         
         reminder_messages = [
@@ -366,6 +396,8 @@ async def send_engagement_reminders(bot: Bot):
         
         sent_count = 0
         for user_id, first_name, last_activity in inactive_users:
+            if shutdown_coordinator.stopping:
+                break
             try:
                 message = random.choice(reminder_messages)
                 personalized_message = message.format(name=first_name or "Do'stim")
@@ -380,6 +412,43 @@ async def send_engagement_reminders(bot: Bot):
     except Exception as e:
         print(f"Error sending engagement reminders: {e}")
 
+async def send_review_reminders(bot: Bot):
+    """Remind users with due spaced-repetition cards, in keyset batches"""
+    try:
+        sent_count = 0
+        async for batch in iter_due_users():
+            if shutdown_coordinator.stopping:
+                break
+            for user_id, due_count in batch:
+                if shutdown_coordinator.stopping:
+                    break
+                try:
+                    await bot.send_message(
+                        user_id,
+                        f"🔁 <b>Takrorlash vaqti!</b>\n\n"
+                        f"Sizda {due_count} ta savol takrorlashni kutmoqda.\n"
+                        f"Bir necha daqiqa ajrating - bilim mustahkamlanadi! 🧠",
+                        reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+                            [InlineKeyboardButton(text="🔁 Takrorlashni boshlash", callback_data="srs_review")]
+                        ])
+                    )
+                    sent_count += 1
+                    await asyncio.sleep(0.1)
+                except:
+                    continue
+        
+        print(f"Sent review reminders to {sent_count} users")
+        
+    except Exception as e:
+        print(f"Error sending review reminders: {e}")
+
+async def verify_live_counters(bot: Bot):
+    """Periodic full recount to detect drift of in-memory admin counters"""
+    try:
+        await live_counters.check_drift()
+    except Exception as e:
+        print(f"Error verifying live counters: {e}")
+
 async def start_scheduler(bot: Bot):
     """Start the scheduler with all jobs"""
     
@@ -432,6 +501,25 @@ async def start_scheduler(bot: Bot):
         id='engagement_reminders'
     )
     
+    # Spaced-repetition review reminders - daily at 7 PM
+    scheduler.add_job(
+        send_review_reminders,
+        CronTrigger(hour=19, minute=0),
+        args=[bot],
+        id='review_reminders'
+    )
+    
+    # Live admin counters drift check - every 30 minutes
+    scheduler.add_job(
+        verify_live_counters,
+        CronTrigger(minute='*/30'),
+        args=[bot],
+        id='live_counters_drift'
+    )
+    
+    # Let graceful shutdown wait for a running job to finish its current message
+    shutdown_coordinator.track_scheduler(scheduler)
+    
     # Start scheduler
     try:
         scheduler.start()
@@ -441,5 +529,8 @@ async def start_scheduler(bot: Bot):
 
 async def stop_scheduler():
     """Stop the scheduler"""
-    scheduler.shutdown()
-    print("Scheduler stopped")
+    if not scheduler.running:
+        return
+    # AsyncIOScheduler cannot wait here; running jobs are drained by utils/shutdown.py
+    scheduler.shutdown(wait=False)
+    print("[SCHEDULER] Scheduler stopped")
@@ -0,0 +1,147 @@
+"""
+To'liq matnli qidiruv (SQLite FTS5).
+
+search_index jadvali database.py dagi triggerlar orqali content, sections,
+subsections, quizzes va premium_content bilan sinxron turadi. Natijalar
+BM25 bo'yicha saralanadi (sarlavhadagi moslik tavsifdagidan 10 barobar
+og'irroq). Har bir so'z prefiks sifatida qidiriladi: "학교" so'zi
+"학교에서" ni ham topadi.
+
+Mashhur so'rovlar SEARCH_CACHE_TTL soniya xotirada saqlanadi. Keshda premium
+belgisi bilan birga barcha natijalar turadi, premium cheklovi har bir
+foydalanuvchi uchun keyin qo'llanadi. Premium belgisi so'rov paytida manba
+jadvallardan olinadi: premium bo'limdagi dars ham premium hisoblanadi.
+"""
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Tuple
+
+import aiosqlite
+
+from config import DATABASE_PATH, SEARCH_CACHE_TTL
+from database import EFFECTIVE_PREMIUM
+
+# rowid % 8 in search_index -> kind
+KINDS = {1: "content", 2: "section", 3: "subsection", 4: "quiz", 5: "premium_content"}
+# Where a result opens; premium_content has no screen of its own yet
+CALLBACKS = {
+    "content": "view_content_{}",
+    "section": "user_section_{}",
+    "subsection": "user_subsection_{}",
+    "quiz": "start_quiz_{}",
+    "premium_content": "search_premium_{}",
+}
+ICONS = {"content": "📄", "section": "📚", "subsection": "📖", "quiz": "🧠", "premium_content": "💎"}
+
+MAX_TERMS = 8
+MIN_QUERY_LENGTH = 2
+# Rows fetched per query; free users see the non-premium part of them
+FETCH_LIMIT = 50
+CACHE_SIZE = 256
+
+# Premium flag of each hit, read from the source rows at query time so lessons
+# inside a premium section stay hidden from free users
+EFFECTIVE_PREMIUM_SQL = "CASE search_index.rowid % 8 " + " ".join(
+    f"WHEN {kind} THEN ({EFFECTIVE_PREMIUM[name].format(id='search_index.rowid / 8')})"
+    for kind, name in KINDS.items()
+) + " ELSE 1 END"
+
+# Apostrophe variants are separators in the index tokenizer as well
+TERM_RE = re.compile(r"\w[\w'ʻʼ`’]*")
+
+
+class SearchResult(NamedTuple):
+    kind: str
+    ref_id: int
+    title: str
+    snippet: str
+    is_premium: bool
+
+    @property
+    def callback_data(self) -> str:
+        return CALLBACKS[self.kind].format(self.ref_id)
+
+    @property
+    def icon(self) -> str:
+        return ICONS[self.kind]
+
+
+def build_match_query(text: str) -> Optional[str]:
+    """User text -> FTS5 MATCH expression of quoted prefix terms, or None if nothing to search"""
+    terms = TERM_RE.findall(text.lower())[:MAX_TERMS]
+    if not terms or len("".join(terms)) < MIN_QUERY_LENGTH:
+        return None
+    # Quoting keeps FTS5 operators (AND, NEAR, -, :) in user text literal
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+class SearchCache:
+    """Recent query results, LRU with a TTL"""
+
+    def __init__(self, ttl: float = SEARCH_CACHE_TTL, size: int = CACHE_SIZE):
+        self.ttl = ttl
+        self.size = size
+        self.entries: "OrderedDict[str, Tuple[float, List[SearchResult]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[List[SearchResult]]:
+        entry = self.entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: str, results: List[SearchResult]) -> None:
+        if self.ttl <= 0:
+            return
+        self.entries[key] = (time.monotonic(), results)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+
+search_cache = SearchCache()
+
+
+async def _query(match: str) -> List[SearchResult]:
+    async with aiosqlite.connect(DATABASE_PATH) as db:
+        cursor = await db.execute(f"""
+            SELECT rowid, title, snippet(search_index, 1, '', '', '…', 12), {EFFECTIVE_PREMIUM_SQL}
+            FROM search_index
+            WHERE search_index MATCH ?
+            ORDER BY bm25(search_index, 10.0, 1.0)
+            LIMIT ?
+        """, (match, FETCH_LIMIT))
+        rows = await cursor.fetchall()
+    return [
+        SearchResult(KINDS[rowid % 8], rowid // 8, title or "", (snippet or "").strip(), bool(is_premium))
+        for rowid, title, snippet, is_premium in rows
+        if rowid % 8 in KINDS
+    ]
+
+
+async def search(text: str, is_premium: bool, limit: int = 10) -> Tuple[List[SearchResult], int]:
+    """Top results the user may open and the number of premium matches held back"""
+    match = build_match_query(text)
+    if match is None:
+        return [], 0
+
+    results = search_cache.get(match)
+    if results is None:
+        try:
+            results = await _query(match)
+        except sqlite3.OperationalError as e:
+            # No FTS5 in this SQLite build, or the index was never created
+            print(f"[SEARCH] Query failed: {e}")
+            return [], 0
+        search_cache.put(match, results)
+
+    if is_premium:
+        return results[:limit], 0
+    visible = [result for result in results if not result.is_premium]
+    return visible[:limit], len(results) - len(visible)
@@ -0,0 +1,219 @@
+"""
+Ko'p jarayonli rejim: yangilanishlarni user_id bo'yicha worker'larga taqsimlash.
+
+Supervisor jarayoni yangilanishlarni bitta joyda qabul qiladi (polling yoki
+webhook) va ularni user_id % N bo'yicha worker jarayonlar navbatiga qo'yadi.
+Shu sababli bitta foydalanuvchining barcha yangilanishlari doim bitta
+worker'ga, kelish tartibida tushadi - xotiradagi sessiyalar, FSM keshi va
+boshqa per-user holatlar jarayonlar orasida toza bo'linadi.
+
+Rejalashtiruvchi faqat 0-worker'da ishlaydi. Jonli admin hisoblagichlari
+har bir jarayonda faqat o'z yozuvlarini ko'rgani uchun o'chiriladi va admin
+statistikasi to'liq qayta sanashga o'tadi.
+"""
+import asyncio
+import multiprocessing
+import signal
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+
+from config import METRICS_PORT, DB_INSTRUMENTATION
+from utils import db_instrumentation
+from utils.live_counters import live_counters
+from utils.shutdown import shutdown_coordinator
+
+# Max updates a worker handles concurrently (different users run in parallel)
+WORKER_MAX_IN_FLIGHT = 100
+WORKER_RESTART_CHECK_INTERVAL = 5
+POLLING_TIMEOUT = 30
+
+
+def extract_user_id(update: Dict[str, Any]) -> int:
+    """Find the acting user (or chat) id in a raw Telegram update"""
+    for key, payload in update.items():
+        if key == "update_id" or not isinstance(payload, dict):
+            continue
+        for field in ("from", "user", "chat"):
+            entity = payload.get(field)
+            if isinstance(entity, dict) and "id" in entity:
+                return int(entity["id"])
+        message = payload.get("message")
+        if isinstance(message, dict) and isinstance(message.get("chat"), dict):
+            return int(message["chat"]["id"])
+    return 0
+
+
+# =====================
+# Worker side
+# =====================
+
+class _OrderedFeeder:
+    """Feeds updates concurrently across users but strictly in order per user"""
+
+    def __init__(self, bot: Bot, dp: Dispatcher):
+        self.bot = bot
+        self.dp = dp
+        self.locks: Dict[int, asyncio.Lock] = {}
+        self.pending: Dict[int, int] = {}
+        self.slots = asyncio.Semaphore(WORKER_MAX_IN_FLIGHT)
+
+    async def submit(self, update: Dict[str, Any]) -> None:
+        user_id = extract_user_id(update)
+        lock = self.locks.setdefault(user_id, asyncio.Lock())
+        self.pending[user_id] = self.pending.get(user_id, 0) + 1
+        await self.slots.acquire()
+        asyncio.create_task(self._feed(user_id, lock, update))
+
+    async def _feed(self, user_id: int, lock: asyncio.Lock, update: Dict[str, Any]) -> None:
+        try:
+            async with lock:
+                await self.dp.feed_raw_update(self.bot, update)
+        except Exception as e:
+            print(f"[SHARD] Update {update.get('update_id')} failed: {e}")
+        finally:
+            self.slots.release()
+            self.pending[user_id] -= 1
+            if not self.pending[user_id]:
+                del self.pending[user_id]
+                del self.locks[user_id]
+
+    async def drain(self) -> None:
+        """Wait until every submitted update has been handled"""
+        for _ in range(WORKER_MAX_IN_FLIGHT):
+            await self.slots.acquire()
+
+
+async def _worker_loop(index: int, queue) -> None:
+    # Imported here: main.py is the entry point and imports this module
+    from main import create_bot, create_dispatcher, shutdown_bot, start_metrics_server
+    from utils.scheduler import start_scheduler
+
+    live_counters.enabled = False
+    if DB_INSTRUMENTATION:
+        db_instrumentation.install()
+    bot = create_bot()
+    dp = create_dispatcher()
+    await dp.emit_startup(bot=bot)
+
+    if index == 0:
+        await start_scheduler(bot)
+    if METRICS_PORT:
+        # One endpoint per worker: METRICS_PORT, METRICS_PORT + 1, ...
+        await start_metrics_server(METRICS_PORT + index)
+
+    feeder = _OrderedFeeder(bot, dp)
+    loop = asyncio.get_running_loop()
+    print(f"[SHARD] Worker {index} ready")
+
+    async def stop_intake():
+        # Updates still waiting on a per-user lock are not in a handler yet
+        await asyncio.wait_for(feeder.drain(), shutdown_coordinator.remaining())
+
+    try:
+        while True:
+            update = await loop.run_in_executor(None, queue.get)
+            if update is None:
+                break
+            await feeder.submit(update)
+    finally:
+        shutdown_coordinator.request(f"Worker {index} stop marker")
+        await shutdown_bot(bot, dp, stop_intake)
+        await dp.emit_shutdown(bot=bot)
+        print(f"[SHARD] Worker {index} stopped")
+
+
+def worker_main(index: int, queue) -> None:
+    """Process entry point for one shard"""
+    # The supervisor owns signal handling and stops workers via the queue
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    try:
+        asyncio.run(_worker_loop(index, queue))
+    except KeyboardInterrupt:
+        pass
+
+
+# =====================
+# Supervisor side
+# =====================
+
+class ShardSupervisor:
+    """Starts N workers and routes raw updates to them by user_id % N"""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.context = multiprocessing.get_context("spawn")
+        self.queues = [self.context.Queue() for _ in range(workers)]
+        self.processes: List[Optional[multiprocessing.Process]] = [None] * workers
+
+    def _spawn(self, index: int) -> None:
+        process = self.context.Process(
+            target=worker_main, args=(index, self.queues[index]),
+            name=f"bot-worker-{index}", daemon=True
+        )
+        process.start()
+        self.processes[index] = process
+
+    def start(self) -> None:
+        for index in range(self.workers):
+            self._spawn(index)
+        print(f"[SHARD] Started {self.workers} workers")
+
+    def route(self, update: Dict[str, Any]) -> None:
+        self.queues[extract_user_id(update) % self.workers].put(update)
+
+    async def monitor(self) -> None:
+        """Restart crashed workers; their queue keeps buffered updates"""
+        while True:
+            await asyncio.sleep(WORKER_RESTART_CHECK_INTERVAL)
+            for index, process in enumerate(self.processes):
+                if process is not None and not process.is_alive():
+                    print(f"[SHARD] ⚠️ Worker {index} exited ({process.exitcode}), restarting")
+                    self._spawn(index)
+
+    async def stop(self, timeout: float = 30) -> None:
+        for queue in self.queues:
+            queue.put(None)
+        loop = asyncio.get_running_loop()
+        for process in self.processes:
+            if process is not None:
+                await loop.run_in_executor(None, process.join, timeout)
+                if process.is_alive():
+                    # Workers ignore SIGTERM, so a stuck one has to be killed
+                    process.kill()
+        print("[SHARD] All workers stopped")
+
+    async def run_polling(self, bot: Bot, allowed_updates: List[str]) -> None:
+        """Single getUpdates loop feeding all workers"""
+        offset = None
+        while True:
+            try:
+                updates = await bot.get_updates(
+                    offset=offset, timeout=POLLING_TIMEOUT, allowed_updates=allowed_updates
+                )
+            except Exception as e:
+                print(f"[SHARD] Polling error: {e}")
+                await asyncio.sleep(5)
+                continue
+
+            for update in updates:
+                offset = update.update_id + 1
+                self.route(update.model_dump(mode="json", exclude_none=True))
+
+    def webhook_app(self, path: str, secret: str) -> web.Application:
+        """aiohttp app that validates the secret token and routes updates"""
+        async def handle_update(request: web.Request) -> web.Response:
+            if request.headers.get("X-Telegram-Bot-Api-Secret-Token") != secret:
+                return web.Response(status=401)
+            self.route(await request.json())
+            return web.Response()
+
+        async def health_check(request: web.Request) -> web.Response:
+            return web.Response(text="OK")
+
+        app = web.Application()
+        app.router.add_get("/", health_check)
+        app.router.add_post(path, handle_update)
+        return app
@@ -0,0 +1,136 @@
+"""
+SIGTERM/SIGINT kelganda botni tartibli to'xtatish.
+
+Signal kelgach `stopping` bayrog'i yoqiladi: rejalashtiruvchi vazifalari va
+admin xabar tarqatish sikllari joriy xabarni yuborib bo'lgach to'xtaydi.
+So'ng bosqichlar ketma-ket bajariladi - yangilanishlarni qabul qilishni
+to'xtatish, ishlayotgan handlerlar va vazifalarni kutish (umumiy muddat
+SHUTDOWN_TIMEOUT ichida), APScheduler, FSM storage va bot sessiyasini yopish.
+Har bir bosqich qancha vaqt olgani logga yoziladi.
+"""
+import asyncio
+import signal
+import time
+from contextlib import suppress
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_EXECUTED, EVENT_JOB_SUBMITTED
+from aiogram.types import TelegramObject
+
+from config import SHUTDOWN_TIMEOUT
+
+Phase = Tuple[str, Callable[[], Awaitable[Any]]]
+
+
+class ShutdownCoordinator:
+    """Tracks in-flight work and runs the shutdown phases against one deadline"""
+
+    def __init__(self, timeout: float = SHUTDOWN_TIMEOUT):
+        self.timeout = timeout
+        self.requested = asyncio.Event()
+        self.deadline = 0.0
+        self.in_flight = 0
+        self._handlers_idle = asyncio.Event()
+        self._handlers_idle.set()
+        self.running_jobs: Set[str] = set()
+        self._jobs_idle = asyncio.Event()
+        self._jobs_idle.set()
+
+    @property
+    def stopping(self) -> bool:
+        return self.requested.is_set()
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+    def request(self, reason: str = "shutdown") -> None:
+        if self.stopping:
+            return
+        self.deadline = time.monotonic() + self.timeout
+        self.requested.set()
+        print(f"[SHUTDOWN] {reason} received, stopping within {self.timeout:.0f}s")
+
+    def install_signal_handlers(self) -> None:
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            # Signal handlers are not available on Windows
+            with suppress(NotImplementedError):
+                loop.add_signal_handler(sig, self.request, sig.name)
+
+    async def wait(self, *tasks: "asyncio.Task[Any]") -> None:
+        """Block until a signal arrives or one of the given tasks ends"""
+        waiter = asyncio.create_task(self.requested.wait())
+        try:
+            await asyncio.wait([waiter, *tasks], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            waiter.cancel()
+
+    # =====================
+    # In-flight tracking
+    # =====================
+
+    async def track_update(self, handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+                           event: TelegramObject, data: Dict[str, Any]) -> Any:
+        """Outer update middleware counting handlers that are still running"""
+        self.in_flight += 1
+        self._handlers_idle.clear()
+        try:
+            return await handler(event, data)
+        finally:
+            self.in_flight -= 1
+            if not self.in_flight:
+                self._handlers_idle.set()
+
+    def track_scheduler(self, scheduler) -> None:
+        """Follow running APScheduler jobs (one instance per job id)"""
+        def listener(event) -> None:
+            if event.code == EVENT_JOB_SUBMITTED:
+                self.running_jobs.add(event.job_id)
+                self._jobs_idle.clear()
+            else:
+                self.running_jobs.discard(event.job_id)
+                if not self.running_jobs:
+                    self._jobs_idle.set()
+
+        scheduler.add_listener(listener, EVENT_JOB_SUBMITTED | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
+
+    async def drain_handlers(self) -> None:
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self._handlers_idle.wait(), self.remaining())
+        if self.in_flight:
+            print(f"[SHUTDOWN] ⚠️ {self.in_flight} handlers still running at the deadline")
+
+    async def drain_jobs(self) -> None:
+        # Jobs see `stopping` and return after the message they are sending
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self._jobs_idle.wait(), self.remaining())
+        if self.running_jobs:
+            print(f"[SHUTDOWN] ⚠️ Jobs still running at the deadline: {', '.join(sorted(self.running_jobs))}")
+
+    # =====================
+    # Shutdown sequence
+    # =====================
+
+    async def run(self, phases: List[Optional[Phase]]) -> None:
+        """Run phases in order; a failing phase is logged and the rest still run"""
+        self.request()
+        started = time.monotonic()
+        timings = []
+
+        for phase in phases:
+            if phase is None:
+                continue
+            name, step = phase
+            phase_started = time.monotonic()
+            try:
+                await step()
+            except Exception as e:
+                print(f"[SHUTDOWN] ❌ {name} failed: {e}")
+            elapsed = time.monotonic() - phase_started
+            timings.append(f"{name} {elapsed:.2f}s")
+            print(f"[SHUTDOWN] {name}: {elapsed:.2f}s")
+
+        print(f"[SHUTDOWN] ✅ Done in {time.monotonic() - started:.2f}s ({', '.join(timings)})")
+
+
+shutdown_coordinator = ShutdownCoordinator()
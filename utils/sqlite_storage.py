@@ -0,0 +1,225 @@
+"""
+FSM holatlari uchun SQLite asosidagi doimiy storage.
+
+Holat va ma'lumotlar avval xotiradagi LRU keshga yoziladi, o'zgargan
+kalitlar esa fon vazifasi tomonidan har FLUSH_INTERVAL soniyada bitta
+tranzaksiyada bazaga yoziladi. Bot qayta ishga tushganda holatlar
+bazadan tiklanadi, TTL dan eski holatlar esa davriy ravishda o'chiriladi.
+
+Har bir jarayonda o'z keshi bo'ladi - bir nechta jarayonda ishlatilganda
+bitta foydalanuvchining yangilanishlari doim bitta jarayonga yo'naltirilishi
+kerak (utils/sharding.py shunday qiladi).
+"""
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from contextlib import suppress
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import aiosqlite
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+
+from config import DATABASE_PATH
+
+DEFAULT_CACHE_SIZE = 10000
+DEFAULT_TTL = 7 * 24 * 60 * 60  # idle states expire after a week
+FLUSH_INTERVAL = 0.5
+PURGE_INTERVAL = 60 * 60
+
+# (state, data, updated_at)
+Record = Tuple[Optional[str], Dict[str, Any], float]
+
+
+class SQLiteStorage(BaseStorage):
+    """aiogram FSM storage persisted in SQLite with an in-memory LRU in front"""
+
+    def __init__(self, path: str = DATABASE_PATH, cache_size: int = DEFAULT_CACHE_SIZE,
+                 ttl: int = DEFAULT_TTL, flush_interval: float = FLUSH_INTERVAL,
+                 key_builder: Optional[KeyBuilder] = None):
+        self.path = path
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.key_builder = key_builder or DefaultKeyBuilder()
+
+        self._cache: "OrderedDict[str, Record]" = OrderedDict()
+        # Pending writes survive LRU eviction until they are flushed
+        self._dirty: Dict[str, Record] = {}
+        self._flushing: Dict[str, Record] = {}
+        self._db: Optional[aiosqlite.Connection] = None
+        self._db_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._last_purge = 0.0
+
+    # =====================
+    # Connection and background flush
+    # =====================
+
+    async def _connection(self) -> aiosqlite.Connection:
+        if self._db is None:
+            self._db = await aiosqlite.connect(self.path)
+            await self._db.execute("""
+                CREATE TABLE IF NOT EXISTS fsm_storage (
+                    key TEXT PRIMARY KEY,
+                    state TEXT,
+                    data TEXT,
+                    updated_at INTEGER NOT NULL
+                ) WITHOUT ROWID
+            """)
+            await self._db.execute("CREATE INDEX IF NOT EXISTS idx_fsm_storage_updated ON fsm_storage (updated_at)")
+            await self._db.commit()
+        return self._db
+
+    def _schedule_flush(self) -> None:
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        # Keep running while writes arrive during a flush
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[FSM] Flush error: {e}")
+            if not self._dirty:
+                return
+
+    async def flush(self) -> int:
+        """Write all pending changes in one transaction"""
+        if not self._dirty:
+            return 0
+
+        pending, self._dirty = self._dirty, {}
+        self._flushing = pending
+        upserts = []
+        deletes = []
+        for key, (state, data, updated_at) in pending.items():
+            if state is None and not data:
+                deletes.append((key,))
+            else:
+                upserts.append((key, state, json.dumps(data, ensure_ascii=False, default=str), int(updated_at)))
+
+        async with self._db_lock:
+            db = await self._connection()
+            try:
+                if upserts:
+                    await db.executemany("""
+                        INSERT INTO fsm_storage (key, state, data, updated_at)
+                        VALUES (?, ?, ?, ?)
+                        ON CONFLICT(key) DO UPDATE SET
+                            state = excluded.state,
+                            data = excluded.data,
+                            updated_at = excluded.updated_at
+                    """, upserts)
+                if deletes:
+                    await db.executemany("DELETE FROM fsm_storage WHERE key = ?", deletes)
+
+                if time.time() - self._last_purge >= PURGE_INTERVAL:
+                    await self._purge_expired(db)
+
+                await db.commit()
+            except BaseException:
+                # Put the batch back (newer writes win) and retry on the next flush
+                for key, record in pending.items():
+                    self._dirty.setdefault(key, record)
+                raise
+            finally:
+                self._flushing = {}
+
+        return len(pending)
+
+    async def _purge_expired(self, db: aiosqlite.Connection) -> None:
+        cutoff = time.time() - self.ttl
+        cursor = await db.execute("DELETE FROM fsm_storage WHERE updated_at < ?", (int(cutoff),))
+        self._last_purge = time.time()
+
+        expired = [key for key, record in self._cache.items() if record[2] < cutoff]
+        for key in expired:
+            del self._cache[key]
+
+        if cursor.rowcount:
+            print(f"[FSM] Purged {cursor.rowcount} expired states")
+
+    # =====================
+    # Cache
+    # =====================
+
+    async def _load(self, key: str) -> Record:
+        record = self._cache.get(key)
+        if record is None:
+            record = self._dirty.get(key) or self._flushing.get(key)
+        if record is None:
+            async with self._db_lock:
+                db = await self._connection()
+                cursor = await db.execute("SELECT state, data, updated_at FROM fsm_storage WHERE key = ?", (key,))
+                row = await cursor.fetchone()
+            # A _store for this key while we waited on the lock is newer than the row
+            newer = self._cache.get(key) or self._dirty.get(key) or self._flushing.get(key)
+            if newer is not None:
+                record = newer
+            elif row:
+                record = (row[0], json.loads(row[1]) if row[1] else {}, row[2])
+            else:
+                record = (None, {}, time.time())
+
+        if record[2] < time.time() - self.ttl:
+            record = (None, {}, time.time())
+
+        self._remember(key, record)
+        return record
+
+    def _remember(self, key: str, record: Record) -> None:
+        self._cache[key] = record
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _store(self, key: str, state: Optional[str], data: Dict[str, Any]) -> None:
+        record = (state, data, time.time())
+        self._remember(key, record)
+        self._dirty[key] = record
+        self._schedule_flush()
+
+    # =====================
+    # BaseStorage API
+    # =====================
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        storage_key = self.key_builder.build(key)
+        _, data, _ = await self._load(storage_key)
+        self._store(storage_key, state.state if isinstance(state, State) else state, data)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        state, _, _ = await self._load(self.key_builder.build(key))
+        return state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, dict):
+            raise DataNotDictLikeError(
+                f"Data must be a dict or dict-like object, got {type(data).__name__}"
+            )
+        storage_key = self.key_builder.build(key)
+        state, _, _ = await self._load(storage_key)
+        self._store(storage_key, state, data.copy())
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        _, data, _ = await self._load(self.key_builder.build(key))
+        return data.copy()
+
+    async def close(self) -> None:
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+            # A flush cancelled mid-transaction puts its batch back into _dirty
+            with suppress(asyncio.CancelledError):
+                await self._flush_task
+        try:
+            while self._dirty:
+                await self.flush()
+        finally:
+            if self._db is not None:
+                await self._db.close()
+                self._db = None
@@ -0,0 +1,161 @@
+"""
+Takrorlash (spaced repetition) tizimi - SM-2 algoritmi.
+
+Har bir (foydalanuvchi, savol) juftligi uchun karta holati srs_cards
+jadvalida saqlanadi. (user_id, due_at) indeksi navbatdagi takrorlashni
+O(log n) da topadi, rejalashtiruvchi esa eslatmalarni user_id bo'yicha
+keyset sahifalash bilan partiyalab yuboradi.
+"""
+import time
+from typing import AsyncIterator, List, Optional, Tuple
+
+import aiosqlite
+
+from config import DATABASE_PATH
+
+DAY_SECONDS = 24 * 60 * 60
+MIN_EASE = 1.3
+DEFAULT_EASE = 2.5
+# Card counts as a learned word once its interval reaches this many days
+MATURE_INTERVAL_DAYS = 21
+
+# Review answer -> SM-2 quality (0-5)
+QUALITY_CORRECT = 4
+QUALITY_WRONG = 1
+
+REMINDER_BATCH_SIZE = 500
+
+
+def sm2(repetitions: int, interval_days: float, ease: float, quality: int) -> Tuple[int, float, float]:
+    """One SM-2 step. Returns (repetitions, interval_days, ease)"""
+    if quality < 3:
+        repetitions = 0
+        interval_days = 1
+    else:
+        repetitions += 1
+        if repetitions == 1:
+            interval_days = 1
+        elif repetitions == 2:
+            interval_days = 6
+        else:
+            interval_days = round(interval_days * ease, 2)
+
+    ease = ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
+    return repetitions, interval_days, max(MIN_EASE, ease)
+
+
+async def record_reviews(user_id: int, results: List[Tuple[int, bool]]) -> int:
+    """
+    Apply (question_id, is_correct) results to the user's cards in one batch.
+    Returns how many cards became mature (newly learned words).
+    """
+    if not results:
+        return 0
+
+    now = int(time.time())
+    question_ids = list({question_id for question_id, _ in results})
+    placeholders = ",".join("?" * len(question_ids))
+
+    async with aiosqlite.connect(DATABASE_PATH) as db:
+        cursor = await db.execute(f"""
+            SELECT question_id, repetitions, interval_days, ease
+            FROM srs_cards
+            WHERE user_id = ? AND question_id IN ({placeholders})
+        """, [user_id, *question_ids])
+        cards = {row[0]: row[1:] for row in await cursor.fetchall()}
+
+        matured = 0
+        for question_id, is_correct in results:
+            repetitions, interval_days, ease = cards.get(question_id, (0, 0, DEFAULT_EASE))
+            quality = QUALITY_CORRECT if is_correct else QUALITY_WRONG
+            new_state = sm2(repetitions, interval_days, ease, quality)
+            if interval_days < MATURE_INTERVAL_DAYS <= new_state[1]:
+                matured += 1
+            cards[question_id] = new_state
+
+        rows = []
+        for question_id in question_ids:
+            repetitions, interval_days, ease = cards[question_id]
+            rows.append((user_id, question_id, repetitions, interval_days, ease,
+                         now + int(interval_days * DAY_SECONDS), now))
+
+        await db.executemany("""
+            INSERT INTO srs_cards (user_id, question_id, repetitions, interval_days, ease, due_at, last_reviewed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(user_id, question_id) DO UPDATE SET
+                repetitions = excluded.repetitions,
+                interval_days = excluded.interval_days,
+                ease = excluded.ease,
+                due_at = excluded.due_at,
+                last_reviewed_at = excluded.last_reviewed_at
+        """, rows)
+
+        if matured:
+            await db.execute("""
+                UPDATE users SET words_learned = words_learned + ? WHERE user_id = ?
+            """, (matured, user_id))
+
+        await db.commit()
+    return matured
+
+
+async def next_due_card(user_id: int) -> Optional[Tuple]:
+    """
+    Earliest due card joined with its question:
+    (question_id, question_text, option_a, option_b, option_c, option_d, correct_answer, explanation)
+    """
+    now = int(time.time())
+    async with aiosqlite.connect(DATABASE_PATH) as db:
+        while True:
+            cursor = await db.execute("""
+                SELECT c.question_id, q.question_text, q.option_a, q.option_b, q.option_c, q.option_d,
+                       q.correct_answer, q.explanation, q.id
+                FROM srs_cards c
+                LEFT JOIN questions q ON q.id = c.question_id
+                WHERE c.user_id = ? AND c.due_at <= ?
+                ORDER BY c.due_at
+                LIMIT 1
+            """, (user_id, now))
+            row = await cursor.fetchone()
+            if not row:
+                return None
+            if row[8] is not None:
+                return row[:8]
+
+            # Question was deleted - drop the orphan card and look again
+            await db.execute("DELETE FROM srs_cards WHERE user_id = ? AND question_id = ?", (user_id, row[0]))
+            await db.commit()
+
+
+async def get_srs_counts(user_id: int) -> Tuple[int, int]:
+    """(due now, total cards) for the user"""
+    now = int(time.time())
+    async with aiosqlite.connect(DATABASE_PATH) as db:
+        cursor = await db.execute("""
+            SELECT COUNT(*), COALESCE(SUM(due_at <= ?), 0)
+            FROM srs_cards WHERE user_id = ?
+        """, (now, user_id))
+        total, due = await cursor.fetchone()
+    return due, total
+
+
+async def iter_due_users(batch_size: int = REMINDER_BATCH_SIZE) -> AsyncIterator[List[Tuple[int, int]]]:
+    """Yield batches of (user_id, due_count), keyset-paginated by user_id"""
+    now = int(time.time())
+    last_user_id = -1
+    while True:
+        async with aiosqlite.connect(DATABASE_PATH) as db:
+            cursor = await db.execute("""
+                SELECT user_id, COUNT(*)
+                FROM srs_cards
+                WHERE user_id > ? AND due_at <= ?
+                GROUP BY user_id
+                ORDER BY user_id
+                LIMIT ?
+            """, (last_user_id, now, batch_size))
+            batch = await cursor.fetchall()
+
+        if not batch:
+            return
+        yield batch
+        last_user_id = batch[-1][0]
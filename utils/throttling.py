@@ -0,0 +1,153 @@
+"""
+Foydalanuvchi bo'yicha cheklov (throttling).
+
+Har bir foydalanuvchining token paqiri (token bucket) bor: THROTTLE_RATE
+token/soniya tezlikda to'ladi, sig'imi THROTTLE_BURST. Har bir tugma
+bosilishi callback_data prefiksiga qarab narxga ega (ko'p SQL so'rov
+qiladigan ekranlar qimmatroq). Token yetmasa handler ishga tushmaydi:
+callback tayyor "kuting" javobini oladi (cache_time bilan - Telegram
+ilovasi qayta bosishlarni o'zi javoblaydi), xabarlar esa jimgina tashlanadi.
+
+Har bir faol foydalanuvchi uchun bitta kichik yozuv saqlanadi. Paqir to'lishi
+uchun yetarli vaqt ishlatilmagan yozuvlar o'chiriladi - ular baribir to'la
+paqirga teng.
+"""
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from aiogram import Dispatcher
+from aiogram.types import CallbackQuery, Message, TelegramObject
+
+from config import ADMIN_ID, THROTTLE_BURST, THROTTLE_RATE
+from utils.metrics import callback_prefix
+from utils.pagination import TOKEN_PREFIX
+
+Handler = Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]]
+
+# Token cost per callback prefix; roughly the number of DB round trips the screen makes
+CALLBACK_COSTS: Dict[str, float] = {
+    "user_section_": 4,
+    "user_subsection_": 3,
+    "view_content_": 3,
+    "sections": 3,
+    "take_quizzes": 3,
+    "popular_quizzes": 3,
+    # Next/previous page of any keyset listing (utils/pagination.py)
+    TOKEN_PREFIX: 3,
+    "start_quiz_": 2,
+    "retake_quiz_": 2,
+    "rating": 2,
+    "my_stats": 2,
+    "referral_stats": 2,
+    # Albums of a whole lesson; the handler also sleeps between sends
+    "send_all_sub_": 6,
+    "send_all_sec_": 6,
+    # Answers are kept in memory until the quiz ends
+    "quiz_answer_": 0.5,
+}
+DEFAULT_COST = 1.0
+COMMAND_COST = 2.0
+WAIT_TEXT = "⏳ Juda tez! Biroz kuting..."
+# A flooding user gets the message reply at most this often
+WARN_INTERVAL = 10.0
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated_at", "warned_at")
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated_at = now
+        self.warned_at = 0.0
+
+
+class UserThrottle:
+    """Per-user token buckets with LRU idle eviction"""
+
+    def __init__(self, rate: float = THROTTLE_RATE, burst: float = THROTTLE_BURST):
+        self.rate = rate
+        self.burst = burst
+        # An idle bucket is full again after this long, so it can be dropped
+        self.idle_ttl = burst / rate if rate > 0 else 0.0
+        self.buckets: "OrderedDict[int, _Bucket]" = OrderedDict()
+        self.allowed = 0
+        self.throttled = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0 and self.burst > 0
+
+    def setup(self, dp: Dispatcher) -> None:
+        if not self.enabled:
+            return
+        # Outer middlewares run before filters, so a throttled update never reaches the DB
+        dp.message.outer_middleware(self.middleware)
+        dp.callback_query.outer_middleware(self.middleware)
+
+    def cost(self, event: TelegramObject) -> float:
+        if isinstance(event, CallbackQuery):
+            data = event.data or ""
+            prefix = TOKEN_PREFIX if data.startswith(TOKEN_PREFIX) else callback_prefix(data)
+            return CALLBACK_COSTS.get(prefix, DEFAULT_COST)
+        if isinstance(event, Message) and (event.text or "").startswith("/"):
+            return COMMAND_COST
+        return DEFAULT_COST
+
+    def take(self, user_id: int, cost: float, now: Optional[float] = None) -> Tuple[bool, _Bucket]:
+        """Spend `cost` tokens if the user has them"""
+        now = time.monotonic() if now is None else now
+        self._evict(now)
+        bucket = self.buckets.get(user_id)
+        if bucket is None:
+            bucket = self.buckets[user_id] = _Bucket(self.burst, now)
+        else:
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated_at) * self.rate)
+            bucket.updated_at = now
+            self.buckets.move_to_end(user_id)
+
+        if bucket.tokens >= cost:
+            bucket.tokens -= cost
+            self.allowed += 1
+            return True, bucket
+        self.throttled += 1
+        return False, bucket
+
+    def _evict(self, now: float) -> None:
+        # Buckets are ordered by last use, so only the head can be stale
+        while self.buckets:
+            user_id, bucket = next(iter(self.buckets.items()))
+            if now - bucket.updated_at < self.idle_ttl:
+                return
+            del self.buckets[user_id]
+
+    def retry_after(self, bucket: _Bucket, cost: float) -> int:
+        return max(1, math.ceil((cost - bucket.tokens) / self.rate))
+
+    async def middleware(self, handler: Handler, event: TelegramObject, data: Dict[str, Any]) -> Any:
+        user = getattr(event, "from_user", None)
+        if user is None or user.id == ADMIN_ID:
+            return await handler(event, data)
+
+        cost = self.cost(event)
+        allowed, bucket = self.take(user.id, cost)
+        if allowed:
+            return await handler(event, data)
+
+        try:
+            if isinstance(event, CallbackQuery):
+                # The client shows this for repeated taps itself until cache_time runs out
+                await event.answer(WAIT_TEXT, cache_time=self.retry_after(bucket, cost))
+            elif isinstance(event, Message) and bucket.updated_at - bucket.warned_at >= WARN_INTERVAL:
+                bucket.warned_at = bucket.updated_at
+                await event.answer(WAIT_TEXT)
+        except Exception as e:
+            print(f"[THROTTLE] Wait answer failed: {e}")
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"active_users": len(self.buckets), "allowed": self.allowed, "throttled": self.throttled}
+
+
+throttle = UserThrottle()